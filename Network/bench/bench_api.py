@@ -0,0 +1,219 @@
+# Network/bench/bench_api.py
+"""
+Load/latency suite for the Network API (in-process ASGI via httpx, no sockets).
+
+    python -m Network.bench.bench_api --fleets 1000 10000 100000 --out bench.json
+    python -m Network.bench.bench_api --fleets 10000 --baseline bench.json --max-regression 0.25
+
+For every fleet size a fresh runtime is started and preloaded with synthetic
+peers, then each scenario runs `--requests` calls at `--concurrency`:
+
+    enroll       POST /api/network/enroll (fresh invites, new peers)
+    status       GET  /api/network/status
+    peers_self   GET  /api/network/peers/self
+    admin_list   GET  /api/admin/network/peers?limit=100 (random cursor)
+    revoke       POST /api/admin/network/peers/{id}/revoke
+
+Results (req/s, p50/p95/p99 ms, errors) are written as JSON. With --baseline the
+run fails (exit 1) when a scenario's p95 grows or its req/s drops by more than
+--max-regression compared to the baseline file.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+os.environ.setdefault("NETWORK_TRUSTED_CIDRS", "127.0.0.0/8")
+os.environ.setdefault("NETWORK_LOG_SAMPLE_DEFAULT", "0")   # keep access lines out of the measurement
+os.environ.setdefault("NETWORK_ENV_PATH", "/nonexistent.env")
+os.environ.setdefault("WG_SUBNET", "10.64.0.0/10")                 # room for the 100k fleet (a /16 holds 65k)
+os.environ.setdefault("NETWORK_ADMIT_ENROLL_RATE_IP", "0")        # every bench client is 127.0.0.1
+
+from Network import bootstrap  # noqa: E402
+from Network.main import app  # noqa: E402
+from Network.network.models import InviteCreate  # noqa: E402
+
+ADMIN = {"x-user-id": "bench-admin", "x-user-role": "admin"}
+SCENARIOS = ("enroll", "status", "peers_self", "admin_list", "revoke")
+
+
+def _pct(sorted_ms: List[float], p: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    i = min(len(sorted_ms) - 1, max(0, int(round(p / 100.0 * len(sorted_ms))) - 1))
+    return sorted_ms[i]
+
+
+def _preload(n: int, rnd: random.Random) -> List[str]:
+    """Synthetic fleet written through the manager (allocator + store stay consistent)."""
+    mgr = bootstrap.current_runtime().wg_manager
+    ids = []
+    for i in range(n):
+        p = mgr._allocate_and_save(
+            user_id=f"user{i}",
+            device_id=f"dev{i}",
+            public_key=f"PK{i:08d}{rnd.getrandbits(32):08x}",
+            tags={"team": f"t{i % 20}", "os": rnd.choice(("linux", "windows", "macos"))},
+        )
+        ids.append(p.peer_id)
+    return ids
+
+
+async def _drive(total: int, concurrency: int, call: Callable[[int], Awaitable[httpx.Response]]) -> dict:
+    lat: List[float] = []
+    errors = 0
+    nxt = 0
+
+    async def worker() -> None:
+        nonlocal nxt, errors
+        while nxt < total:
+            i = nxt
+            nxt += 1
+            t0 = perf_counter()
+            try:
+                r = await call(i)
+                if r.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            lat.append((perf_counter() - t0) * 1000.0)
+
+    t0 = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = perf_counter() - t0
+    lat.sort()
+    return {
+        "requests": len(lat),
+        "errors": errors,
+        "rps": round(len(lat) / wall, 1) if wall > 0 else 0.0,
+        "p50_ms": round(_pct(lat, 50), 3),
+        "p95_ms": round(_pct(lat, 95), 3),
+        "p99_ms": round(_pct(lat, 99), 3),
+    }
+
+
+async def run_fleet(n: int, *, scenarios: List[str], requests: int, concurrency: int, seed: int) -> List[dict]:
+    rnd = random.Random(seed)
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+    out: List[dict] = []
+    async with app.router.lifespan_context(app):
+        t0 = perf_counter()
+        ids = _preload(n, rnd)
+        preload_s = perf_counter() - t0
+        mgr = bootstrap.current_runtime().wg_manager
+        users = [rnd.randrange(n) for _ in range(requests)]
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+            calls: Dict[str, Callable[[int], Awaitable[httpx.Response]]] = {}
+
+            if "enroll" in scenarios:
+                invites = mgr.create_invites(actor_user_id="bench-admin", items=[
+                    InviteCreate(user_id=f"new{i}", ttl_seconds=3600) for i in range(requests)
+                ])
+                calls["enroll"] = lambda i: c.post("/api/network/enroll", headers={"x-user-id": invites[i].user_id}, json={
+                    "invite_code": invites[i].invite_code,
+                    "device": {"device_id": f"newdev{i}"},
+                    "client_public_key": f"NEWPK{i:08d}",
+                })
+            calls["status"] = lambda i: c.get("/api/network/status", headers={"x-user-id": f"user{users[i]}"})
+            calls["peers_self"] = lambda i: c.get("/api/network/peers/self", headers={"x-user-id": f"user{users[i]}"})
+            sorted_ids = sorted(ids)
+            cursors = [sorted_ids[rnd.randrange(n)] for _ in range(requests)]
+            calls["admin_list"] = lambda i: c.get("/api/admin/network/peers", headers=ADMIN, params={"limit": 100, "cursor": cursors[i]})
+            victims = rnd.sample(ids, min(requests, n))
+            calls["revoke"] = lambda i: c.post(f"/api/admin/network/peers/{victims[i]}/revoke", headers=ADMIN)
+
+            for name in scenarios:  # revoke runs last: it mutates the fleet
+                total = min(requests, len(victims)) if name == "revoke" else requests
+                res = await _drive(total, concurrency, calls[name])
+                out.append({"fleet": n, "scenario": name, "preload_s": round(preload_s, 2), **res})
+    return out
+
+
+def _meta(args) -> dict:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        rev = ""
+    return {
+        "git_rev": rev,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "store": os.environ.get("NETWORK_STORE", "memory"),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], max_regression: float) -> List[str]:
+    """Human-readable list of regressions (empty = pass)."""
+    base = {(r["fleet"], r["scenario"]): r for r in baseline}
+    failures = []
+    for r in results:
+        b = base.get((r["fleet"], r["scenario"]))
+        if b is None:
+            continue
+        if b["p95_ms"] > 0 and r["p95_ms"] > b["p95_ms"] * (1.0 + max_regression):
+            failures.append(f"{r['scenario']}@{r['fleet']}: p95 {b['p95_ms']:.2f} -> {r['p95_ms']:.2f} ms")
+        if b["rps"] > 0 and r["rps"] < b["rps"] * (1.0 - max_regression):
+            failures.append(f"{r['scenario']}@{r['fleet']}: req/s {b['rps']:,.0f} -> {r['rps']:,.0f}")
+        if r["errors"] > b.get("errors", 0):
+            failures.append(f"{r['scenario']}@{r['fleet']}: errors {b.get('errors', 0)} -> {r['errors']}")
+    return failures
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--fleets", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    ap.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--store", choices=("memory", "sqlite"), default="memory")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", type=Path, help="write results JSON here")
+    ap.add_argument("--baseline", type=Path, help="compare against a previous --out file")
+    ap.add_argument("--max-regression", type=float, default=0.2, help="allowed relative p95 / req/s regression")
+    args = ap.parse_args()
+
+    scenarios = [s for s in SCENARIOS if s in args.scenarios]
+    os.environ["NETWORK_STORE"] = args.store
+    results: List[dict] = []
+    for n in args.fleets:
+        if args.store == "sqlite":
+            os.environ["NETWORK_SQLITE_PATH"] = str(Path(tempfile.mkdtemp(prefix="bench-api-")) / "network.db")
+        results += asyncio.run(run_fleet(n, scenarios=scenarios, requests=args.requests, concurrency=args.concurrency, seed=args.seed))
+
+    print(f"{'fleet':>7} {'scenario':>11} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for r in results:
+        print(f"{r['fleet']:>7} {r['scenario']:>11} {r['rps']:>9,.0f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>6}")
+
+    doc = {"meta": _meta(args), "results": results}
+    if args.out:
+        args.out.write_text(json.dumps(doc, indent=2))
+
+    if args.baseline:
+        failures = compare(results, json.loads(args.baseline.read_text())["results"], args.max_regression)
+        for f in failures:
+            print(f"REGRESSION {f}")
+        if failures:
+            sys.exit(1)
+        print(f"OK: no regression beyond {args.max_regression:.0%}")
+
+
+if __name__ == "__main__":
+    main()
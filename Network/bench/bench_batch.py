@@ -0,0 +1,85 @@
+# Network/bench/bench_batch.py
+"""
+Per-item admin calls vs. batch endpoints (in-process ASGI, no network).
+
+    python -m Network.bench.bench_batch --items 1000
+
+Reports items/s for invites, revokes and patches, looped vs. batched.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+from time import perf_counter
+
+import httpx
+
+os.environ.setdefault("NETWORK_TRUSTED_CIDRS", "127.0.0.0/8")
+
+from Network.main import app  # noqa: E402
+
+ADMIN = {"x-user-id": "bench-admin", "x-user-role": "admin"}
+BASE = "/api/admin/network"
+
+
+async def _enroll(c: httpx.AsyncClient, invites: list[dict]) -> list[str]:
+    ids = []
+    for i, inv in enumerate(invites):
+        r = await c.post("/api/network/enroll", headers={"x-user-id": inv["user_id"]}, json={
+            "invite_code": inv["invite_code"],
+            "device": {"device_id": f"dev-{inv['user_id']}"},
+            "client_public_key": f"KEY{inv['user_id']}",
+        })
+        ids.append(r.json()["peer_id"])
+    return ids
+
+
+async def run(n: int) -> None:
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+            rows = []
+
+            t0 = perf_counter()
+            looped = [(await c.post(f"{BASE}/invites", headers=ADMIN, json={"user_id": f"a{i}"})).json() for i in range(n)]
+            loop_s = perf_counter() - t0
+            t0 = perf_counter()
+            r = await c.post(f"{BASE}/invites/batch", headers=ADMIN, json={"items": [{"user_id": f"b{i}"} for i in range(n)]})
+            batch_s = perf_counter() - t0
+            batched = r.json()["items"]
+            rows.append(("invites", loop_s, batch_s))
+
+            ids_a = await _enroll(c, looped)
+            ids_b = await _enroll(c, batched)
+
+            t0 = perf_counter()
+            for pid in ids_a:
+                await c.patch(f"{BASE}/peers/{pid}", headers=ADMIN, json={"tags": {"team": "x"}})
+            loop_s = perf_counter() - t0
+            t0 = perf_counter()
+            await c.patch(f"{BASE}/peers", headers=ADMIN, json={"items": [{"peer_id": pid, "tags": {"team": "x"}} for pid in ids_b]})
+            rows.append(("patch", loop_s, perf_counter() - t0))
+
+            t0 = perf_counter()
+            for pid in ids_a:
+                await c.post(f"{BASE}/peers/{pid}/revoke", headers=ADMIN)
+            loop_s = perf_counter() - t0
+            t0 = perf_counter()
+            await c.post(f"{BASE}/peers/revoke", headers=ADMIN, json={"peer_ids": ids_b})
+            rows.append(("revoke", loop_s, perf_counter() - t0))
+
+    print(f"{'op':>8} {'loop/s':>10} {'batch/s':>10} {'speedup':>8}")
+    for op, loop_s, batch_s in rows:
+        print(f"{op:>8} {n / loop_s:>10,.0f} {n / batch_s:>10,.0f} {loop_s / batch_s:>7.1f}x")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--items", type=int, default=1000)
+    args = ap.parse_args()
+    asyncio.run(run(args.items))
+
+
+if __name__ == "__main__":
+    main()
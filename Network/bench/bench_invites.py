@@ -0,0 +1,67 @@
+# Network/bench/bench_invites.py
+"""
+Invite storage memory: generate many short-lived invites, then sweep.
+
+    python -m Network.bench.bench_invites --invites 1000000
+
+Reports traced Python heap after generation and after the sweep, plus sweep time.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from datetime import timedelta
+from time import perf_counter
+
+from Network.network.models import InviteInfo
+from Network.network.store import InMemoryNetworkStore, utcnow
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):8.1f} MB"
+
+
+def run(n: int, used_every: int) -> None:
+    tracemalloc.start()
+    store = InMemoryNetworkStore(invite_grace_seconds=60)
+    base = tracemalloc.get_traced_memory()[0]
+
+    now = utcnow()
+    t0 = perf_counter()
+    batch = []
+    for i in range(n):
+        batch.append(InviteInfo(
+            invite_code=f"inv{i:09d}",
+            user_id=f"u{i % 5000}",
+            created_at=now,
+            expires_at=now + timedelta(seconds=60),
+        ))
+        if len(batch) == 10000:
+            store.save_invites(batch)
+            batch = []
+    store.save_invites(batch)
+    for i in range(0, n, used_every):
+        store.consume_invite(f"inv{i:09d}")
+    gen_s = perf_counter() - t0
+    after_gen = tracemalloc.get_traced_memory()[0] - base
+    print(f"generated {n:,} invites in {gen_s:.1f}s: {_mb(after_gen)}  {store.invite_stats()}")
+
+    t0 = perf_counter()
+    evicted = store.sweep_invites(now=now + timedelta(seconds=121))
+    sweep_s = perf_counter() - t0
+    gc.collect()
+    after_sweep = tracemalloc.get_traced_memory()[0] - base
+    print(f"swept {evicted:,} in {sweep_s:.1f}s: {_mb(after_sweep)}  {store.invite_stats()}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--invites", type=int, default=1_000_000)
+    ap.add_argument("--used-every", type=int, default=3, help="consume every n-th invite")
+    args = ap.parse_args()
+    run(args.invites, args.used_every)
+
+
+if __name__ == "__main__":
+    main()
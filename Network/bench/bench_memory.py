@@ -0,0 +1,92 @@
+# Network/bench/bench_memory.py
+"""
+Memory per peer: pydantic PeerInfo objects vs. the store's compact PeerRecord rows.
+
+    python -m Network.bench.bench_memory --peers 100000 1000000
+
+Each representation is built in a fresh child process (spawn), so the numbers are
+RSS deltas of only that data:
+
+    pydantic   dict of PeerInfo (what InMemoryNetworkStore used to hold)
+    record     dict of PeerRecord via PeerCodec (interned tag strings, shared allowed_ips)
+
+Peers look like a real fleet: random 128-bit ids, 44-char keys, one allowed_ips
+list, 10% revoked, and the tags enroll writes (the device identity: unique
+device_id / fingerprint, a few platforms and client versions).
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import multiprocessing as mp
+import os
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+
+KINDS = ("pydantic", "record")
+PLATFORMS = ("linux", "windows", "macos", "android", "ios")
+
+
+def _rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _build(kind: str, n: int, seed: int) -> dict:
+    import random
+    from ipaddress import IPv4Address
+
+    from Network.network.models import PeerInfo
+    from Network.network.peer_record import PeerCodec
+
+    rnd = random.Random(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    first = int(IPv4Address("10.0.0.1"))
+    codec = PeerCodec()
+    gc.collect()
+    before = _rss()
+    t0 = perf_counter()
+    peers = {}
+    for i in range(n):
+        p = PeerInfo(
+            peer_id=f"{rnd.getrandbits(128):032x}",
+            user_id=f"user{i // 2}",
+            device_id=f"device-{i}",
+            overlay_ip=str(IPv4Address(first + i)),
+            allowed_ips=["10.0.0.0/8"],
+            public_key=f"{rnd.getrandbits(256):064x}"[:43] + "=",
+            created_at=base + timedelta(seconds=i),
+            revoked_at=base + timedelta(days=30) if i % 10 == 0 else None,
+            tags={
+                "device_id": f"device-{i}",
+                "fingerprint": f"{rnd.getrandbits(256):064x}",
+                "platform": PLATFORMS[i % len(PLATFORMS)],
+                "client_version": f"1.{i % 7}.{i % 3}",
+            },
+        )
+        peers[p.peer_id] = p if kind == "pydantic" else codec.encode(p)
+    build_s = perf_counter() - t0
+    gc.collect()
+    used = _rss() - before
+    return {"kind": kind, "peers": n, "rss_mb": used / 1e6, "bytes_per_peer": used / n, "build_s": build_s}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--peers", type=int, nargs="+", default=[100000, 1000000])
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    ctx = mp.get_context("spawn")
+    print(f"{'peers':>9} {'kind':>9} {'RSS MB':>8} {'B/peer':>7} {'build s':>8}")
+    for n in args.peers:
+        res = {}
+        for kind in KINDS:
+            with ctx.Pool(1) as pool:
+                r = res[kind] = pool.apply(_build, (kind, n, args.seed))
+            print(f"{n:>9,} {kind:>9} {r['rss_mb']:>8.1f} {r['bytes_per_peer']:>7.0f} {r['build_s']:>8.1f}")
+        print(f"{'':>9} {'ratio':>9} {res['pydantic']['rss_mb'] / max(res['record']['rss_mb'], 1e-9):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Network/bench/bench_policy.py
+"""
+Tag policy compile cost for a whole fleet (PolicyEngine).
+
+    python -m Network.bench.bench_policy --peers 100000 --grants 200
+
+Builds synthetic peers tagged with role / team / platform (plus a unique
+hostname tag no grant looks at) and grants selecting on them, then reports:
+AllowedIPs for every peer cold, again warm (cache only), and after reloading
+the policy with one grant changed (only its tag combinations recompile).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from time import perf_counter
+
+from Network.network.policy import Grant, PolicyEngine
+
+ROLES = ["dev", "ops", "runner", "kiosk", "server"]
+PLATFORMS = ["linux", "windows", "macos", "android", "ios"]
+
+
+def grants(n: int, teams: int, rnd: random.Random) -> list:
+    out = []
+    for i in range(n):
+        match = [("team", f"t{rnd.randrange(teams)}")]
+        if i % 3 == 0:
+            match.append(("role", rnd.choice(ROLES)))
+        if i % 5 == 0:
+            match.append(("platform", rnd.choice(PLATFORMS)))
+        # /24s inside a few /16s: plenty of aggregation for collapse_addresses
+        cidrs = tuple(f"10.{100 + rnd.randrange(4)}.{rnd.randrange(256)}.0/24" for _ in range(rnd.randint(1, 8)))
+        out.append(Grant(name=f"g{i}", cidrs=cidrs, match=tuple(match)))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--peers", type=int, default=100000)
+    ap.add_argument("--grants", type=int, default=200)
+    ap.add_argument("--teams", type=int, default=40)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    fleet = [
+        {"role": rnd.choice(ROLES), "team": f"t{rnd.randrange(args.teams)}",
+         "platform": rnd.choice(PLATFORMS), "hostname": f"host-{i}"}
+        for i in range(args.peers)
+    ]
+    gs = grants(args.grants, args.teams, rnd)
+    engine = PolicyEngine(gs, base=["10.77.0.0/16"])
+
+    def run(label: str) -> None:
+        misses = engine.misses
+        t0 = perf_counter()
+        sizes = sum(len(engine.allowed_ips(tags)) for tags in fleet)
+        dt = perf_counter() - t0
+        print(f"{label:>8}: {dt:.3f}s ({args.peers / dt:,.0f} peers/s), compiled {engine.misses - misses}"
+              f" combinations, avg {sizes / args.peers:.1f} CIDRs/peer")
+
+    run("cold")
+    run("warm")
+    changed = gs[0]
+    gs[0] = Grant(name=changed.name, cidrs=("10.200.0.0/24",), match=changed.match)
+    t0 = perf_counter()
+    dropped = engine.load(gs)
+    print(f"  reload: {(perf_counter() - t0) * 1000:.1f} ms, {dropped} of {dropped + engine.stats()['combinations']} combinations dropped")
+    run("after")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Network/bench/bench_startup.py
+"""
+Cold-start time of the journaled in-memory store (NETWORK_STORE=journal).
+
+    python -m Network.bench.bench_startup --peers 100000 1000000
+
+For each fleet size synthetic peers are bulk-loaded into a JournaledNetworkStore,
+then three numbers are measured:
+
+    snapshot_write   store.snapshot() (columnar file, fsync + rename)
+    snapshot_load    new store from snapshot only (mmap + index rebuild)
+    journal_replay   new store from a journal holding one record per peer (no snapshot)
+
+The journal number is what a restart costs without compaction; the snapshot
+number is the normal cold start.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from ipaddress import IPv4Network
+from pathlib import Path
+from time import perf_counter
+from typing import List
+
+from Network.network.journal import JournaledNetworkStore, _peer_rec
+from Network.network.models import PeerInfo
+
+
+def _fleet(n: int, rnd: random.Random) -> List[PeerInfo]:
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    hosts = IPv4Network("10.0.0.0/8").hosts()
+    out = []
+    for i in range(n):
+        out.append(PeerInfo.model_construct(
+            peer_id=f"{rnd.getrandbits(128):032x}",
+            user_id=f"user{i}",
+            device_id=f"dev{i}",
+            overlay_ip=str(next(hosts)),
+            allowed_ips=["10.0.0.0/8"],
+            public_key=f"PK{i:010d}{rnd.getrandbits(64):016x}",
+            created_at=base + timedelta(seconds=i),
+            revoked_at=base + timedelta(days=30) if i % 10 == 0 else None,
+            tags={"team": f"t{i % 20}", "os": ("linux", "windows", "macos")[i % 3]},
+        ))
+    return out
+
+
+def _size_mb(d: Path) -> float:
+    return sum(p.stat().st_size for p in d.iterdir()) / 1e6
+
+
+def run_one(n: int, seed: int) -> dict:
+    rnd = random.Random(seed)
+    tmp = Path(tempfile.mkdtemp(prefix="bench-startup-"))
+    snap_dir, journal_dir = tmp / "snap", tmp / "journal"
+    try:
+        peers = _fleet(n, rnd)
+
+        store = JournaledNetworkStore(str(snap_dir))
+        store._restore([store._codec.encode(p) for p in peers], {})
+        t0 = perf_counter()
+        store.snapshot()
+        snapshot_write = perf_counter() - t0
+        store.close()
+
+        journal_dir.mkdir()
+        with open(journal_dir / "journal-00000000.log", "wb") as f:
+            for p in peers:
+                f.write(json.dumps(_peer_rec(p), separators=(",", ":")).encode() + b"\n")
+        del store, peers
+        gc.collect()
+
+        t0 = perf_counter()
+        store = JournaledNetworkStore(str(snap_dir))
+        snapshot_load = perf_counter() - t0
+        assert len(store.list_peers()) == n
+        store.close()
+        del store
+        gc.collect()
+
+        t0 = perf_counter()
+        store = JournaledNetworkStore(str(journal_dir))
+        journal_replay = perf_counter() - t0
+        assert len(store.list_peers()) == n
+        store.close()
+        del store
+        gc.collect()
+
+        return {
+            "peers": n,
+            "snapshot_mb": round(_size_mb(snap_dir), 1),
+            "journal_mb": round(_size_mb(journal_dir), 1),
+            "snapshot_write_s": round(snapshot_write, 2),
+            "snapshot_load_s": round(snapshot_load, 2),
+            "journal_replay_s": round(journal_replay, 2),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--peers", type=int, nargs="+", default=[100000, 1000000])
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    print(f"{'peers':>9} {'snap MB':>8} {'wal MB':>8} {'snap write s':>12} {'snap load s':>11} {'replay s':>9} {'load peers/s':>13}")
+    for n in args.peers:
+        r = run_one(n, args.seed)
+        rate = n / r["snapshot_load_s"] if r["snapshot_load_s"] else 0.0
+        print(f"{r['peers']:>9,} {r['snapshot_mb']:>8.1f} {r['journal_mb']:>8.1f} {r['snapshot_write_s']:>12.2f} "
+              f"{r['snapshot_load_s']:>11.2f} {r['journal_replay_s']:>9.2f} {rate:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
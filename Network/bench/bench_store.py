@@ -0,0 +1,85 @@
+# Network/bench/bench_store.py
+"""
+Enrollment throughput: InMemoryNetworkStore vs. SqliteNetworkStore.
+
+    python -m Network.bench.bench_store --preload 100000 --enroll 2000
+
+Preloads a synthetic fleet, then runs full manager enrollments (invite +
+consume + save + audit) and reports enrollments/s per store.
+"""
+from __future__ import annotations
+
+import argparse
+import secrets
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from time import perf_counter
+
+from Network.network.models import DeviceIdentity, EnrollmentRequest, PeerInfo
+from Network.network.sqlite_store import SqliteNetworkStore
+from Network.network.store import InMemoryNetworkStore, NetworkStore, utcnow
+from Network.network.wireguard import WireGuardConfig, WireGuardManager
+
+CFG = WireGuardConfig(
+    wg_subnet="10.64.0.0/12",
+    wg_server_overlay_ip="10.64.0.1",
+    wg_server_public_key="BENCH",
+    wg_server_endpoint="bench:51820",
+)
+
+
+def preload(store: NetworkStore, n: int) -> None:
+    now = utcnow()
+    base = int.from_bytes(bytes([10, 64, 0, 2]), "big")
+    for i in range(n):
+        ip = ".".join(str(b) for b in (base + i).to_bytes(4, "big"))
+        store.save_peer(PeerInfo(
+            peer_id=f"wg_pre{i:08x}",
+            user_id=f"pre{i}",
+            device_id=f"dev-{i}",
+            overlay_ip=ip,
+            allowed_ips=[CFG.wg_subnet],
+            public_key=secrets.token_hex(16),
+            created_at=now - timedelta(seconds=i),
+        ))
+
+
+def enroll_rate(store: NetworkStore, n: int) -> float:
+    mgr = WireGuardManager(store=store, cfg=CFG)
+    t0 = perf_counter()
+    for i in range(n):
+        inv = mgr.create_invite(user_id=f"new{i}", device_id=None, ttl_seconds=900)
+        mgr.enroll(
+            actor_user_id=inv.user_id,
+            req=EnrollmentRequest(
+                invite_code=inv.invite_code,
+                device=DeviceIdentity(device_id=f"dev-new-{i}"),
+                client_public_key=secrets.token_hex(16),
+            ),
+        )
+    return n / (perf_counter() - t0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--preload", type=int, default=100000)
+    ap.add_argument("--enroll", type=int, default=2000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "memory": InMemoryNetworkStore(),
+            "sqlite": SqliteNetworkStore(str(Path(tmp) / "bench.db")),
+        }
+        for name, store in stores.items():
+            t0 = perf_counter()
+            preload(store, args.preload)
+            load_s = perf_counter() - t0
+            rate = enroll_rate(store, args.enroll)
+            store.close()
+            print(f"{name:>7}: preload {args.preload} in {load_s:.1f}s, enroll {rate:,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Network/bench/bench_trust.py
+"""
+Trusted-network check cost vs. number of configured CIDRs.
+
+    python -m Network.bench.bench_trust --cidrs 10 100 500
+
+Compares the old per-request parse + linear scan with the compiled matcher.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from ipaddress import ip_address, ip_network
+from time import perf_counter
+
+from Network.network.trust import TrustedNetworks
+
+
+def _cidrs(n: int) -> list[str]:
+    rnd = random.Random(n)
+    return [f"{rnd.randrange(11, 223)}.{rnd.randrange(256)}.{rnd.randrange(256)}.0/24" for _ in range(n)]
+
+
+def _linear(raw: str, ip_s: str) -> bool:
+    ip = ip_address(ip_s)
+    for part in raw.split(","):
+        if ip in ip_network(part.strip(), strict=False):
+            return True
+    return False
+
+
+def run(sizes: list[int], rounds: int) -> None:
+    print(f"{'cidrs':>6} {'linear_us':>10} {'compiled_us':>12}")
+    for n in sizes:
+        cidrs = _cidrs(n)
+        raw = ",".join(cidrs)
+        tn = TrustedNetworks(cidrs)
+        probe = "8.8.8.8"  # miss = worst case for the linear scan
+
+        t0 = perf_counter()
+        for _ in range(rounds):
+            _linear(raw, probe)
+        lin = (perf_counter() - t0) / rounds * 1e6
+
+        t0 = perf_counter()
+        for _ in range(rounds):
+            tn.contains(probe)
+        comp = (perf_counter() - t0) / rounds * 1e6
+
+        print(f"{n:>6} {lin:>10.2f} {comp:>12.3f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--cidrs", type=int, nargs="+", default=[3, 10, 100, 500])
+    ap.add_argument("--rounds", type=int, default=2000)
+    args = ap.parse_args()
+    run(args.cidrs, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
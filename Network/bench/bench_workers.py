@@ -0,0 +1,154 @@
+# Network/bench/bench_workers.py
+"""
+Request throughput vs. uvicorn worker count on a shared SQLite store.
+
+    python -m Network.bench.bench_workers --workers 1 2 4 --seconds 10
+
+For each worker count a real uvicorn server is started (NETWORK_STORE=sqlite,
+fresh database), seeded with peers, then hammered by several client processes.
+The mix is mostly status reads plus a share of enrolls (writes), so both the
+per-worker CPU path and the cross-process store path are exercised.
+Afterwards the database is checked for duplicate active overlay IPs.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ADMIN = {"x-user-id": "bench-admin", "x-user-role": "admin"}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(base: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base}/api/network/status", headers={"x-user-id": "probe"}, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not come up")
+
+
+async def _client(base: str, proc: int, seconds: float, concurrency: int, write_every: int) -> tuple[int, int]:
+    done = errors = 0
+    stop_at = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30.0) as c:
+        async def loop(slot: int) -> None:
+            nonlocal done, errors
+            i = 0
+            while time.perf_counter() < stop_at:
+                i += 1
+                try:
+                    if write_every and i % write_every == 0:
+                        user = f"w{proc}-{slot}-{i}"
+                        inv = (await c.post("/api/admin/network/invites", headers=ADMIN, json={"user_id": user})).json()
+                        r = await c.post("/api/network/enroll", headers={"x-user-id": user}, json={
+                            "invite_code": inv["invite_code"], "device": {"device_id": f"dev-{user}"},
+                            "client_public_key": f"KEY{user}",
+                        })
+                    else:
+                        r = await c.get("/api/network/status", headers={"x-user-id": f"seed{(slot * 31 + i) % 200}"})
+                    if r.status_code >= 400:
+                        errors += 1
+                    done += 1
+                except httpx.HTTPError:
+                    errors += 1
+
+        await asyncio.gather(*(loop(s) for s in range(concurrency)))
+    return done, errors
+
+
+def _client_proc(args) -> tuple[int, int]:
+    return asyncio.run(_client(*args))
+
+
+def _seed(base: str, n: int) -> None:
+    with httpx.Client(base_url=base, timeout=30.0) as c:
+        invites = c.post("/api/admin/network/invites/batch", headers=ADMIN,
+                         json={"items": [{"user_id": f"seed{i}"} for i in range(n)]}).json()["items"]
+        for inv in invites:
+            c.post("/api/network/enroll", headers={"x-user-id": inv["user_id"]}, json={
+                "invite_code": inv["invite_code"], "device": {"device_id": f"dev-{inv['user_id']}"},
+                "client_public_key": f"KEY{inv['user_id']}",
+            })
+
+
+def _duplicate_ips(db: Path) -> int:
+    with sqlite3.connect(db) as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM (SELECT overlay_ip FROM peers WHERE revoked_at IS NULL GROUP BY overlay_ip HAVING COUNT(*) > 1)"
+        ).fetchone()[0]
+
+
+def run_one(workers: int, *, seconds: float, clients: int, concurrency: int, write_every: int) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="bench-workers-"))
+    db = tmp / "network.db"
+    port = _free_port()
+    env = dict(os.environ,
+               NETWORK_STORE="sqlite", NETWORK_SQLITE_PATH=str(db), NETWORK_WORKERS=str(workers),
+               NETWORK_TRUSTED_CIDRS="127.0.0.0/8", NETWORK_ENV_PATH=str(tmp / "none.env"),
+               WG_SYNC_MODE="off", NETWORK_ADMIT_ENROLL_RATE_IP="0", PYTHONPATH=os.getcwd())
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "Network.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--no-access-log", "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base)
+        _seed(base, 200)
+        t0 = time.perf_counter()
+        with mp.get_context("spawn").Pool(clients) as pool:
+            results = pool.map(_client_proc, [(base, p, seconds, concurrency, write_every) for p in range(clients)])
+        elapsed = time.perf_counter() - t0
+    finally:
+        server.terminate()
+        server.wait(30)
+    done = sum(r[0] for r in results)
+    return {
+        "workers": workers,
+        "requests": done,
+        "errors": sum(r[1] for r in results),
+        "rps": done / elapsed,
+        "dup_ips": _duplicate_ips(db),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--clients", type=int, default=4, help="client processes")
+    ap.add_argument("--concurrency", type=int, default=16, help="in-flight requests per client process")
+    ap.add_argument("--write-every", type=int, default=20, help="every n-th request is invite+enroll (0 = reads only)")
+    args = ap.parse_args()
+
+    base_rps = None
+    print(f"{'workers':>7} {'requests':>9} {'errors':>6} {'req/s':>9} {'scale':>6} {'dup_ips':>7}")
+    for w in args.workers:
+        r = run_one(w, seconds=args.seconds, clients=args.clients, concurrency=args.concurrency, write_every=args.write_every)
+        base_rps = base_rps or r["rps"]
+        print(f"{r['workers']:>7} {r['requests']:>9,} {r['errors']:>6} {r['rps']:>9,.0f} {r['rps'] / base_rps:>5.2f}x {r['dup_ips']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Network/bench/stress_enroll.py
+"""
+Concurrent enrollment stress check for the threadpool-executed routes.
+
+    python -m Network.bench.stress_enroll --devices 5000 --threads 32 [--store sqlite]
+
+Every invite is redeemed twice in parallel and some devices are enrolled
+through two invites at once. Exits non-zero if an invite is double-spent,
+a device gets two active peers or two active peers share an overlay IP.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+from Network.network.models import DeviceIdentity, EnrollmentRequest
+from Network.network.sqlite_store import SqliteNetworkStore
+from Network.network.store import InMemoryNetworkStore
+from Network.network.wireguard import WireGuardConfig, WireGuardManager
+
+
+def run(devices: int, threads: int, store_kind: str, tmp: str) -> int:
+    store = SqliteNetworkStore(str(Path(tmp) / "stress.db")) if store_kind == "sqlite" else InMemoryNetworkStore()
+    mgr = WireGuardManager(store=store, cfg=WireGuardConfig(
+        wg_subnet="10.64.0.0/14",
+        wg_server_overlay_ip="10.64.0.1",
+        wg_server_public_key="STRESS",
+        wg_server_endpoint="stress:51820",
+    ))
+
+    # two invites per device, each redeemed twice -> 4 concurrent attempts per device
+    jobs = []
+    for d in range(devices):
+        for _ in range(2):
+            inv = mgr.create_invite(user_id=f"u{d}", device_id=None, ttl_seconds=900)
+            jobs += [(inv.invite_code, d)] * 2
+
+    def attempt(job):
+        code, d = job
+        try:
+            r = mgr.enroll(actor_user_id=f"u{d}", req=EnrollmentRequest(
+                invite_code=code,
+                device=DeviceIdentity(device_id=f"dev-{d}"),
+                client_public_key=f"KEY-{d}",
+            ))
+            return code, r.peer_id
+        except ValueError:
+            return code, None
+
+    t0 = perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        results = list(ex.map(attempt, jobs))
+    elapsed = perf_counter() - t0
+
+    errors = []
+    spent = Counter(code for code, pid in results if pid)
+    if any(n > 1 for n in spent.values()):
+        errors.append(f"double-spent invites: {sum(1 for n in spent.values() if n > 1)}")
+
+    active = [p for p in store.list_peers() if not p.revoked_at]
+    per_device = Counter((p.user_id, p.device_id) for p in active)
+    if len(per_device) != devices or any(n > 1 for n in per_device.values()):
+        errors.append(f"expected {devices} devices with one peer each, got {len(active)} peers / {len(per_device)} devices")
+    ips = Counter(p.overlay_ip for p in active)
+    if any(n > 1 for n in ips.values()):
+        errors.append(f"duplicate overlay IPs: {sum(1 for n in ips.values() if n > 1)}")
+
+    store.close()
+    print(f"{store_kind}: {len(jobs)} attempts / {threads} threads in {elapsed:.2f}s, {len(active)} active peers")
+    for e in errors:
+        print("FAIL:", e)
+    return 1 if errors else 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--devices", type=int, default=5000)
+    ap.add_argument("--threads", type=int, default=32)
+    ap.add_argument("--store", choices=("memory", "sqlite"), default="memory")
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        sys.exit(run(args.devices, args.threads, args.store, tmp))
+
+
+if __name__ == "__main__":
+    main()
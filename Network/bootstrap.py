@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import atexit
 import os
+import sys
+from ipaddress import ip_network
 from types import SimpleNamespace
 from pathlib import Path
 from typing import Optional
@@ -8,19 +11,35 @@ from typing import Optional
 from dotenv import load_dotenv, find_dotenv
 from loguru import logger
 
-from Network.network.store import InMemoryNetworkStore
+from Network.network.admission import Admission, AdmissionClass, RateLimiter
+from Network.network.allocator import PoolSet, PoolSpec, parse_pools
+from Network.network.audit import AuditLog
+from Network.network.audit_writer import OVERFLOW_POLICIES, AuditWriter
+from Network.network.heartbeat import HeartbeatTable
+from Network.network.journal import JournaledNetworkStore
+from Network.network.logsink import LOG_FORMATS, LogSink, RequestLogPolicy
+from Network.network.policy import Grant, PolicyEngine, parse_grants
+from Network.network.response_cache import ResponseCache
+from Network.network.sqlite_store import SqliteNetworkStore
+from Network.network.store import InMemoryNetworkStore, NetworkStore
+from Network.network.store_watch import StoreWatcher
+from Network.network.trust import TrustedNetworks
+from Network.network.workers import IntervalWorker
+from Network.network.wg_sync import FakeWgExecutor, WgCommandExecutor, WgSyncEngine
 from Network.network.wireguard import WireGuardConfig, WireGuardManager
 
 
 _runtime: SimpleNamespace | None = None
 
 
-def _load_env() -> str | None:
+def _load_env(*, override: bool = False) -> str | None:
     """
     Lädt .env deterministisch:
     1) NETWORK_ENV_PATH (expliziter Pfad)
     2) Kandidaten /app/.env, CWD, Parent
     3) fallback: find_dotenv(usecwd=True)
+
+    override=True wird beim Reload genutzt, damit geänderte Werte greifen.
     """
     explicit = (os.getenv("NETWORK_ENV_PATH") or "").strip()
     candidates: list[str] = []
@@ -37,7 +56,7 @@ def _load_env() -> str | None:
     for p in candidates:
         try:
             if p and Path(p).is_file():
-                load_dotenv(p, override=False)
+                load_dotenv(p, override=override)
                 return str(Path(p).resolve())
         except Exception:
             pass
@@ -45,7 +64,7 @@ def _load_env() -> str | None:
     try:
         found = find_dotenv(usecwd=True)
         if found:
-            load_dotenv(found, override=False)
+            load_dotenv(found, override=override)
             return str(Path(found).resolve())
     except Exception:
         pass
@@ -63,6 +82,290 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
+def _env_float(name: str, default: float) -> float:
+    raw = (os.getenv(name) or "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        return default
+
+
+def configure_logging() -> tuple[LogSink, RequestLogPolicy]:
+    """
+    Ersetzt den Default-Handler von loguru (läuft beim Import von main, vor ensure_runtime).
+
+    NETWORK_LOG_LEVEL=INFO              (Fallback GATEWAY_LOG_LEVEL)
+    NETWORK_LOG_FORMAT=json | text
+    NETWORK_LOG_ASYNC=1                 (0 = synchron schreiben)
+    NETWORK_LOG_QUEUE=10000             volle Queue -> Zeilen werden verworfen + gezählt
+    NETWORK_LOG_SAMPLE=/api/network/status=0.01,/api/network/heartbeat=0.01   (Route-Template=Rate)
+    NETWORK_LOG_SAMPLE_DEFAULT=1.0
+    NETWORK_LOG_SLOW_MS=500             langsamere Requests immer loggen
+    NETWORK_LOG_ERROR_STATUS=500        Status >= Wert immer loggen
+    """
+    _load_env()
+    level = os.getenv("NETWORK_LOG_LEVEL", os.getenv("GATEWAY_LOG_LEVEL", "INFO"))
+    fmt = (os.getenv("NETWORK_LOG_FORMAT") or "json").strip().lower()
+    bad_fmt = fmt not in LOG_FORMATS
+    if bad_fmt:
+        fmt = "json"
+
+    sink = LogSink(
+        sys.stderr,
+        fmt=fmt,
+        max_queue=_env_int("NETWORK_LOG_QUEUE", 10000),
+        async_=(os.getenv("NETWORK_LOG_ASYNC") or "1").strip() == "1",
+    )
+    logger.remove()
+    logger.add(sink, level=level, format=sink.loguru_format, colorize=False)
+    sink.start()
+    atexit.register(sink.stop)
+
+    if bad_fmt:
+        logger.warning("⚠️ [NetworkBootstrap] Unbekanntes NETWORK_LOG_FORMAT – nutze json.")
+    try:
+        rates = RequestLogPolicy.parse_rates(os.getenv("NETWORK_LOG_SAMPLE") or "")
+    except ValueError as e:
+        logger.warning("⚠️ [NetworkBootstrap] NETWORK_LOG_SAMPLE ungültig ({}) – kein Sampling.", e)
+        rates = {}
+    policy = RequestLogPolicy(
+        rates=rates,
+        default_rate=_env_float("NETWORK_LOG_SAMPLE_DEFAULT", 1.0),
+        slow_ms=_env_float("NETWORK_LOG_SLOW_MS", 500.0),
+        error_status=_env_int("NETWORK_LOG_ERROR_STATUS", 500),
+        # Long-Polls warten absichtlich: nicht als "slow" loggen
+        held_routes=("/api/admin/network/peers/changes",),
+    )
+    return sink, policy
+
+
+def _build_store() -> NetworkStore:
+    """
+    NETWORK_STORE=memory (default) | sqlite | journal
+    NETWORK_SQLITE_PATH=/app/data/network.db
+    NETWORK_JOURNAL_DIR=/app/data/journal   (journal: memory-Store + Journal/Snapshots)
+    NETWORK_JOURNAL_FSYNC_MS=1000           (0 = fsync pro Record)
+    NETWORK_CHANGE_LOG_SIZE=10000           Peer-Änderungen für /peers/changes + /peers/watch (älter -> resync)
+    """
+    kind = (os.getenv("NETWORK_STORE") or "memory").strip().lower()
+    invite_grace = _env_int("NETWORK_INVITE_GRACE_SECONDS", 86400)
+    change_log = _env_int("NETWORK_CHANGE_LOG_SIZE", 10000)
+    if kind == "sqlite":
+        path = (os.getenv("NETWORK_SQLITE_PATH") or "/app/data/network.db").strip()
+        logger.info("💾 [NetworkBootstrap] SQLite-Store: {}", path)
+        return SqliteNetworkStore(
+            path,
+            audit_batch=_env_int("NETWORK_SQLITE_AUDIT_BATCH", 64),
+            invite_grace_seconds=invite_grace,
+            change_log=change_log,
+        )
+    if _env_int("NETWORK_WORKERS", 1) > 1:
+        logger.warning(
+            "⚠️ [NetworkBootstrap] NETWORK_WORKERS>1 mit memory-/journal-Store: jeder Worker hat eigene Peers/Invites. "
+            "Für mehrere Worker NETWORK_STORE=sqlite setzen."
+        )
+    if kind == "journal":
+        path = (os.getenv("NETWORK_JOURNAL_DIR") or "/app/data/journal").strip()
+        logger.info("📼 [NetworkBootstrap] Journal-Store: {}", path)
+        return JournaledNetworkStore(
+            path,
+            audit=_build_audit_log(),
+            invite_grace_seconds=invite_grace,
+            fsync_always=_env_int("NETWORK_JOURNAL_FSYNC_MS", 1000) <= 0,
+            change_log=change_log,
+        )
+    if kind != "memory":
+        logger.warning("⚠️ [NetworkBootstrap] Unbekannter NETWORK_STORE={!r} – nutze memory.", kind)
+    return InMemoryNetworkStore(audit=_build_audit_log(), invite_grace_seconds=invite_grace, change_log=change_log)
+
+
+def _build_audit_log() -> AuditLog:
+    """
+    NETWORK_AUDIT_DIR=/app/data/audit   (leer = nur Ring-Buffer im RAM)
+    NETWORK_AUDIT_RING=5000
+    NETWORK_AUDIT_SEGMENT_MB=16
+    NETWORK_AUDIT_MAX_SEGMENTS=0        (0 = unbegrenzt)
+    NETWORK_AUDIT_FILE_FLUSH_MS=1000    (Schreibpuffer spätestens alle N ms auf Disk; 0 = nur nach Größe)
+    NETWORK_AUDIT_FILE_FLUSH_KB=64      (… oder sobald so viel aussteht)
+    """
+    audit_dir = (os.getenv("NETWORK_AUDIT_DIR") or "").strip() or None
+    if audit_dir:
+        logger.info("📜 [NetworkBootstrap] Audit-Segmente: {}", audit_dir)
+    return AuditLog(
+        audit_dir,
+        ring_size=_env_int("NETWORK_AUDIT_RING", 5000),
+        segment_bytes=_env_int("NETWORK_AUDIT_SEGMENT_MB", 16) * 1024 * 1024,
+        max_segments=_env_int("NETWORK_AUDIT_MAX_SEGMENTS", 0),
+        flush_interval=_env_int("NETWORK_AUDIT_FILE_FLUSH_MS", 1000) / 1000.0,
+        flush_bytes=_env_int("NETWORK_AUDIT_FILE_FLUSH_KB", 64) * 1024,
+    )
+
+
+def _build_audit_writer(store: NetworkStore) -> AuditWriter | None:
+    """
+    NETWORK_AUDIT_ASYNC=1           (0 = synchron im Request schreiben)
+    NETWORK_AUDIT_QUEUE=10000
+    NETWORK_AUDIT_BATCH=500
+    NETWORK_AUDIT_FLUSH_MS=500
+    NETWORK_AUDIT_OVERFLOW=drop_oldest | drop_newest | block
+    """
+    if (os.getenv("NETWORK_AUDIT_ASYNC") or "1").strip() != "1":
+        return None
+    overflow = (os.getenv("NETWORK_AUDIT_OVERFLOW") or "drop_oldest").strip().lower()
+    if overflow not in OVERFLOW_POLICIES:
+        logger.warning("⚠️ [NetworkBootstrap] Unbekannte NETWORK_AUDIT_OVERFLOW={!r} – nutze drop_oldest.", overflow)
+        overflow = "drop_oldest"
+    return AuditWriter(
+        store,
+        max_queue=_env_int("NETWORK_AUDIT_QUEUE", 10000),
+        batch_size=_env_int("NETWORK_AUDIT_BATCH", 500),
+        flush_interval=_env_int("NETWORK_AUDIT_FLUSH_MS", 500) / 1000.0,
+        overflow=overflow,
+    )
+
+
+def _build_invite_sweeper(store: NetworkStore) -> IntervalWorker:
+    """
+    NETWORK_INVITE_SWEEP_SECONDS=30     Intervall des Invite-Sweepers
+    NETWORK_INVITE_GRACE_SECONDS=86400  benutzte Invites so lange behalten (Audit), dann löschen
+    """
+    def sweep() -> None:
+        n = store.sweep_invites()
+        if n:
+            logger.debug("🧽 [InviteSweeper] {} Invites entfernt", n)
+
+    return IntervalWorker("invite-sweeper", float(_env_int("NETWORK_INVITE_SWEEP_SECONDS", 30)), sweep, final_run=False)
+
+
+def _build_journal_workers(store: NetworkStore) -> list[IntervalWorker]:
+    """
+    Nur für NETWORK_STORE=journal:
+    NETWORK_JOURNAL_FSYNC_MS=1000      fsync-Intervall des Journals
+    NETWORK_SNAPSHOT_SECONDS=300       Snapshot + Journal-Kompaktierung (und beim Shutdown)
+    """
+    if not isinstance(store, JournaledNetworkStore):
+        return []
+
+    def snapshot() -> None:
+        if store.records_since_snapshot:
+            n = store.snapshot()
+            logger.info("📦 [Journal] Snapshot geschrieben ({} Peers)", n)
+
+    workers = [IntervalWorker("journal-snapshot", float(_env_int("NETWORK_SNAPSHOT_SECONDS", 300)), snapshot)]
+    fsync_ms = _env_int("NETWORK_JOURNAL_FSYNC_MS", 1000)
+    if fsync_ms > 0:
+        workers.append(IntervalWorker("journal-fsync", fsync_ms / 1000.0, store.sync, final_run=False))
+    return workers
+
+
+def _build_admission() -> Admission | None:
+    """
+    NETWORK_ADMISSION=1                  (0 = keine Limits)
+    NETWORK_ADMISSION_QUEUE_MS=2000      max. Wartezeit in der Queue, danach 503
+    pro Klasse (enroll, invite):
+    NETWORK_ADMIT_<KLASSE>_CONCURRENCY   gleichzeitig laufende Requests
+    NETWORK_ADMIT_<KLASSE>_QUEUE         wartende Requests, darüber sofort 503
+    NETWORK_ADMIT_<KLASSE>_RATE_IP / _RATE_IP_BURST       Token-Bucket pro Client-IP (0 = aus)
+    NETWORK_ADMIT_<KLASSE>_RATE_USER / _RATE_USER_BURST   Token-Bucket pro User (0 = aus)
+    Routen ohne Klasse (status, heartbeat, config, Admin-Reads) werden nie gedrosselt.
+    """
+    if (os.getenv("NETWORK_ADMISSION") or "1").strip() != "1":
+        return None
+    queue_timeout = _env_int("NETWORK_ADMISSION_QUEUE_MS", 2000) / 1000.0
+    defaults = {
+        # class: (concurrency, queue, rate_ip, burst_ip, rate_user, burst_user)
+        "enroll": (8, 64, 5.0, 20.0, 1.0, 5.0),
+        "invite": (4, 32, 0.0, 0.0, 0.0, 0.0),
+    }
+    classes = {}
+    for name, (conc, queue, rip, bip, ruser, buser) in defaults.items():
+        env = f"NETWORK_ADMIT_{name.upper()}_"
+        rip, ruser = _env_float(env + "RATE_IP", rip), _env_float(env + "RATE_USER", ruser)
+        classes[name] = AdmissionClass(
+            name,
+            limit=_env_int(env + "CONCURRENCY", conc),
+            queue=_env_int(env + "QUEUE", queue),
+            queue_timeout=queue_timeout,
+            ip_rate=RateLimiter(rip, _env_float(env + "RATE_IP_BURST", bip)) if rip > 0 else None,
+            user_rate=RateLimiter(ruser, _env_float(env + "RATE_USER_BURST", buser)) if ruser > 0 else None,
+        )
+    return Admission(classes)
+
+
+def _build_pools(wg_subnet: str, wg_subnet6: str | None) -> tuple[PoolSpec, ...]:
+    """
+    Zusätzliche Overlay-Pools, per Peer-Tags gewählt (erster Treffer, sonst WG_SUBNET/WG_SUBNET6):
+    WG_POOLS=servers=10.78.0.0/16,fd00:78::/64@platform=linux;android=10.79.0.0/16@platform=android
+    Der Pool wird beim Enroll festgelegt; spätere Tag-Änderungen verschieben keine Adressen.
+    """
+    raw = (os.getenv("WG_POOLS") or "").strip()
+    if not raw:
+        return ()
+    try:
+        pools = tuple(parse_pools(raw))
+        PoolSet([PoolSpec(name="default", cidr=wg_subnet, cidr6=wg_subnet6), *pools])  # Überlappungen / Namen prüfen
+    except ValueError as e:
+        logger.warning("⚠️ [NetworkBootstrap] WG_POOLS ungültig ({}) – nur Default-Pool aktiv.", e)
+        return ()
+    logger.info("🧩 [NetworkBootstrap] Overlay-Pools: {}", ", ".join(p.name for p in pools))
+    return pools
+
+
+def _load_grants() -> list[Grant]:
+    """
+    Client-AllowedIPs per Peer-Tags (zusätzlich zu den Overlay-Netzen, alle Treffer, zusammengefasst):
+    WG_POLICIES=office=10.10.0.0/16,fd10::/48@team=ops;ci=10.20.5.0/24@role=runner&platform=linux
+    Ohne @-Selektor gilt ein Eintrag für alle Peers. Reload per SIGHUP / Admin-Endpoint.
+    Raises ValueError.
+    """
+    return parse_grants((os.getenv("WG_POLICIES") or "").strip())
+
+
+def _build_policy(cfg: WireGuardConfig) -> PolicyEngine:
+    try:
+        grants = _load_grants()
+    except ValueError as e:
+        logger.warning("⚠️ [NetworkBootstrap] WG_POLICIES ungültig ({}) – nur Overlay-Netze.", e)
+        grants = []
+    if grants:
+        logger.info("🧭 [NetworkBootstrap] Policies: {}", ", ".join(g.name for g in grants))
+    return PolicyEngine(grants, base=cfg.default_allowed_ips or [cfg.wg_subnet])
+
+
+def _build_wg_sync(overlay_cidrs: list[str]) -> WgSyncEngine | None:
+    """
+    WG_SYNC_MODE=off (default) | wg | fake
+    WG_INTERFACE=wg0
+    WG_SYNC_DEBOUNCE_MS=200   Änderungen innerhalb dieses Fensters werden gebündelt angewendet
+    """
+    mode = (os.getenv("WG_SYNC_MODE") or "off").strip().lower()
+    if mode == "off":
+        return None
+    if mode == "wg":
+        iface = (os.getenv("WG_INTERFACE") or "wg0").strip()
+        executor = WgCommandExecutor(iface)
+        logger.info("🔗 [NetworkBootstrap] WireGuard-Sync aktiv (interface={})", iface)
+    elif mode == "fake":
+        executor = FakeWgExecutor()
+        logger.info("🧪 [NetworkBootstrap] WireGuard-Sync mit Fake-Executor")
+    else:
+        logger.warning("⚠️ [NetworkBootstrap] Unbekannter WG_SYNC_MODE={!r} – Sync deaktiviert.", mode)
+        return None
+    return WgSyncEngine(executor, overlay_cidrs=overlay_cidrs, debounce=_env_int("WG_SYNC_DEBOUNCE_MS", 200) / 1000.0)
+
+
+def _build_store_watcher(store: NetworkStore) -> StoreWatcher | None:
+    """
+    Nur für geteilte Stores (uvicorn --workers N):
+    NETWORK_STORE_WATCH_MS=500   Poll-Intervall für Änderungen anderer Worker
+    """
+    if not store.shared:
+        return None
+    return StoreWatcher(store, interval=_env_int("NETWORK_STORE_WATCH_MS", 500) / 1000.0)
+
+
 async def ensure_runtime() -> SimpleNamespace:
     global _runtime
     if _runtime is not None:
@@ -87,10 +390,14 @@ async def ensure_runtime() -> SimpleNamespace:
     # ---- WireGuard ENV ----
     wg_subnet = os.getenv("WG_SUBNET", "10.77.0.0/16")
     wg_server_overlay_ip = os.getenv("WG_SERVER_OVERLAY_IP", "10.77.0.10")
+    # Dual-Stack: WG_SUBNET6=fd00:77::/64 -> jeder Peer bekommt zusätzlich eine IPv6 (leer = nur IPv4)
+    wg_subnet6 = (os.getenv("WG_SUBNET6") or "").strip() or None
+    wg_server_overlay_ip6 = (os.getenv("WG_SERVER_OVERLAY_IP6") or "").strip() or None
     wg_server_public_key = (os.getenv("WG_SERVER_PUBLIC_KEY") or "").strip()
     wg_server_endpoint = (os.getenv("WG_SERVER_ENDPOINT") or "").strip()
     wg_dns = (os.getenv("WG_DNS") or "").strip() or None
     wg_keepalive = _env_int("WG_KEEPALIVE", 25)
+    wg_ip_quarantine = _env_int("WG_IP_QUARANTINE_SECONDS", 3600)
 
     if not wg_server_public_key or not wg_server_endpoint:
         logger.warning(
@@ -98,7 +405,15 @@ async def ensure_runtime() -> SimpleNamespace:
             "Enroll liefert dann nur Platzhalter-Config."
         )
 
-    store = InMemoryNetworkStore()
+    if wg_subnet6 is not None:
+        try:
+            if ip_network(wg_subnet6, strict=False).version != 6:
+                raise ValueError("keine IPv6-Range")
+        except ValueError as e:
+            logger.warning("⚠️ [NetworkBootstrap] WG_SUBNET6={!r} ungültig ({}) – nur IPv4.", wg_subnet6, e)
+            wg_subnet6 = wg_server_overlay_ip6 = None
+
+    store = _build_store()
     cfg = WireGuardConfig(
         wg_subnet=wg_subnet,
         wg_server_overlay_ip=wg_server_overlay_ip,
@@ -106,15 +421,121 @@ async def ensure_runtime() -> SimpleNamespace:
         wg_server_endpoint=wg_server_endpoint or "YOUR_STATIC_IP:51820",
         wg_dns=wg_dns,
         wg_persistent_keepalive=wg_keepalive,
-        default_allowed_ips=[wg_subnet],
+        ip_quarantine_seconds=wg_ip_quarantine,  # default_allowed_ips: alle Pool-Netze
+        wg_subnet6=wg_subnet6,
+        wg_server_overlay_ip6=wg_server_overlay_ip6,
+        pools=_build_pools(wg_subnet, wg_subnet6),
+    )
+    audit_writer = _build_audit_writer(store)
+    # NETWORK_HEARTBEAT_TIMEOUT_SECONDS: ohne Heartbeat so lange -> connected=false
+    heartbeats = HeartbeatTable(
+        store,
+        timeout_seconds=float(_env_int("NETWORK_HEARTBEAT_TIMEOUT_SECONDS", 90)),
+        flush_interval=float(_env_int("NETWORK_HEARTBEAT_FLUSH_SECONDS", 10)),
     )
-    mgr = WireGuardManager(store=store, cfg=cfg)
+    wg_sync = _build_wg_sync(cfg.overlay_cidrs())
+    # NETWORK_CONFIG_CACHE_ENTRIES=10000  gerenderte Client-Configs (je Overlay-IP + AllowedIPs; 0 = aus)
+    mgr = WireGuardManager(
+        store=store,
+        cfg=cfg,
+        audit=audit_writer,
+        heartbeats=heartbeats,
+        sync=wg_sync,
+        policy=_build_policy(cfg),
+        config_cache_entries=_env_int("NETWORK_CONFIG_CACHE_ENTRIES", 10000),
+    )
+    store_watcher = _build_store_watcher(store)
+    if store_watcher is not None:
+        store_watcher.subscribe(mgr.on_store_change)
+
+    # ---- Serialisierte Antworten (Peer-Listen, Client-Configs) ----
+    # NETWORK_RESPONSE_CACHE_ENTRIES=512  (0 = nichts cachen; ETag/304 bleibt aktiv)
+    response_cache = ResponseCache(max_entries=_env_int("NETWORK_RESPONSE_CACHE_ENTRIES", 512))
+
+    # ---- Trusted edge (compiled once, reload via SIGHUP / admin endpoint) ----
+    trusted = TrustedNetworks.from_env()
 
     _runtime = SimpleNamespace(
         wg_store=store,
         wg_manager=mgr,
         wg_cfg=cfg,
+        trusted_networks=trusted,
+        response_cache=response_cache,
+        admission=_build_admission(),
+        audit_writer=audit_writer,
+        heartbeats=heartbeats,
+        wg_sync=wg_sync,
+        store_watcher=store_watcher,
+        # Hintergrund-Worker: start() hier, stop() in shutdown_runtime (umgekehrte Reihenfolge)
+        # Journal-Worker zuerst: sie stoppen zuletzt (finaler Snapshot nach Heartbeat-/Audit-Flush)
+        workers=[w for w in (*_build_journal_workers(store), audit_writer, heartbeats, _build_invite_sweeper(store), wg_sync, store_watcher)
+                 if w is not None],
     )
+    for w in _runtime.workers:
+        w.start()
 
-    logger.info("🛡️ [NetworkBootstrap] Runtime ready (subnet={}, endpoint={})", wg_subnet, cfg.wg_server_endpoint)
+    logger.info("🛡️ [NetworkBootstrap] Runtime ready (subnets={}, endpoint={}, pid={})", ",".join(cfg.overlay_cidrs()), cfg.wg_server_endpoint, os.getpid())
     return _runtime
+
+
+def current_runtime() -> SimpleNamespace | None:
+    return _runtime
+
+
+async def shutdown_runtime() -> None:
+    global _runtime
+    if _runtime is None:
+        return
+    for w in reversed(_runtime.workers):
+        try:
+            w.stop()  # flusht ausstehende Events (z.B. Audit-Queue)
+        except Exception as e:
+            logger.error("❌ [NetworkBootstrap] Worker-Stop fehlgeschlagen: {}", e)
+    try:
+        _runtime.wg_store.close()
+    except Exception as e:
+        logger.error("❌ [NetworkBootstrap] Store close fehlgeschlagen: {}", e)
+    _runtime = None
+
+
+def reload_trusted_networks() -> TrustedNetworks:
+    """
+    Liest .env erneut ein und kompiliert NETWORK_TRUSTED_CIDRS / NETWORK_TRUST_PROXY neu.
+    Die TrustedNetworks-Instanz bleibt dieselbe (Referenzen in app.state bleiben gültig).
+    """
+    if _runtime is None:
+        raise RuntimeError("Network runtime not initialized")
+
+    _load_env(override=True)
+    trusted: TrustedNetworks = _runtime.trusted_networks
+    try:
+        trusted.load_env()
+    except ValueError as e:
+        # alte Tabelle bleibt aktiv
+        logger.error("❌ [NetworkBootstrap] Trusted CIDRs ungültig, Reload verworfen: {}", e)
+        raise
+
+    logger.info("🔁 [NetworkBootstrap] Trusted networks neu geladen ({} CIDRs, trust_proxy={})", len(trusted.cidrs), trusted.trust_proxy)
+    return trusted
+
+
+def reload_policies() -> PolicyEngine:
+    """
+    Liest .env erneut ein und lädt WG_POLICIES neu. Nur Tag-Kombinationen, die eine
+    geänderte Policy betrifft, werden neu berechnet; Client-Configs bekommen neue ETags.
+    """
+    if _runtime is None:
+        raise RuntimeError("Network runtime not initialized")
+
+    _load_env(override=True)
+    policy: PolicyEngine = _runtime.wg_manager.policy
+    try:
+        grants = _load_grants()
+    except ValueError as e:
+        # alte Policies bleiben aktiv
+        logger.error("❌ [NetworkBootstrap] WG_POLICIES ungültig, Reload verworfen: {}", e)
+        raise
+
+    dropped = policy.load(grants)
+    logger.info("🔁 [NetworkBootstrap] Policies neu geladen ({} Einträge, {} Tag-Kombinationen neu zu berechnen)", len(grants), dropped)
+    return policy
@@ -1,8 +1,9 @@
 # Network/main.py 
 from __future__ import annotations
 
+import asyncio
 import os
-import sys
+import signal
 from contextlib import asynccontextmanager
 from time import perf_counter
 from uuid import uuid4
@@ -11,13 +12,25 @@ from fastapi import FastAPI, Request
 from loguru import logger
 
 from Network import bootstrap
+from Network.network.metrics import HttpMetrics, MetricsRegistry, domain_gauges, route_template, threadpool_gauges
 from Network.routes.network import router as network_router
 from Network.routes.admin_network import router as admin_network_router
+from Network.routes.metrics import router as metrics_router
 
 
-LOG_LEVEL = os.getenv("NETWORK_LOG_LEVEL", os.getenv("GATEWAY_LOG_LEVEL", "INFO"))
-logger.remove()
-logger.add(sys.stderr, level=LOG_LEVEL)
+# JSON/Text, asynchroner Writer, Request-Sampling (ENV siehe bootstrap.configure_logging)
+LOG_SINK, LOG_POLICY = bootstrap.configure_logging()
+
+# ---- Metrics (NETWORK_METRICS=0 schaltet Registry + /metrics ab) ----
+METRICS: MetricsRegistry | None = None
+HTTP_METRICS: HttpMetrics | None = None
+if (os.getenv("NETWORK_METRICS") or "1").strip() == "1":
+    METRICS = MetricsRegistry()
+    HTTP_METRICS = HttpMetrics(METRICS)
+    threadpool_gauges(METRICS)
+    domain_gauges(METRICS, bootstrap.current_runtime)
+    METRICS.gauge("network_log_sink", "Async log writer queue and counters", ("field",),
+                  fn=lambda: {(k,): v for k, v in LOG_SINK.stats().items()})
 
 
 @asynccontextmanager
@@ -28,9 +41,35 @@ async def lifespan(app: FastAPI):
     app.state.wg_manager = rt.wg_manager
     app.state.wg_store = rt.wg_store
     app.state.wg_cfg = rt.wg_cfg
+    app.state.trusted_networks = rt.trusted_networks
+    app.state.response_cache = rt.response_cache
+    app.state.admission = rt.admission
+    app.state.metrics = METRICS
+
+    _install_sighup()
 
     yield
     logger.info("🧹 [NetworkService] Shutdown.")
+    # stoppt Worker (Audit-Queue wird dabei geflusht) und schließt den Store
+    await bootstrap.shutdown_runtime()
+    LOG_SINK.flush()
+
+
+def _on_sighup() -> None:
+    for reload in (bootstrap.reload_trusted_networks, bootstrap.reload_policies):
+        try:
+            reload()
+        except Exception:
+            pass  # bereits geloggt, alter Stand bleibt aktiv
+
+
+def _install_sighup() -> None:
+    if not hasattr(signal, "SIGHUP"):
+        return  # Windows
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, _on_sighup)
+    except (NotImplementedError, RuntimeError):
+        logger.warning("⚠️ [NetworkService] SIGHUP-Reload nicht verfügbar.")
 
 
 app = FastAPI(
@@ -41,6 +80,7 @@ app = FastAPI(
 
 app.include_router(network_router)
 app.include_router(admin_network_router)
+app.include_router(metrics_router)
 
 
 @app.middleware("http")
@@ -48,16 +88,39 @@ async def add_corr_id(request: Request, call_next):
     cid = request.headers.get("x-corr-id") or uuid4().hex
     start = perf_counter()
 
-    response = await call_next(request)
-
-    ms = (perf_counter() - start) * 1000.0
+    m = HTTP_METRICS
+    if m is None:
+        response = await call_next(request)
+    else:
+        m.in_flight.inc()
+        try:
+            response = await call_next(request)
+        except Exception:
+            m.exceptions.inc((request.method, route_template(request.scope)))
+            raise
+        finally:
+            m.in_flight.dec()
+
+    elapsed = perf_counter() - start
+    ms = elapsed * 1000.0
+    if m is not None:
+        m.observe(request.method, route_template(request.scope), response.status_code, elapsed)
     response.headers["x-corr-id"] = cid
-    logger.info("HTTP {status} {method} {path} cid={cid} ({ms:.1f} ms)",
-                status=response.status_code,
-                method=request.method,
-                path=request.url.path,
-                cid=cid,
-                ms=ms)
+
+    # Sampling: Fehler/langsame Requests immer, Rest nach Route-Rate (z.B. /status-Polls selten)
+    route = route_template(request.scope)
+    reason = LOG_POLICY.decide(route, response.status_code, ms)
+    if reason is not None:
+        log = logger.error if reason == "error" else logger.warning if reason == "slow" else logger.info
+        log("HTTP {status} {method} {path} cid={cid} ({ms:.1f} ms)",
+            status=response.status_code,
+            method=request.method,
+            path=request.url.path,
+            route=route,
+            cid=cid,
+            ms=round(ms, 1),
+            log_reason=reason,
+            sample_rate=LOG_POLICY.rate_for(route) if reason == "sampled" else 1.0)
     return response
 
 
@@ -0,0 +1,161 @@
+# backend/network/admission.py
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, Optional, Tuple
+
+
+class Rejected(Exception):
+    """Request shed before it reaches a worker thread: `status` 429 (rate) or 503 (overload)."""
+
+    def __init__(self, status: int, retry_after: float, reason: str) -> None:
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+
+
+class RateLimiter:
+    """
+    Token buckets per key (client IP / user id): `rate` tokens per second, up to `burst`.
+    Idle keys are dropped oldest-first once `max_keys` is exceeded (a dropped key
+    simply starts with a full bucket again). Event-loop only, hence no locks.
+    """
+
+    def __init__(self, rate: float, burst: float, *, max_keys: int = 100000) -> None:
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._max_keys = max(1, max_keys)
+        self._buckets: Dict[str, Tuple[float, float]] = {}   # key -> (tokens, last refill)
+
+    def take(self, key: str, now: Optional[float] = None) -> float:
+        """0.0 = allowed, else seconds until the next token."""
+        now = monotonic() if now is None else now
+        tokens, ts = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - ts) * self.rate)
+        wait = 0.0
+        if tokens >= 1.0:
+            tokens -= 1.0
+        else:
+            wait = (1.0 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)   # re-insert: dict order == recency
+        if len(self._buckets) > self._max_keys:
+            del self._buckets[next(iter(self._buckets))]
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class AdmissionClass:
+    """
+    Concurrency bulkhead for one class of routes: at most `limit` requests run,
+    up to `queue` wait (FIFO, at most `queue_timeout` seconds), the rest is shed.
+    Slots are handed from a finishing request straight to the oldest waiter.
+    """
+
+    def __init__(self, name: str, *, limit: int, queue: int, queue_timeout: float,
+                 ip_rate: Optional[RateLimiter] = None, user_rate: Optional[RateLimiter] = None) -> None:
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue = max(0, queue)
+        self.queue_timeout = queue_timeout
+        self.ip_rate = ip_rate
+        self.user_rate = user_rate
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.shed: Dict[str, int] = {"rate_ip": 0, "rate_user": 0, "queue_full": 0, "queue_timeout": 0}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _reject(self, status: int, retry_after: float, reason: str) -> Rejected:
+        self.shed[reason] += 1
+        return Rejected(status, retry_after, reason)
+
+    async def acquire(self, *, ip: str = "", user: str = "") -> None:
+        if self.ip_rate is not None and ip:
+            wait = self.ip_rate.take(ip)
+            if wait:
+                raise self._reject(429, wait, "rate_ip")
+        if self.user_rate is not None and user:
+            wait = self.user_rate.take(user)
+            if wait:
+                raise self._reject(429, wait, "rate_user")
+
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.queue:
+            raise self._reject(503, self.queue_timeout or 1.0, "queue_full")
+
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        self._waiters.append(fut)
+        timer = loop.call_later(self.queue_timeout, self._expire, fut)
+        try:
+            got = await fut
+        except asyncio.CancelledError:
+            # client went away while queued; a slot handed over in the meantime goes back
+            if fut.done() and not fut.cancelled() and fut.result():
+                self.release()
+            else:
+                self._discard(fut)
+            raise
+        finally:
+            timer.cancel()
+        if not got:
+            raise self._reject(503, self.queue_timeout or 1.0, "queue_timeout")
+        self.admitted += 1
+
+    def _discard(self, fut: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+
+    def _expire(self, fut: asyncio.Future) -> None:
+        if not fut.done():
+            self._discard(fut)
+            fut.set_result(False)
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(True)   # slot moves to the waiter; in_flight unchanged
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "limit": self.limit,
+            "queued": self.queued,
+            "max_queue": self.queue,
+            "admitted": self.admitted,
+            **{f"shed_{k}": v for k, v in self.shed.items()},
+        }
+
+
+class Admission:
+    """
+    Route classes with their own bulkheads / rate limits. Routes without a class
+    (status, heartbeat, config reads) are never queued or shed, so their share of
+    the threadpool stays free while enroll / invite bursts wait or get 429/503.
+    """
+
+    def __init__(self, classes: Dict[str, AdmissionClass]) -> None:
+        self.classes = classes
+
+    def get(self, name: str) -> Optional[AdmissionClass]:
+        return self.classes.get(name)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: c.stats() for name, c in self.classes.items()}
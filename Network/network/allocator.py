@@ -0,0 +1,354 @@
+# backend/network/allocator.py
+from __future__ import annotations
+
+import hashlib
+import heapq
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from ipaddress import ip_address, ip_network
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+# host ranges above this are allocated sparsely (hashed offsets) instead of by high-water mark
+SPARSE_HOSTS = 1 << 32
+_SPARSE_PROBES = 64
+
+
+class PoolExhausted(RuntimeError):
+    pass
+
+
+class OverlayAllocator:
+    """
+    Free-range allocator over one overlay pool.
+
+    Addresses are tracked as integer offsets from the network address:
+    - offsets >= `_next` have never been handed out (high-water mark)
+    - released offsets below the mark sit in a min-heap (`_free`)
+    - revoked addresses stay held for `quarantine_seconds` before they return
+
+    Ranges larger than SPARSE_HOSTS (IPv6 /64 and the like) are allocated sparsely
+    instead: the offset is a hash of `key` (the peer's public key, random without
+    one) with linear probing on collision. Addresses are stable per key and never
+    guessable from the enrollment order; only used offsets are kept in memory.
+
+    allocate/release are O(log n); nothing ever walks `hosts()`.
+    All public methods are serialized by one internal lock (critical sections are tiny).
+    """
+
+    def __init__(self, cidr: str, *, reserved: Optional[List[str]] = None, quarantine_seconds: float = 0.0) -> None:
+        self._net = ip_network(cidr, strict=False)
+        self._base = int(self._net.network_address)
+        self._addr_type = type(self._net.network_address)
+        self._quarantine_seconds = max(0.0, float(quarantine_seconds))
+
+        # same host range semantics as ip_network(...).hosts()
+        n = self._net.num_addresses
+        if n <= 2:
+            self._first, self._last = 0, n - 1
+        elif self._net.version == 4:
+            self._first, self._last = 1, n - 2
+        else:
+            self._first, self._last = 1, n - 1
+        self._span = self._last - self._first + 1
+        self.sparse = self._span > SPARSE_HOSTS
+
+        self._next = self._first
+        self._free: List[int] = []
+        self._used: Set[int] = set()                 # allocated + quarantined
+        self._held: Dict[int, float] = {}            # offset -> release deadline (epoch seconds)
+        self._held_heap: List[Tuple[float, int]] = []
+        self._reserved: Set[int] = set()
+        self._lock = threading.Lock()
+
+        for ip in reserved or []:
+            off = self._offset(ip)
+            if off is not None:
+                self._reserved.add(off)
+
+    @property
+    def network(self):
+        return self._net
+
+    # ----------------- Public API -----------------
+    def contains(self, ip: str) -> bool:
+        return self._offset(ip) is not None
+
+    def mark_used(self, ip: str) -> bool:
+        """Record an address that is already bound to an active peer (startup / external change)."""
+        off = self._offset(ip)
+        if off is None:
+            return False
+        with self._lock:
+            self._held.pop(off, None)
+            self._used.add(off)
+        return True
+
+    def mark_quarantined(self, ip: str, *, released_at: float) -> bool:
+        """Record an address of a revoked peer whose quarantine may still be running."""
+        off = self._offset(ip)
+        if off is None:
+            return False
+        until = released_at + self._quarantine_seconds
+        if until <= time.time():
+            return True
+        with self._lock:
+            if off not in self._used:
+                self._hold(off, until)
+        return True
+
+    def allocate(self, *, key: Optional[str] = None, now: Optional[float] = None) -> str:
+        with self._lock:
+            return self._allocate_locked(time.time() if now is None else now, key)
+
+    def _allocate_locked(self, now: float, key: Optional[str] = None) -> str:
+        self._expire(now)
+        if self.sparse:
+            return self._allocate_sparse(key)
+
+        while self._free:
+            off = heapq.heappop(self._free)
+            if off in self._used or off in self._reserved:
+                continue
+            self._used.add(off)
+            return self._ip(off)
+
+        while self._next <= self._last:
+            off = self._next
+            self._next += 1
+            if off in self._used or off in self._reserved:
+                continue
+            self._used.add(off)
+            return self._ip(off)
+
+        raise PoolExhausted("Overlay IP pool exhausted")
+
+    def _allocate_sparse(self, key: Optional[str]) -> str:
+        seed = key.encode("utf-8") if key else secrets.token_bytes(16)
+        h = int.from_bytes(hashlib.blake2b(seed, digest_size=16).digest(), "big")
+        start = h % self._span
+        for i in range(_SPARSE_PROBES):
+            off = self._first + (start + i) % self._span
+            if off in self._used or off in self._reserved:
+                continue
+            self._used.add(off)
+            return self._ip(off)
+        # only reachable if the range is (nearly) full: a huge range never gets there
+        raise PoolExhausted("Overlay IP pool exhausted")
+
+    def release(self, ip: str, *, now: Optional[float] = None, quarantine: bool = True) -> bool:
+        """
+        Give an address back; it becomes allocatable once its quarantine has passed.
+        quarantine=False returns it immediately (rollback of an allocation that was never used).
+        False if the address is not part of this pool.
+        """
+        off = self._offset(ip)
+        if off is None:
+            return False
+        ts = time.time() if now is None else now
+        with self._lock:
+            if off not in self._used or off in self._held:
+                return True
+            if quarantine and self._quarantine_seconds > 0:
+                self._hold(off, ts + self._quarantine_seconds)
+            else:
+                self._free_offset(off)
+        return True
+
+    def stats(self, *, now: Optional[float] = None) -> dict:
+        with self._lock:
+            return self._stats_locked(time.time() if now is None else now)
+
+    def _stats_locked(self, now: float) -> dict:
+        self._expire(now)
+        size = self._span - sum(1 for o in self._reserved if self._first <= o <= self._last)
+        quarantined = len(self._held)
+        allocated = len(self._used) - quarantined
+        return {
+            "cidr": str(self._net),
+            "size": size,
+            "allocated": allocated,
+            "quarantined": quarantined,
+            "available": max(0, size - allocated - quarantined),
+            "utilization": (allocated + quarantined) / size if size > 0 else 1.0,
+        }
+
+    # ----------------- Internals -----------------
+    def _offset(self, ip: str) -> Optional[int]:
+        try:
+            addr = ip_address(ip)
+        except ValueError:
+            return None
+        if addr.version != self._net.version:
+            return None
+        off = int(addr) - self._base
+        if off < self._first or off > self._last:
+            return None
+        return off
+
+    def _ip(self, off: int) -> str:
+        return str(self._addr_type(self._base + off))
+
+    def _hold(self, off: int, until: float) -> None:
+        self._used.add(off)
+        self._held[off] = until
+        heapq.heappush(self._held_heap, (until, off))
+
+    def _expire(self, now: float) -> None:
+        heap = self._held_heap
+        while heap and heap[0][0] <= now:
+            until, off = heapq.heappop(heap)
+            if self._held.get(off) != until:
+                continue  # stale entry (re-marked used meanwhile)
+            del self._held[off]
+            self._free_offset(off)
+
+    def _free_offset(self, off: int) -> None:
+        self._used.discard(off)
+        if off < self._next:  # never true in sparse mode (no high-water mark)
+            heapq.heappush(self._free, off)
+
+
+# ----------------- Pools -----------------
+@dataclass(frozen=True)
+class PoolSpec:
+    name: str
+    cidr: str                                  # IPv4 pool (every peer gets one address from it)
+    cidr6: Optional[str] = None                # optional IPv6 pool (dual-stack)
+    match: Tuple[Tuple[str, str], ...] = ()    # peer tags that select this pool; () = default pool
+
+    def matches(self, tags: Mapping[str, str]) -> bool:
+        return bool(self.match) and all(tags.get(k) == v for k, v in self.match)
+
+
+def parse_pools(raw: str) -> List[PoolSpec]:
+    """
+    Parse WG_POOLS: `name=cidr[,cidr6][@key=value[&key=value...]]`, entries separated by ';'.
+
+        servers=10.78.0.0/16,fd00:78::/64@role=server;android=10.79.0.0/16@platform=android
+
+    Raises ValueError on malformed entries.
+    """
+    out: List[PoolSpec] = []
+    for entry in raw.replace("\n", ";").split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, rest = entry.partition("=")
+        name = name.strip()
+        if not sep or not name:
+            raise ValueError(f"pool entry {entry!r}: expected name=cidr[,cidr6][@key=value]")
+        nets, _, sel = rest.partition("@")
+        cidr = cidr6 = None
+        for c in (c.strip() for c in nets.split(",")):
+            net = ip_network(c, strict=False)
+            if net.version == 4 and cidr is None:
+                cidr = str(net)
+            elif net.version == 6 and cidr6 is None:
+                cidr6 = str(net)
+            else:
+                raise ValueError(f"pool {name!r}: at most one IPv4 and one IPv6 network")
+        if cidr is None:
+            raise ValueError(f"pool {name!r}: an IPv4 network is required")
+        match = []
+        for cond in (c.strip() for c in sel.split("&") if c.strip()):
+            k, sep, v = cond.partition("=")
+            if not sep or not k.strip():
+                raise ValueError(f"pool {name!r}: selector {cond!r} is not key=value")
+            match.append((k.strip(), v.strip()))
+        if not match:
+            raise ValueError(f"pool {name!r}: a tag selector (@key=value) is required")
+        out.append(PoolSpec(name=name, cidr=cidr, cidr6=cidr6, match=tuple(match)))
+    return out
+
+
+class AddressPool:
+    """One named pool: an IPv4 allocator plus an optional IPv6 one (dual-stack)."""
+
+    def __init__(self, spec: PoolSpec, *, reserved: Optional[List[str]] = None, quarantine_seconds: float = 0.0) -> None:
+        self.spec = spec
+        self.name = spec.name
+        self.v4 = OverlayAllocator(spec.cidr, reserved=reserved, quarantine_seconds=quarantine_seconds)
+        self.v6 = OverlayAllocator(spec.cidr6, reserved=reserved, quarantine_seconds=quarantine_seconds) if spec.cidr6 else None
+
+    def allocators(self) -> List[OverlayAllocator]:
+        return [self.v4] if self.v6 is None else [self.v4, self.v6]
+
+    def allocate(self, *, key: Optional[str] = None, now: Optional[float] = None) -> Tuple[str, Optional[str]]:
+        """(IPv4, IPv6 or None); both or neither."""
+        ip4 = self.v4.allocate(key=key, now=now)
+        if self.v6 is None:
+            return ip4, None
+        try:
+            return ip4, self.v6.allocate(key=key, now=now)
+        except BaseException:
+            self.v4.release(ip4, quarantine=False)
+            raise
+
+
+class PoolSet:
+    """
+    All overlay pools of the deployment; the first one is the default pool.
+
+    A peer's pool is picked once, at allocation, from its tags (first pool whose
+    selector matches, else the default). Addresses go back to whichever pool
+    contains them, so re-tagging a peer later never moves or leaks its address.
+    """
+
+    def __init__(self, specs: Iterable[PoolSpec], *, reserved: Optional[List[str]] = None, quarantine_seconds: float = 0.0) -> None:
+        self.pools = [AddressPool(s, reserved=reserved, quarantine_seconds=quarantine_seconds) for s in specs]
+        if not self.pools:
+            raise ValueError("at least one pool is required")
+        names = [p.name for p in self.pools]
+        if len(set(names)) != len(names):
+            raise ValueError(f"duplicate pool names: {names}")
+        nets = [a.network for p in self.pools for a in p.allocators()]
+        for i, a in enumerate(nets):
+            for b in nets[i + 1:]:
+                if a.version == b.version and a.overlaps(b):
+                    raise ValueError(f"pools overlap: {a} / {b}")
+        self._by_family: Dict[int, List[OverlayAllocator]] = {4: [], 6: []}
+        for p in self.pools:
+            for a in p.allocators():
+                self._by_family[a.network.version].append(a)
+
+    @property
+    def default(self) -> AddressPool:
+        return self.pools[0]
+
+    def select(self, tags: Mapping[str, str]) -> AddressPool:
+        for p in self.pools[1:]:
+            if p.spec.matches(tags):
+                return p
+        return self.default
+
+    def _each(self, ip: Optional[str]) -> List[OverlayAllocator]:
+        if not ip:
+            return []
+        return self._by_family[6 if ":" in ip else 4]
+
+    # each call stops at the first allocator that owns the address (None = no address)
+    def mark_used(self, *ips: Optional[str]) -> None:
+        for ip in ips:
+            for a in self._each(ip):
+                if a.mark_used(ip):
+                    break
+
+    def mark_quarantined(self, *ips: Optional[str], released_at: float) -> None:
+        for ip in ips:
+            for a in self._each(ip):
+                if a.mark_quarantined(ip, released_at=released_at):
+                    break
+
+    def release(self, *ips: Optional[str], now: Optional[float] = None, quarantine: bool = True) -> None:
+        for ip in ips:
+            for a in self._each(ip):
+                if a.release(ip, now=now, quarantine=quarantine):
+                    break
+
+    def stats(self) -> List[dict]:
+        return [
+            {"pool": p.name, "family": a.network.version, **a.stats()}
+            for p in self.pools for a in p.allocators()
+        ]
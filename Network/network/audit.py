@@ -0,0 +1,426 @@
+# backend/network/audit.py
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from hashlib import blake2b
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional, Union
+
+from .models import AuditEvent, AuditPage
+from .workers import IntervalWorker
+
+_SEGMENT_PREFIX = "audit-"
+_SEGMENT_SUFFIX = ".jsonl"
+_BLOOM_SUFFIX = ".bloom"
+
+# fields a query can filter on by exact value; their needles go into the segment bloom filters
+_KEY_FIELDS = ("action", "subject", "actor_user_id")
+_BLOOM_HASHES = 7   # ~1% false positives at 10 bits per distinct key
+
+
+class _Bloom:
+    """
+    Bloom filter over the filter needles of one segment. Closed segments keep it
+    in a sidecar file (8 bytes: segment bytes covered, then the bit array) that
+    queries mmap on demand; only the tail's filter lives in memory.
+    """
+
+    __slots__ = ("bits", "mask")
+
+    def __init__(self, bits: Union[bytearray, mmap.mmap], offset: int = 0) -> None:
+        self.bits = bits
+        self.mask = (len(bits) - offset) * 8 - 1
+
+    @staticmethod
+    def size_for(segment_bytes: int) -> int:
+        # ~200 bytes per event, ~1 distinct key per event (action / actor repeat) -> 10 bits each
+        n = 1024
+        while n * 8 < segment_bytes // 20:
+            n *= 2
+        return n
+
+    @staticmethod
+    def _positions(key: bytes, mask: int) -> Iterable[int]:
+        h = int.from_bytes(blake2b(key, digest_size=16).digest(), "little")
+        h1, h2 = h & 0xFFFFFFFFFFFFFFFF, (h >> 64) | 1
+        return ((h1 + i * h2) & mask for i in range(_BLOOM_HASHES))
+
+    def add(self, key: bytes) -> None:
+        for pos in self._positions(key, self.mask):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key, self.mask))
+
+
+class _MappedBloom(_Bloom):
+    """Sidecar filter read through mmap (bit array after the 8 byte header)."""
+
+    __slots__ = ()
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        return all(bits[8 + (pos >> 3)] & (1 << (pos & 7)) for pos in self._positions(key, self.mask))
+
+
+@dataclass
+class _Segment:
+    seq: int
+    path: Path
+    first_ts: Optional[datetime] = None
+    last_ts: Optional[datetime] = None
+    size: int = 0
+    bloom: Optional[_Bloom] = None     # tail only; closed segments use their sidecar
+
+    @property
+    def bloom_path(self) -> Path:
+        return self.path.with_suffix(_BLOOM_SUFFIX)
+
+
+def _json_value(v: str) -> bytes:
+    # same escaping as pydantic's model_dump_json (raw UTF-8, no spaces)
+    return json.dumps(v, ensure_ascii=False).encode("utf-8")
+
+
+def _needle(field: str, value: str) -> bytes:
+    """Exact byte pattern of `"field":"value"` in a serialized event."""
+    return b'"' + field.encode() + b'":' + _json_value(value)
+
+
+def _event_keys(fields: Dict[str, Optional[str]]) -> List[bytes]:
+    return [_needle(k, v) for k in _KEY_FIELDS if (v := fields.get(k)) is not None]
+
+
+_NO_FILTER = dict(action=None, subject=None, actor_user_id=None, since=None, until=None)
+
+
+def _aware(dt: Optional[datetime]) -> Optional[datetime]:
+    # query params without offset are taken as UTC (events are always tz-aware)
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def matches(ev: AuditEvent, *, action: Optional[str], subject: Optional[str], actor_user_id: Optional[str],
+            since: Optional[datetime], until: Optional[datetime]) -> bool:
+    if action is not None and ev.action != action:
+        return False
+    if subject is not None and ev.subject != subject:
+        return False
+    if actor_user_id is not None and ev.actor_user_id != actor_user_id:
+        return False
+    if since is not None and ev.ts < since:
+        return False
+    if until is not None and ev.ts >= until:
+        return False
+    return True
+
+
+class AuditLog:
+    """
+    Audit trail: in-memory ring buffer + optional append-only segment files.
+
+    - append is O(1): deque(maxlen) for the ring, one buffered write for the file
+    - segments rotate at `segment_bytes`; `max_segments` > 0 drops the oldest ones
+    - queries walk segments newest -> oldest via mmap, skipping segments outside
+      the requested time range and, for action / subject / actor filters, segments
+      whose bloom filter rules the value out; cursors are "<segment>:<byte offset>"
+    - the write buffer goes to the file every `flush_interval` seconds (background
+      thread) or once `flush_bytes` are pending, whichever comes first
+
+    Without `directory` only the ring exists (volatile, like before).
+    """
+
+    def __init__(self, directory: Optional[str] = None, *, ring_size: int = 5000,
+                 segment_bytes: int = 16 * 1024 * 1024, max_segments: int = 0,
+                 flush_interval: float = 1.0, flush_bytes: int = 64 * 1024) -> None:
+        self._lock = threading.Lock()
+        self._ring: Deque[AuditEvent] = deque(maxlen=max(1, ring_size))
+        self._dir = Path(directory) if directory else None
+        self._segment_bytes = max(4096, segment_bytes)
+        self._bloom_bytes = _Bloom.size_for(self._segment_bytes)
+        self._max_segments = max(0, max_segments)
+        self._segments: Dict[int, _Segment] = {}
+        self._fh = None
+        self._flush_bytes = max(0, flush_bytes)
+        self._unflushed = 0
+        self._flusher: Optional[IntervalWorker] = None
+        self.segments_skipped = 0
+
+        if self._dir is not None:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            self._scan_segments()
+            self._open_tail()
+            self._ring.extend(reversed(self._query_files(self._ring.maxlen, None, _NO_FILTER).items))
+            if flush_interval > 0:
+                self._flusher = IntervalWorker("audit-file-flush", flush_interval, self.flush, final_run=False)
+                self._flusher.start()
+
+    @property
+    def persistent(self) -> bool:
+        return self._dir is not None
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    # ----------------- Write -----------------
+    def append(self, event: AuditEvent) -> None:
+        self.append_many([event])
+
+    def append_many(self, events: List[AuditEvent]) -> None:
+        if not events:
+            return
+        with self._lock:
+            self._ring.extend(events)
+            if self._fh is None:
+                return
+            for ev in events:
+                line = ev.model_dump_json().encode("utf-8") + b"\n"
+                tail = self._segments[max(self._segments)]
+                if tail.size and tail.size + len(line) > self._segment_bytes:
+                    tail = self._rotate()
+                self._fh.write(line)
+                tail.size += len(line)
+                tail.last_ts = ev.ts
+                if tail.first_ts is None:
+                    tail.first_ts = ev.ts
+                for key in _event_keys({"action": ev.action, "subject": ev.subject, "actor_user_id": ev.actor_user_id}):
+                    tail.bloom.add(key)
+                self._unflushed += len(line)
+            if self._unflushed >= self._flush_bytes:
+                self._fh.flush()
+                self._unflushed = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._fh is not None and self._unflushed:
+                self._fh.flush()
+                self._unflushed = 0
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.stop()
+            self._flusher = None
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+                self._write_bloom(self._segments[max(self._segments)])
+
+    # ----------------- Read -----------------
+    def recent(self, limit: int = 200) -> List[AuditEvent]:
+        with self._lock:
+            n = len(self._ring)
+            k = max(0, min(limit, n))
+            return [self._ring[n - 1 - i] for i in range(k)]
+
+    def query(self, *, limit: int = 100, cursor: Optional[str] = None, action: Optional[str] = None,
+              subject: Optional[str] = None, actor_user_id: Optional[str] = None,
+              since: Optional[datetime] = None, until: Optional[datetime] = None) -> AuditPage:
+        flt = dict(action=action, subject=subject, actor_user_id=actor_user_id, since=_aware(since), until=_aware(until))
+        if self._dir is None:
+            return self._query_ring(limit, cursor, flt)
+        self.flush()
+        return self._query_files(limit, cursor, flt)
+
+    def _query_ring(self, limit: int, cursor: Optional[str], flt: dict) -> AuditPage:
+        with self._lock:
+            items = list(self._ring)
+        # cursor = number of newest entries already consumed (ring is volatile anyway)
+        pos = len(items) - (int(cursor) if cursor else 0)
+        out: List[AuditEvent] = []
+        while pos > 0 and len(out) < limit:
+            pos -= 1
+            if matches(items[pos], **flt):
+                out.append(items[pos])
+        return AuditPage(items=out, next_cursor=str(len(items) - pos) if pos > 0 else None)
+
+    def _query_files(self, limit: int, cursor: Optional[str], flt: dict) -> AuditPage:
+        with self._lock:
+            segs = sorted(self._segments.values(), key=lambda s: s.seq, reverse=True)
+
+        start_seq, start_pos = None, None
+        if cursor:
+            a, _, b = cursor.partition(":")
+            start_seq, start_pos = int(a), int(b)
+
+        needles = _event_keys(flt)
+        since, until = flt["since"], flt["until"]
+
+        out: List[AuditEvent] = []
+        for idx, seg in enumerate(segs):
+            if start_seq is not None and seg.seq > start_seq:
+                continue
+            if since is not None and seg.last_ts is not None and seg.last_ts < since:
+                break  # everything older is out of range too
+            if until is not None and seg.first_ts is not None and seg.first_ts >= until:
+                continue
+            if needles and not self._may_contain(seg, needles):
+                self.segments_skipped += 1
+                continue
+            end = start_pos if seg.seq == start_seq else None
+            pos = self._scan_segment(seg, end, needles, flt, limit - len(out), out)
+            if len(out) >= limit:
+                more = pos > 0 or idx + 1 < len(segs)
+                if not more:
+                    return AuditPage(items=out, next_cursor=None)
+                if pos > 0:
+                    return AuditPage(items=out, next_cursor=f"{seg.seq}:{pos}")
+                nxt = segs[idx + 1]
+                return AuditPage(items=out, next_cursor=f"{nxt.seq}:{self._segment_len(nxt)}")
+        return AuditPage(items=out, next_cursor=None)
+
+    # ----------------- Internals -----------------
+    def _segment_path(self, seq: int) -> Path:
+        return self._dir / f"{_SEGMENT_PREFIX}{seq:08d}{_SEGMENT_SUFFIX}"
+
+    @staticmethod
+    def _segment_len(seg: _Segment) -> int:
+        try:
+            return seg.path.stat().st_size
+        except OSError:
+            return 0
+
+    def _scan_segments(self) -> None:
+        for p in self._dir.glob(f"{_SEGMENT_PREFIX}*{_SEGMENT_SUFFIX}"):
+            try:
+                seq = int(p.name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)])
+            except ValueError:
+                continue
+            seg = _Segment(seq=seq, path=p, size=p.stat().st_size)
+            if seg.size:
+                with open(p, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    first = mm[:mm.find(b"\n")] if mm.find(b"\n") > 0 else b""
+                    body_end = mm.rfind(b"\n")
+                    last = mm[mm.rfind(b"\n", 0, body_end) + 1:body_end] if body_end > 0 else b""
+                for raw, attr in ((first, "first_ts"), (last, "last_ts")):
+                    try:
+                        setattr(seg, attr, AuditEvent.model_validate_json(raw).ts)
+                    except Exception:
+                        pass
+            self._segments[seq] = seg
+
+    def _open_tail(self) -> None:
+        if not self._segments:
+            seq = 1
+            self._segments[seq] = _Segment(seq=seq, path=self._segment_path(seq))
+        tail = self._segments[max(self._segments)]
+        tail.bloom = self._load_bloom(tail) or self._build_bloom(tail)
+        self._fh = open(tail.path, "ab")
+
+    def _rotate(self) -> _Segment:
+        self._fh.close()
+        closed = self._segments[max(self._segments)]
+        self._write_bloom(closed)
+        closed.bloom = None
+        seq = closed.seq + 1
+        seg = _Segment(seq=seq, path=self._segment_path(seq), bloom=_Bloom(bytearray(self._bloom_bytes)))
+        self._segments[seq] = seg
+        self._fh = open(seg.path, "ab")
+        self._unflushed = 0
+
+        if self._max_segments:
+            for old in sorted(self._segments)[:-self._max_segments]:
+                dropped = self._segments.pop(old)
+                for path in (dropped.path, dropped.bloom_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+        return seg
+
+    # ----------------- Bloom sidecars -----------------
+    def _may_contain(self, seg: _Segment, needles: List[bytes]) -> bool:
+        bloom = seg.bloom
+        if bloom is not None:
+            return all(n in bloom for n in needles)
+        try:
+            f = open(seg.bloom_path, "rb")
+        except OSError:
+            f = None
+        if f is not None:
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                if size > 8:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if int.from_bytes(mm[:8], "little") == self._segment_len(seg):
+                            return all(n in _MappedBloom(mm, 8) for n in needles)
+        # no (current) sidecar: segment from before filters existed or a crash mid-rotate
+        bloom = self._build_bloom(seg)
+        self._write_bloom(seg, bloom)
+        return all(n in bloom for n in needles)
+
+    def _load_bloom(self, seg: _Segment) -> Optional[_Bloom]:
+        try:
+            raw = seg.bloom_path.read_bytes()
+        except OSError:
+            return None
+        if len(raw) <= 8 or int.from_bytes(raw[:8], "little") != seg.size:
+            return None  # stale: the segment grew after the sidecar was written
+        return _Bloom(bytearray(raw[8:]))
+
+    def _build_bloom(self, seg: _Segment) -> _Bloom:
+        """One pass over the segment (only json.loads, no model validation)."""
+        bloom = _Bloom(bytearray(self._bloom_bytes))
+        try:
+            f = open(seg.path, "rb")
+        except OSError:
+            return bloom
+        with f:
+            for line in f:
+                try:
+                    fields = json.loads(line)
+                except ValueError:
+                    continue
+                for key in _event_keys(fields):
+                    bloom.add(key)
+        return bloom
+
+    def _write_bloom(self, seg: _Segment, bloom: Optional[_Bloom] = None) -> None:
+        bloom = bloom or seg.bloom
+        if bloom is None:
+            return
+        tmp = seg.bloom_path.with_suffix(f"{_BLOOM_SUFFIX}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                f.write(self._segment_len(seg).to_bytes(8, "little"))
+                f.write(bloom.bits)
+            os.replace(tmp, seg.bloom_path)
+        except OSError:
+            pass  # queries rebuild it
+
+    def _scan_segment(self, seg: _Segment, end: Optional[int], needles: List[bytes], flt: dict,
+                      want: int, out: List[AuditEvent]) -> int:
+        """Walk one segment backwards from `end`; returns the offset to resume from (0 = exhausted)."""
+        try:
+            f = open(seg.path, "rb")
+        except OSError:
+            return 0
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = len(mm) if end is None else min(end, len(mm))
+                if pos and mm[pos - 1:pos] != b"\n":
+                    pos = mm.rfind(b"\n", 0, pos) + 1  # drop a torn trailing line
+                found = 0
+                while pos > 0 and found < want:
+                    start = mm.rfind(b"\n", 0, pos - 1) + 1
+                    line = mm[start:pos - 1]
+                    pos = start
+                    if any(n not in line for n in needles):
+                        continue
+                    try:
+                        ev = AuditEvent.model_validate_json(line)
+                    except Exception:
+                        continue
+                    if matches(ev, **flt):
+                        out.append(ev)
+                        found += 1
+                return pos
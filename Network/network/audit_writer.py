@@ -0,0 +1,117 @@
+# backend/network/audit_writer.py
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Deque, List
+
+from loguru import logger
+
+from .models import AuditEvent
+from .store import NetworkStore
+from .workers import IntervalWorker
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class AuditWriter:
+    """
+    Moves audit writes off the request path.
+
+    Callers `submit()` into a bounded queue; a background worker drains it in
+    batches via `store.append_audit_many` every `flush_interval` seconds, or
+    as soon as `batch_size` events are waiting.
+
+    Overflow (queue full):
+    - drop_oldest: evict the oldest queued event (default, newest state wins)
+    - drop_newest: discard the submitted event
+    - block:       wait up to `block_timeout` for room, then discard it
+    """
+
+    def __init__(
+        self,
+        store: NetworkStore,
+        *,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        overflow: str = "drop_oldest",
+        block_timeout: float = 1.0,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self._store = store
+        self._max_queue = max(1, max_queue)
+        self._batch_size = max(1, batch_size)
+        self._overflow = overflow
+        self._block_timeout = block_timeout
+
+        self._q: Deque[AuditEvent] = deque()
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # one drain at a time (worker vs. explicit flush)
+        self._worker = IntervalWorker("audit-writer", flush_interval, self.flush, final_run=False)
+
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+
+    # ----------------- Producer side -----------------
+    def submit(self, event: AuditEvent) -> None:
+        with self._cond:
+            if len(self._q) >= self._max_queue:
+                if self._overflow == "drop_oldest":
+                    self._q.popleft()
+                    self.dropped += 1
+                elif self._overflow == "drop_newest":
+                    self.dropped += 1
+                    return
+                elif not self._cond.wait_for(lambda: len(self._q) < self._max_queue, self._block_timeout):
+                    self.dropped += 1
+                    return
+            self._q.append(event)
+            full = len(self._q) >= self._batch_size
+        if full:
+            self._worker.wake()
+
+    # ----------------- Consumer side -----------------
+    def flush(self) -> int:
+        """Drain everything queued right now; returns the number of events written."""
+        total = 0
+        with self._write_lock:
+            while True:
+                with self._cond:
+                    n = min(len(self._q), self._batch_size)
+                    batch: List[AuditEvent] = [self._q.popleft() for _ in range(n)]
+                    if n:
+                        self._cond.notify_all()
+                if not batch:
+                    return total
+                try:
+                    self._store.append_audit_many(batch)
+                except Exception as e:
+                    self.failed += len(batch)
+                    logger.error("❌ [AuditWriter] Batch ({} Events) nicht geschrieben: {}", len(batch), e)
+                    continue
+                self.written += len(batch)
+                self.batches += 1
+                total += len(batch)
+
+    def start(self) -> None:
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Stop the worker and flush what is left (lifespan shutdown)."""
+        self._worker.stop()
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self._q),
+            "max_queue": self._max_queue,
+            "overflow": self._overflow,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
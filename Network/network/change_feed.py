@@ -0,0 +1,62 @@
+# backend/network/change_feed.py
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Dict, Optional, Set
+
+
+class PeerChangeFeed:
+    """
+    Wakes long-poll / SSE watchers when peers changed. The change log itself
+    lives in the store (`NetworkStore.peer_changes`); this only says "look again".
+
+    `notify()` is called from worker threads (after the store write), `wait()`
+    runs on the event loop. Watchers read `seq` *before* querying the store and
+    pass it to `wait()`, so a change landing in between is never missed.
+    """
+
+    def __init__(self) -> None:
+        self.seq = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiters: Set[asyncio.Future] = set()
+        self.notifications = 0
+
+    def notify(self) -> None:
+        with self._lock:
+            self.seq += 1
+            loop = self._loop if self._waiters else None
+        if loop is not None:
+            self.notifications += 1
+            try:
+                loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:
+                pass  # loop already closed (shutdown)
+
+    def _wake(self) -> None:
+        with self._lock:
+            waiters, self._waiters = self._waiters, set()
+        for fut in waiters:
+            if not fut.done():
+                fut.set_result(True)
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """True once anything changed after `seq`, False on timeout."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        with self._lock:
+            if self.seq != seq:
+                return True
+            self._loop = loop
+            self._waiters.add(fut)
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(fut)
+
+    def stats(self) -> Dict[str, int]:
+        return {"watchers": len(self._waiters), "seq": self.seq, "wakeups": self.notifications}
@@ -0,0 +1,75 @@
+# backend/network/client_config.py
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .wireguard import WireGuardConfig
+
+# (overlay_ip, overlay_ip6, AllowedIPs): everything a rendered config depends on besides the WireGuardConfig
+RenderKey = Tuple[str, Optional[str], Tuple[str, ...]]
+
+
+class ConfigRenderer:
+    """
+    Client config text for one WireGuardConfig. Everything below the Address line
+    only depends on the config and the peer's AllowedIPs, so that part is built
+    once per distinct AllowedIPs set (a fleet has a handful, see PolicyEngine);
+    a render is then two string concatenations.
+
+    Rendered texts are kept keyed by overlay address(es) + AllowedIPs (oldest
+    insert evicted first): a peer whose address or policy result changes simply
+    misses, a new WireGuardConfig means a new renderer. Hits take no lock.
+    `max_entries=0` disables the cache.
+    """
+
+    def __init__(self, cfg: WireGuardConfig, *, max_entries: int = 10000) -> None:
+        dns_line = f"DNS = {cfg.wg_dns}\n" if cfg.wg_dns else ""
+        # NOTE: We are not embedding a private key (client should generate it).
+        self._peer_head = (
+            f"{dns_line}"
+            "\n"
+            "[Peer]\n"
+            f"PublicKey = {cfg.wg_server_public_key}\n"
+            f"Endpoint = {cfg.wg_server_endpoint}\n"
+            "AllowedIPs = "
+        )
+        self._peer_tail = f"\nPersistentKeepalive = {cfg.wg_persistent_keepalive}\n"
+        self._sections: Dict[Tuple[str, ...], str] = {}
+        self._max = max(0, max_entries)
+        self._lock = threading.Lock()
+        self._rendered: Dict[RenderKey, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _section(self, allowed_ips: Tuple[str, ...]) -> str:
+        s = self._sections.get(allowed_ips)
+        if s is None:
+            s = self._sections.setdefault(allowed_ips, self._peer_head + ", ".join(allowed_ips) + self._peer_tail)
+        return s
+
+    def render(self, overlay_ip: str, overlay_ip6: Optional[str], allowed_ips: Tuple[str, ...]) -> str:
+        key = (overlay_ip, overlay_ip6, allowed_ips)
+        text = self._rendered.get(key)   # lock-free hit; texts are immutable
+        if text is not None:
+            self.hits += 1
+            return text
+        address = f"{overlay_ip}/32, {overlay_ip6}/128" if overlay_ip6 else f"{overlay_ip}/32"
+        text = "[Interface]\nAddress = " + address + "\n" + self._section(allowed_ips)
+        self.misses += 1
+        if self._max:
+            with self._lock:
+                self._rendered[key] = text
+                while len(self._rendered) > self._max:
+                    del self._rendered[next(iter(self._rendered))]
+        return text
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._rendered),
+            "max_entries": self._max,
+            "sections": len(self._sections),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
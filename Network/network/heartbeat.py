@@ -0,0 +1,112 @@
+# backend/network/heartbeat.py
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set
+
+from .store import NetworkStore
+from .workers import IntervalWorker
+
+
+class HeartbeatTable:
+    """
+    Last-seen table for peer heartbeats.
+
+    `touch()` is two dict assignments under an uncontended lock: repeated
+    heartbeats of one peer coalesce into one pending entry until the next
+    flush. A background worker swaps the pending entries out under the same
+    lock and writes them to the store in one batch every `flush_interval`
+    seconds (never per request), together with the deletions queued by
+    `forget()` for revoked peers.
+    """
+
+    def __init__(self, store: NetworkStore, *, timeout_seconds: float = 90.0, flush_interval: float = 10.0) -> None:
+        self._store = store
+        self._timeout = timeout_seconds
+        self._seen: Dict[str, float] = {}      # peer_id -> epoch seconds
+        self._dirty: Dict[str, float] = {}     # not yet flushed
+        self._gone: Set[str] = set()           # forgotten, not yet deleted from the store
+        self._lock = threading.Lock()          # _seen / _dirty / _gone writes and the flush swap
+        self._flush_lock = threading.Lock()
+        self._worker = IntervalWorker("heartbeat-flush", flush_interval, self.flush, final_run=False)
+        self.flushed = 0
+
+        self._cursor, seen = store.peer_seen_since(0)
+        for pid, ts in seen.items():
+            self._seen[pid] = ts.timestamp()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def touch(self, peer_id: str, *, now: Optional[float] = None) -> None:
+        ts = time.time() if now is None else now
+        with self._lock:
+            self._seen[peer_id] = ts
+            self._dirty[peer_id] = ts
+
+    def last_seen(self, peer_id: str) -> Optional[datetime]:
+        ts = self._seen.get(peer_id)
+        return datetime.fromtimestamp(ts, tz=timezone.utc) if ts is not None else None
+
+    def is_alive(self, peer_id: str, *, now: Optional[float] = None) -> bool:
+        ts = self._seen.get(peer_id)
+        return ts is not None and (time.time() if now is None else now) - ts <= self._timeout
+
+    def forget(self, peer_id: str, *, persist: bool = True) -> None:
+        """
+        Revoked peer: drop it here and, with the next flush, from the store
+        (`persist=False` for revokes another worker made: that one deletes the row).
+        """
+        with self._lock:
+            self._seen.pop(peer_id, None)
+            self._dirty.pop(peer_id, None)
+            if persist:
+                self._gone.add(peer_id)
+
+    def merge_from_store(self) -> None:
+        """Pick up heartbeats flushed by other worker processes since the last merge (newest timestamp wins)."""
+        self._cursor, rows = self._store.peer_seen_since(self._cursor)
+        with self._lock:
+            for pid, dt in rows.items():
+                ts = dt.timestamp()
+                if ts > self._seen.get(pid, 0.0):
+                    self._seen[pid] = ts
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            # swap instead of copy: touch() keeps writing into the fresh dict
+            with self._lock:
+                batch, self._dirty = self._dirty, {}
+                gone, self._gone = self._gone, set()
+            # forget() then touch() again: the delete must not be followed by a write-back
+            for pid in gone:
+                batch.pop(pid, None)
+            try:
+                if gone:
+                    self._store.forget_peer_seen(list(gone))
+                if batch:
+                    self._store.save_peer_seen({pid: datetime.fromtimestamp(ts, tz=timezone.utc) for pid, ts in batch.items()})
+            except BaseException:
+                self._requeue(batch, gone)
+                raise
+            self.flushed += len(batch)
+            return len(batch)
+
+    def _requeue(self, batch: Dict[str, float], gone: Set[str]) -> None:
+        """Failed store write (e.g. database locked): keep the batch for the next flush."""
+        with self._lock:
+            self._gone |= gone
+            for pid, ts in batch.items():
+                if pid in self._gone:
+                    continue  # revoked since the swap
+                if ts > self._dirty.get(pid, 0.0):
+                    self._dirty[pid] = ts
+
+    def start(self) -> None:
+        self._worker.start()
+
+    def stop(self) -> None:
+        self._worker.stop()
+        self.flush()
@@ -0,0 +1,435 @@
+# backend/network/journal.py
+from __future__ import annotations
+
+import gc
+import json
+import mmap
+import os
+import socket
+import struct
+import sys
+import threading
+from datetime import datetime
+from itertools import repeat
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from .audit import AuditLog
+from .models import InviteInfo, PeerInfo
+from .peer_record import IpKey, PeerCodec, PeerRecord, from_us, ip_str, to_us
+from .pmap import PersistentMap
+from .store import InMemoryNetworkStore, utcnow
+
+_SEGMENT_PREFIX = "journal-"
+_SEGMENT_SUFFIX = ".log"
+_SNAPSHOT_NAME = "snapshot.bin"
+
+# header: magic, n_peers, journal_seq, strings_len, meta_len
+_MAGIC = b"NWSNAP02"
+_HEADER = struct.Struct("<8sQQQQ")
+# string-table columns (uint32 index), in this order; overlay_ip6 "" = none
+_STR_COLS = ("peer_id", "user_id", "device_id", "overlay_ip", "public_key", "allowed_ips", "tags", "overlay_ip6")
+# pre dual-stack snapshots (read only)
+_MAGIC_V1 = b"NWSNAP01"
+_STR_COLS_V1 = _STR_COLS[:-1]
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _snap_ip_key(ip: str) -> IpKey:
+    # snapshot IPs are canonical (written via ip_str): skip the strict parser
+    return ip if ":" in ip else int.from_bytes(socket.inet_aton(ip), "big")
+
+
+def _peer_rec(p: PeerInfo) -> list:
+    return ["p", p.peer_id, p.user_id, p.device_id, p.overlay_ip, p.allowed_ips, p.public_key,
+            to_us(p.created_at), to_us(p.revoked_at), p.tags, p.overlay_ip6]
+
+
+def _invite_rec(i: InviteInfo) -> list:
+    return [i.invite_code, i.user_id, i.device_id, to_us(i.created_at), to_us(i.expires_at), to_us(i.used_at)]
+
+
+def _invite_from(r: list) -> InviteInfo:
+    return InviteInfo.model_construct(
+        invite_code=r[0], user_id=r[1], device_id=r[2],
+        created_at=from_us(r[3]), expires_at=from_us(r[4]), used_at=from_us(r[5]),
+    )
+
+
+# ----------------- Snapshot file -----------------
+def write_snapshot(path: Path, peers: Iterable[PeerRecord], meta: dict, journal_seq: int) -> int:
+    """
+    Columnar snapshot: one JSON string table, uint32 index columns per string field,
+    int64 microsecond columns for created_at / revoked_at (-1 = none), JSON meta tail.
+    Written to a temp file and renamed, so a crash never leaves a half snapshot.
+    """
+    table: Dict[str, int] = {}   # string -> index; insertion order == table order
+    intern = table.setdefault
+    enc = json.JSONEncoder(separators=(",", ":")).encode
+    # records share their allowed_ips / tags tuples (PeerCodec): encode each once
+    ai_idx: Dict[tuple, int] = {}
+    tg_idx: Dict[tuple, int] = {}
+
+    cols = {c: [] for c in _STR_COLS}
+    c_pid, c_uid, c_did, c_ip, c_pk, c_ai, c_tg, c_ip6 = (cols[c].append for c in _STR_COLS)
+    created: List[int] = []
+    revoked: List[int] = []
+    for p in peers:
+        c_pid(intern(p.peer_id, len(table)))
+        c_uid(intern(p.user_id, len(table)))
+        c_did(intern(p.device_id, len(table)))
+        c_ip(intern(ip_str(p.ip), len(table)))
+        c_pk(intern(p.public_key, len(table)))
+        i = ai_idx.get(p.allowed_ips)
+        if i is None:
+            i = ai_idx[p.allowed_ips] = intern(enc(p.allowed_ips), len(table))
+        c_ai(i)
+        i = tg_idx.get(p.tags)
+        if i is None:
+            i = tg_idx[p.tags] = intern(enc(dict(p.tags)), len(table))
+        c_tg(i)
+        c_ip6(intern(p.ip6 or "", len(table)))
+        created.append(p.created_us)
+        revoked.append(p.revoked_us if p.revoked_us is not None else -1)
+
+    strings = list(table)
+    strings_b = json.dumps(strings, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    meta_b = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    n = len(created)
+
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, n, journal_seq, len(strings_b), len(meta_b)))
+        f.write(strings_b)
+        f.write(b"\0" * (_pad8(len(strings_b)) - len(strings_b)))
+        for c in _STR_COLS:
+            data = struct.pack(f"<{n}I", *cols[c])
+            f.write(data)
+            f.write(b"\0" * (_pad8(len(data)) - len(data)))
+        for col in (created, revoked):
+            f.write(struct.pack(f"<{n}q", *col))
+        f.write(meta_b)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return n
+
+
+def read_snapshot(path: Path, codec: PeerCodec) -> Tuple[List[PeerRecord], dict, int]:
+    """mmap the snapshot and rebuild the records (allowed_ips / tags decoded once per distinct value)."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, n, journal_seq, strings_len, meta_len = _HEADER.unpack_from(mm, 0)
+        if magic not in (_MAGIC, _MAGIC_V1):
+            raise ValueError(f"{path}: not a network snapshot")
+        names = _STR_COLS if magic == _MAGIC else _STR_COLS_V1
+        off = _HEADER.size
+        strings = json.loads(mm[off:off + strings_len])
+        off += _pad8(strings_len)
+
+        mv = memoryview(mm)
+        try:
+            cols = {}
+            for c in names:
+                cols[c] = mv[off:off + 4 * n].cast("I").tolist()
+                off += _pad8(4 * n)
+            created = mv[off:off + 8 * n].cast("q").tolist()
+            off += 8 * n
+            revoked = mv[off:off + 8 * n].cast("q").tolist()
+            off += 8 * n
+        finally:
+            mv.release()
+        meta = json.loads(mm[off:off + meta_len]) if meta_len else {}
+
+    allowed: Dict[int, tuple] = {}
+    tags: Dict[int, tuple] = {}
+
+    def dec_allowed(i: int) -> tuple:
+        v = allowed.get(i)
+        if v is None:
+            v = allowed[i] = codec.allowed(json.loads(strings[i]))
+        return v
+
+    def dec_tags(i: int) -> tuple:
+        v = tags.get(i)
+        if v is None:
+            v = tags[i] = codec.tags(json.loads(strings[i]))
+        return v
+
+    user_ids: Dict[int, str] = {}
+    ip6s = cols.get("overlay_ip6")
+    if ip6s is None:  # v1 snapshot: every peer points at an appended ""
+        strings.append("")
+        ip6s = repeat(len(strings) - 1)
+    peers = [
+        PeerRecord(strings[pid], user_ids.get(uid) or user_ids.setdefault(uid, sys.intern(strings[uid])),
+                   strings[did], _snap_ip_key(strings[ip]), dec_allowed(ai), strings[pk],
+                   cr, rv if rv >= 0 else None, dec_tags(tg), strings[ip6] or None)
+        for pid, uid, did, ip, pk, ai, tg, cr, rv, ip6 in zip(
+            cols["peer_id"], cols["user_id"], cols["device_id"], cols["overlay_ip"], cols["public_key"],
+            cols["allowed_ips"], cols["tags"], created, revoked, ip6s,
+        )
+    ]
+    return peers, meta, journal_seq
+
+
+# ----------------- Store -----------------
+class JournaledNetworkStore(InMemoryNetworkStore):
+    """
+    InMemoryNetworkStore with write-ahead journal + periodic snapshots.
+
+    - every mutation appends one JSON-array line to the current journal segment
+      before it is applied in memory (a failed write changes nothing), while the
+      key's stripe lock is still held (journal order == apply order per key)
+    - lines are handed to the OS on every append (survives a process crash);
+      `sync()` fsyncs, `fsync_always=True` does that per append
+    - `snapshot()` rotates the segment, copies the state and writes a columnar
+      snapshot; older segments are deleted afterwards. Records that land in both
+      the snapshot and the new segment replay idempotently.
+    - startup = mmap the snapshot + replay the segments written after it
+    """
+
+    def __init__(self, directory: str, *, audit: Optional[AuditLog] = None, stripes: int = 64,
+                 invite_grace_seconds: int = 86400, fsync_always: bool = False, change_log: int = 10000) -> None:
+        super().__init__(audit=audit, stripes=stripes, invite_grace_seconds=invite_grace_seconds, change_log=change_log)
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._fsync_always = fsync_always
+        self._jlock = threading.Lock()
+        self._snap_lock = threading.Lock()
+        self._fh = None
+        self._view_stale = False
+        self.records_since_snapshot = 0
+
+        seq = self._recover()
+        # the change log starts empty: a recovered state is new to every consumer (new epoch -> resync)
+        self._changes.clear()
+        self._seq = seq
+        self._fh = open(self._segment_path(seq), "ab")
+
+    # ----------------- Recovery -----------------
+    def _segment_path(self, seq: int) -> Path:
+        return self._dir / f"{_SEGMENT_PREFIX}{seq:08d}{_SEGMENT_SUFFIX}"
+
+    def _segments(self) -> List[int]:
+        out = []
+        for p in self._dir.glob(f"{_SEGMENT_PREFIX}*{_SEGMENT_SUFFIX}"):
+            try:
+                out.append(int(p.name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]))
+            except ValueError:
+                continue
+        return sorted(out)
+
+    def _recover(self) -> int:
+        # millions of new container objects would trigger the cyclic GC over and over
+        # (most of the load time); nothing built here is cyclic
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._load()
+        finally:
+            if enabled:
+                gc.enable()
+
+    def _load(self) -> int:
+        """Load snapshot + replay newer segments; returns the segment number to append to."""
+        snap = self._dir / _SNAPSHOT_NAME
+        from_seq = 0
+        if snap.is_file():
+            peers, meta, from_seq = read_snapshot(snap, self._codec)
+            self._restore(peers, meta)
+            logger.info("📦 [Journal] Snapshot geladen: {} Peers", len(peers))
+
+        replayed = 0
+        segs = [s for s in self._segments() if s >= from_seq]
+        for s in segs:
+            path = self._segment_path(s)
+            if path.stat().st_size == 0:
+                path.unlink()  # opened by an earlier run, never written
+                continue
+            replayed += self._replay(path)
+        if self._view_stale:
+            self._build_view()
+            self._view_stale = False
+        if replayed:
+            logger.info("📼 [Journal] {} Journal-Records nachgespielt ({} Segmente)", replayed, len(segs))
+        self.records_since_snapshot = replayed
+        # append to a fresh segment: never write behind a possibly torn tail
+        return max([from_seq - 1, *segs]) + 1
+
+    def _restore(self, peers: List[PeerRecord], meta: dict) -> None:
+        """Bulk load (no per-peer insort / locking; runs before the store is shared)."""
+        self._peers = {p.peer_id: p for p in peers}
+        self._build_view()
+        for p in peers:
+            self._index(p)
+        for r in meta.get("invites", []):
+            self._put_invite_locked(_invite_from(r))
+        self._peer_seen = {pid: from_us(us) for pid, us in meta.get("seen", {}).items()}
+        c = meta.get("counters", {})
+        self._invites_evicted_expired = c.get("evicted_expired", 0)
+        self._invites_evicted_used = c.get("evicted_used", 0)
+
+    def _build_view(self) -> None:
+        self._head = (self._generation, PersistentMap.from_sorted(sorted(self._peers.items())))
+
+    def _replay(self, path: Path) -> int:
+        n = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    logger.warning("⚠️ [Journal] Abgeschnittener Record in {} ignoriert.", path.name)
+                    break  # torn tail after a crash; nothing valid follows
+                self._apply(rec)
+                n += 1
+        return n
+
+    def _apply(self, rec: list) -> None:
+        kind = rec[0]
+        if kind == "p":
+            # records written before dual-stack have no trailing overlay_ip6
+            _, pid, uid, did, ip, allowed, pk, created, revoked, tags, *ip6 = rec
+            p = self._codec.record(pid, uid, did, ip, allowed, pk, created, revoked, tags, *ip6)
+            if pid in self._peers:
+                self._replace(p)
+            else:
+                # new peer: the view is bulk-built once after replay
+                self._peers[pid] = p
+                self._index(p)
+                self._view_stale = True
+        elif kind == "r":
+            super()._revoke_locked(rec[1], from_us(rec[2]))
+        elif kind == "u":
+            super()._update_locked(rec[1], rec[2], rec[3])
+        elif kind == "i":
+            super()._put_invite_locked(_invite_from(rec[1:]))
+        elif kind == "h":
+            self._peer_seen.update({pid: from_us(us) for pid, us in rec[1].items()})
+        elif kind == "f":
+            super().forget_peer_seen(rec[1])
+        elif kind == "s":
+            super().sweep_invites(now=from_us(rec[1]))
+
+    # ----------------- Journal -----------------
+    def _log(self, rec: list, apply: Optional[Callable[[], object]] = None) -> object:
+        """
+        Journal `rec`, then run `apply` (the in-memory change) under the journal lock.
+        A failed write leaves memory untouched (callers roll back, e.g. release the
+        overlay IP) and its partial line is cut off again; snapshot() rotates under
+        the same lock, so it sees a change together with its record or neither.
+        """
+        if self._fh is None:
+            return apply() if apply is not None else None  # recovery in progress
+        line = json.dumps(rec, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._jlock:
+            pos = self._fh.tell()
+            try:
+                self._fh.write(line)
+                self._fh.flush()
+                if self._fsync_always:
+                    os.fsync(self._fh.fileno())
+            except BaseException:
+                self._truncate(pos)
+                raise
+            self.records_since_snapshot += 1
+            return apply() if apply is not None else None
+
+    def _truncate(self, pos: int) -> None:
+        """After a failed write: drop whatever part of the record reached the file."""
+        try:
+            self._fh.seek(pos)  # discards the unwritten buffer
+            self._fh.truncate(pos)
+        except (OSError, ValueError):
+            logger.error("❌ [Journal] Fehlgeschlagener Record konnte nicht entfernt werden (Segment {}).", self._seq)
+
+    def sync(self) -> None:
+        """fsync the current segment (called periodically by bootstrap)."""
+        with self._jlock:
+            if self._fh is not None:
+                os.fsync(self._fh.fileno())
+
+    # ----------------- Mutations (journal first, then apply under the same lock) -----------------
+    def save_peer(self, peer: PeerInfo) -> None:
+        rec = self._codec.encode(peer)
+        with self._peer_locks.for_key(peer.peer_id):
+            self._log(_peer_rec(peer), lambda: self._replace(rec))
+
+    def _revoke_locked(self, peer_id: str, ts: datetime) -> Optional[PeerRecord]:
+        p = self._peers.get(peer_id)
+        if p is None or p.revoked_us is not None:
+            return p  # already revoked / unknown: nothing to journal
+        revoke = super()._revoke_locked
+        return self._log(["r", peer_id, to_us(ts)], lambda: revoke(peer_id, ts))
+
+    def _update_locked(self, peer_id: str, allowed_ips: Optional[List[str]], tags: Optional[Dict[str, str]]) -> Optional[PeerRecord]:
+        if peer_id not in self._peers:
+            return None
+        update = super()._update_locked
+        return self._log(["u", peer_id, allowed_ips, tags], lambda: update(peer_id, allowed_ips, tags))
+
+    def _put_invite_locked(self, invite: InviteInfo) -> None:
+        put = super()._put_invite_locked
+        self._log(["i", *_invite_rec(invite)], lambda: put(invite))
+
+    def save_peer_seen(self, seen: Dict[str, datetime]) -> None:
+        save = super().save_peer_seen
+        self._log(["h", {pid: to_us(ts) for pid, ts in seen.items()}], lambda: save(seen))
+
+    def forget_peer_seen(self, peer_ids: List[str]) -> None:
+        forget = super().forget_peer_seen
+        self._log(["f", list(peer_ids)], lambda: forget(peer_ids))
+
+    def sweep_invites(self, *, now: Optional[datetime] = None) -> int:
+        # evictions are recomputed from `now`: applied first so an idle sweep writes nothing;
+        # a lost "s" record only means the next sweep after a restart evicts them again
+        now = now or utcnow()
+        n = super().sweep_invites(now=now)
+        if n:
+            self._log(["s", to_us(now)])
+        return n
+
+    # ----------------- Snapshot -----------------
+    def snapshot(self) -> int:
+        """Compact: rotate the journal, write a snapshot of the state, drop covered segments."""
+        with self._snap_lock:
+            with self._jlock:
+                self._fh.close()
+                self._seq += 1
+                self._fh = open(self._segment_path(self._seq), "ab")
+                self.records_since_snapshot = 0
+                # everything applied so far is in memory; the peer view is O(1),
+                # the list()/dict() copies are atomic under the GIL
+                view = self.peer_view()
+                invites = list(self._invites.values())
+                seen = dict(self._peer_seen)
+            meta = {
+                "invites": [_invite_rec(i) for i in invites],
+                "seen": {pid: to_us(ts) for pid, ts in seen.items()},
+                "counters": {"evicted_expired": self._invites_evicted_expired, "evicted_used": self._invites_evicted_used},
+            }
+            n = write_snapshot(self._dir / _SNAPSHOT_NAME, view.records(), meta, self._seq)
+            for s in self._segments():
+                if s < self._seq:
+                    try:
+                        os.remove(self._segment_path(s))
+                    except OSError:
+                        pass
+            return n
+
+    def journal_stats(self) -> Dict[str, int]:
+        return {"segment": self._seq, "records_since_snapshot": self.records_since_snapshot}
+
+    def close(self) -> None:
+        with self._jlock:
+            if self._fh is not None:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+                self._fh.close()
+                self._fh = None
+        super().close()
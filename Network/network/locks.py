@@ -0,0 +1,38 @@
+# backend/network/locks.py
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Hashable, Iterable, Iterator, List
+
+
+class StripedLock:
+    """
+    Fixed set of locks selected by key hash.
+
+    Operations on different keys mostly take different locks, so the
+    threadpool-executed routes do not serialize on one global lock.
+    `hold_many` acquires stripes in index order (deadlock-free for batches).
+    """
+
+    def __init__(self, stripes: int = 64) -> None:
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(max(1, stripes))]
+
+    def _index(self, key: Hashable) -> int:
+        return hash(key) % len(self._locks)
+
+    def for_key(self, key: Hashable) -> threading.Lock:
+        return self._locks[self._index(key)]
+
+    @contextmanager
+    def hold_many(self, keys: Iterable[Hashable]) -> Iterator[None]:
+        idx = sorted({self._index(k) for k in keys})
+        taken: List[threading.Lock] = []
+        try:
+            for i in idx:
+                self._locks[i].acquire()
+                taken.append(self._locks[i])
+            yield
+        finally:
+            for lk in reversed(taken):
+                lk.release()
@@ -0,0 +1,158 @@
+# backend/network/logsink.py
+from __future__ import annotations
+
+import json
+import random
+import sys
+import threading
+import traceback
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, TextIO
+
+from .workers import IntervalWorker
+
+LOG_FORMATS = ("json", "text")
+TEXT_FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}"
+
+
+def _json_line(record: dict) -> str:
+    out = {
+        "ts": record["time"].isoformat(timespec="milliseconds"),
+        "level": record["level"].name,
+        "msg": record["message"],
+        "logger": record["name"],
+    }
+    for k, v in record["extra"].items():
+        out.setdefault(k, v)
+    exc = record["exception"]
+    if exc is not None:
+        out["exc"] = "".join(traceback.format_exception(exc.type, exc.value, exc.traceback))
+    return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class LogSink:
+    """
+    loguru sink with a bounded queue and a background writer.
+
+    The calling thread only appends the record (json) or the already formatted
+    line (text) to a deque; serialization and the stream write happen in the
+    writer thread, batched every `flush_interval` seconds. When the queue is full
+    new records are dropped and counted (logging must never stall a request).
+    With async_=False lines are written inline (tests, debugging).
+    """
+
+    def __init__(self, stream: TextIO = sys.stderr, *, fmt: str = "json", max_queue: int = 10000,
+                 flush_interval: float = 0.05, async_: bool = True) -> None:
+        if fmt not in LOG_FORMATS:
+            raise ValueError(f"unknown log format {fmt!r}")
+        self._stream = stream
+        self._json = fmt == "json"
+        self._max_queue = max(1, max_queue)
+        self._q: Deque[object] = deque()
+        self._async = async_
+        self._write_lock = threading.Lock()
+        self._worker = IntervalWorker("log-writer", flush_interval, self.flush)
+        self.dropped = 0
+        self.written = 0
+
+    @property
+    def loguru_format(self) -> str:
+        """Handler format to pass to logger.add (json renders itself from the record)."""
+        return "{message}" if self._json else TEXT_FORMAT
+
+    def __call__(self, message) -> None:
+        item = message.record if self._json else str(message)
+        if not self._async:
+            self._write([item])
+            return
+        if len(self._q) >= self._max_queue:
+            self.dropped += 1
+            return
+        self._q.append(item)
+
+    def flush(self) -> int:
+        q = self._q
+        batch = []
+        while q:
+            try:
+                batch.append(q.popleft())
+            except IndexError:
+                break
+        if batch:
+            self._write(batch)
+        return len(batch)
+
+    def _write(self, items) -> None:
+        if self._json:
+            text = "".join(_json_line(r) + "\n" for r in items)
+        else:
+            text = "".join(items)
+        with self._write_lock:
+            try:
+                self._stream.write(text)
+                self._stream.flush()
+            except Exception:
+                return  # stream gone (shutdown); nothing sensible left to do
+        self.written += len(items)
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": len(self._q), "max_queue": self._max_queue, "dropped": self.dropped, "written": self.written}
+
+    def start(self) -> None:
+        if self._async:
+            self._worker.start()
+
+    def stop(self) -> None:
+        if self._async:
+            self._worker.stop()  # final run drains the queue
+        else:
+            self.flush()
+
+
+class RequestLogPolicy:
+    """
+    Decides per request whether the access line is emitted.
+
+    - status >= `error_status` or duration >= `slow_ms`: always logged
+      (duration not for `held_routes`, which wait on purpose, e.g. long-polls)
+    - otherwise logged with the sample rate of the route template
+      (`rates`, e.g. {"/api/network/status": 0.01}), else `default_rate`
+    """
+
+    def __init__(self, *, rates: Optional[Dict[str, float]] = None, default_rate: float = 1.0,
+                 slow_ms: float = 500.0, error_status: int = 500, held_routes: Iterable[str] = ()) -> None:
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self.slow_ms = slow_ms
+        self.error_status = error_status
+        self.held_routes = frozenset(held_routes)
+
+    @classmethod
+    def parse_rates(cls, raw: str) -> Dict[str, float]:
+        """Parse "/api/network/status=0.01,/api/network/heartbeat=0"; raises ValueError."""
+        rates: Dict[str, float] = {}
+        for part in raw.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            route, _, rate = part.rpartition("=")
+            if not route:
+                raise ValueError(f"bad sample rule {part!r} (expected <route>=<rate>)")
+            rates[route.strip()] = min(1.0, max(0.0, float(rate)))
+        return rates
+
+    def rate_for(self, route: str) -> float:
+        return self.rates.get(route, self.default_rate)
+
+    def decide(self, route: str, status: int, ms: float) -> Optional[str]:
+        """None = skip, else the reason ("error" | "slow" | "sampled" | "all")."""
+        if status >= self.error_status:
+            return "error"
+        if ms >= self.slow_ms and route not in self.held_routes:
+            return "slow"
+        rate = self.rates.get(route, self.default_rate)
+        if rate >= 1.0:
+            return "all"
+        if rate > 0.0 and random.random() < rate:
+            return "sampled"
+        return None
@@ -0,0 +1,249 @@
+# backend/network/metrics.py
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# seconds; covers sub-ms dict lookups up to slow sqlite batches
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+_LE_INF = 'le="+Inf"'
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help_
+        self.labelnames = tuple(labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help_, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        out = self._header()
+        for lv, v in list(self._values.items()):
+            out.append(f"{self.name}{_fmt_labels(self.labelnames, lv)} {_fmt_num(v)}")
+        return out
+
+
+class Gauge(_Metric):
+    """Set/inc/dec gauge, or a callback gauge (`fn` returns {labels: value}) evaluated at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_: str, labelnames: Iterable[str] = (),
+                 fn: Optional[Callable[[], Dict[Labels, float]]] = None) -> None:
+        super().__init__(name, help_, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._fn = fn
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def render(self) -> List[str]:
+        values = self._fn() if self._fn is not None else self._values
+        out = self._header()
+        for lv, v in list(values.items()):
+            out.append(f"{self.name}{_fmt_labels(self.labelnames, lv)} {_fmt_num(v)}")
+        return out
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram. One series per label tuple: [bucket counts..., +Inf count], sum.
+    observe() is a bisect plus three in-place adds (no allocation after the first sample).
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help_, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        self._le = ['le="%s"' % _fmt_num(b) for b in self._buckets]
+        self._series: Dict[Labels, List[float]] = {}   # [per-bucket counts..., +Inf, sum]
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        s = self._series.get(labels)
+        if s is None:
+            s = self._series[labels] = [0] * (len(self._buckets) + 1) + [0.0]
+        s[bisect_left(self._buckets, value)] += 1
+        s[-1] += value
+
+    def render(self) -> List[str]:
+        out = self._header()
+        nb = len(self._buckets)
+        for lv, s in list(self._series.items()):
+            s = list(s)
+            acc = 0
+            for i, le in enumerate(self._le):
+                acc += s[i]
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, lv, le)} {acc}")
+            acc += s[nb]
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, lv, _LE_INF)} {acc}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, lv)} {_fmt_num(s[-1])}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, lv)} {acc}")
+        return out
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus text-format registry (no client library dependency).
+
+    Request metrics are recorded from the HTTP middleware, i.e. on the event-loop
+    thread only, so the hot path takes no locks; render() runs in the threadpool
+    and copies each series (list(), atomic under the GIL) before formatting it. Domain gauges are callbacks that
+    read subsystem stats at scrape time instead of being updated per operation.
+    With `--workers N` every worker process exposes its own registry.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help_, labelnames))
+
+    def gauge(self, name: str, help_: str, labelnames: Iterable[str] = (),
+              fn: Optional[Callable[[], Dict[Labels, float]]] = None) -> Gauge:
+        return self.register(Gauge(name, help_, labelnames, fn))
+
+    def histogram(self, name: str, help_: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+class HttpMetrics:
+    """Per-request metrics used by the middleware in main.py."""
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        self.latency = registry.histogram(
+            "network_http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"))
+        self.in_flight = registry.gauge("network_http_requests_in_flight", "HTTP requests currently being served")
+        self.exceptions = registry.counter(
+            "network_http_exceptions_total", "Unhandled exceptions by route template", ("method", "route"))
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        self.latency.observe(seconds, (method, route, str(status)))
+
+
+def route_template(scope: dict) -> str:
+    """Route path template ("/api/admin/network/peers/{peer_id}") - bounded label cardinality."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path else "<unmatched>"
+
+
+def threadpool_gauges(registry: MetricsRegistry) -> None:
+    """
+    Saturation of the anyio thread limiter that runs sync `def` routes. The limiter
+    belongs to the event loop; /metrics renders in a worker thread and looks it up
+    through the loop.
+    """
+    from anyio import from_thread, to_thread
+
+    def _read() -> Dict[Labels, float]:
+        try:
+            try:
+                lim = to_thread.current_default_thread_limiter()
+            except Exception:
+                lim = from_thread.run_sync(to_thread.current_default_thread_limiter)
+        except Exception:
+            return {}
+        return {("borrowed",): lim.borrowed_tokens, ("total",): lim.total_tokens, ("waiting",): lim.statistics().tasks_waiting}
+
+    registry.gauge("network_threadpool_tokens", "anyio threadpool limiter: borrowed / total / waiting tasks", ("state",), fn=_read)
+
+
+def domain_gauges(registry: MetricsRegistry, runtime: Callable[[], Any]) -> None:
+    """
+    Gauges over the runtime subsystems. `runtime()` returns the current bootstrap
+    runtime (or None before startup / after shutdown) and is resolved per scrape.
+    """
+
+    def gauge(name: str, help_: str, labelnames: Tuple[str, ...], read: Callable[[Any], Dict[Labels, float]]) -> None:
+        def fn() -> Dict[Labels, float]:
+            rt = runtime()
+            return read(rt) if rt is not None else {}
+        registry.gauge(name, help_, labelnames, fn=fn)
+
+    def pick(st: Optional[dict], keys: Iterable[str]) -> Dict[Labels, float]:
+        return {(k,): st[k] for k in keys} if st else {}
+
+    gauge("network_peers", "Peers by state", ("state",),
+          lambda rt: pick(rt.wg_manager.peer_counts(), ("active", "revoked")))
+    gauge("network_pool_addresses", "Overlay pool addresses", ("state",),
+          lambda rt: pick(rt.wg_manager.pool_stats(), ("size", "allocated", "quarantined", "available")))
+    gauge("network_pool_utilization_ratio", "Overlay pool utilization (allocated + quarantined) / size", (),
+          lambda rt: {(): rt.wg_manager.pool_stats()["utilization"]})
+    gauge("network_pools", "Overlay addresses per pool and address family", ("pool", "family", "state"),
+          lambda rt: {(st["pool"], str(st["family"]), k): st[k]
+                      for st in rt.wg_manager.pools_stats() for k in ("size", "allocated", "quarantined", "available")})
+    gauge("network_invites", "Invite store counters", ("state",),
+          lambda rt: {(k,): v for k, v in rt.wg_manager.invite_stats().items()})
+    gauge("network_audit_writer", "Async audit writer queue and counters", ("field",),
+          lambda rt: pick(rt.wg_manager.audit_stats(), ("queue_depth", "max_queue", "dropped", "written", "failed")))
+    gauge("network_heartbeat_peers", "Peers with a known last-seen timestamp", (),
+          lambda rt: {(): rt.wg_manager.heartbeat_count()})
+    gauge("network_wg_sync", "WireGuard server sync state", ("field",),
+          lambda rt: {(k,): v for k, v in (rt.wg_manager.sync_stats() or {}).items()})
+    gauge("network_change_feed", "Peer change feed: open long-poll / SSE watchers, wakeups", ("field",),
+          lambda rt: {(k,): v for k, v in rt.wg_manager.changes.stats().items()})
+    gauge("network_policy", "Tag policy: grants, cached tag combinations, hits / misses", ("field",),
+          lambda rt: {(k,): v for k, v in rt.wg_manager.policy.stats().items()})
+    gauge("network_config_render", "Rendered client config cache and precompiled sections", ("field",),
+          lambda rt: {(k,): v for k, v in rt.wg_manager.config_render_stats().items()})
+    gauge("network_response_cache", "Serialized response cache (peer listings / client configs)", ("field",),
+          lambda rt: {(k,): v for k, v in rt.response_cache.stats().items()})
+    gauge("network_admission", "Admission control per route class: in-flight / queued / shed counters", ("class", "field"),
+          lambda rt: {(c, k): v for c, st in rt.admission.stats().items() for k, v in st.items()} if rt.admission else {})
@@ -24,6 +24,7 @@ class EnrollmentRequest(BaseModel):
 class EnrollmentResponse(BaseModel):
     peer_id: str
     overlay_ip: str
+    overlay_ip6: Optional[str] = None
     client_config_text: str
     server_endpoint: str
     expires_at: Optional[datetime] = None
@@ -34,6 +35,7 @@ class PeerInfo(BaseModel):
     user_id: str
     device_id: str
     overlay_ip: str
+    overlay_ip6: Optional[str] = None  # dual-stack pools only
     allowed_ips: List[str] = Field(default_factory=list)
     public_key: str
     created_at: datetime
@@ -57,9 +59,15 @@ class NetworkStatus(BaseModel):
     connected: bool
     server_endpoint: str
     overlay_ip: Optional[str] = None
+    overlay_ip6: Optional[str] = None
     peer_seen_at: Optional[datetime] = None
 
 
+class HeartbeatRequest(BaseModel):
+    # optional: users with several devices name the one that is pinging
+    device_id: Optional[str] = Field(default=None, min_length=3, max_length=128)
+
+
 class AdminPeerCreate(BaseModel):
     user_id: str = Field(..., min_length=1, max_length=128)
     device_id: str = Field(..., min_length=3, max_length=128)
@@ -104,6 +112,10 @@ class InviteCreate(BaseModel):
     ttl_seconds: int = Field(default=900, ge=60, le=86400)
 
 
+class InviteBatchCreate(BaseModel):
+    items: List[InviteCreate] = Field(..., min_length=1, max_length=5000)
+
+
 class InviteInfo(BaseModel):
     invite_code: str
     user_id: str
@@ -113,9 +125,126 @@ class InviteInfo(BaseModel):
     used_at: Optional[datetime] = None
 
 
+class InviteBatchResult(BaseModel):
+    items: List[InviteInfo] = Field(default_factory=list)
+
+
+class InviteStats(BaseModel):
+    stored: int = 0
+    live: int = 0
+    used: int = 0
+    evicted_expired: int = 0
+    evicted_used: int = 0
+
+
+class PeerBatchRevoke(BaseModel):
+    peer_ids: List[str] = Field(..., min_length=1, max_length=5000)
+
+
+class PeerBatchPatchItem(AdminPeerPatch):
+    peer_id: str
+
+
+class PeerBatchPatch(BaseModel):
+    items: List[PeerBatchPatchItem] = Field(..., min_length=1, max_length=5000)
+
+
+class BatchItemResult(BaseModel):
+    peer_id: str
+    ok: bool
+    error: Optional[str] = None
+    peer: Optional[PeerInfo] = None
+
+
+class PeerBatchResult(BaseModel):
+    ok: int = 0
+    failed: int = 0
+    results: List[BatchItemResult] = Field(default_factory=list)
+
+
+class PeerChange(BaseModel):
+    revision: int
+    op: str                 # create | update | revoke (last change of this peer in the page)
+    peer: PeerInfo          # current state
+
+
+class PeerChangesPage(BaseModel):
+    epoch: str
+    revision: int           # cursor: pass as `since` next time
+    head: int               # latest revision of the store
+    resync: bool = False    # `since` not covered: reload the full peer list, then follow from `revision`
+    more: bool = False      # revision < head: fetch again right away
+    changes: List[PeerChange] = Field(default_factory=list)
+
+
+class ClientConfigExport(BaseModel):
+    peer_id: str
+    user_id: str
+    device_id: str
+    overlay_ip: str
+    overlay_ip6: Optional[str] = None
+    client_config_text: str
+
+
+class PoolStats(BaseModel):
+    pool: str = "default"
+    family: int = 4
+    cidr: str
+    size: int
+    allocated: int
+    quarantined: int
+    available: int
+    utilization: float
+
+
+class TrustedNetworksInfo(BaseModel):
+    cidrs: List[str]
+    trust_proxy: bool
+
+
+class PolicyGrant(BaseModel):
+    name: str
+    cidrs: List[str]
+    match: Dict[str, str] = Field(default_factory=dict)   # empty = every peer
+
+
+class PolicyInfo(BaseModel):
+    revision: int
+    base: List[str]
+    grants: List[PolicyGrant]
+    combinations: int          # cached tag combinations
+    hits: int
+    misses: int
+    invalidated: int
+
+
+class AuditWriterStats(BaseModel):
+    queue_depth: int
+    max_queue: int
+    overflow: str
+    dropped: int
+    written: int
+    batches: int
+    failed: int
+
+
+class WgSyncStats(BaseModel):
+    desired: int
+    applied: int
+    pending: int
+    ops_applied: int
+    syncs: int
+    errors: int
+
+
 class AuditEvent(BaseModel):
     ts: datetime
     actor_user_id: Optional[str] = None
     action: str
     subject: Optional[str] = None
     meta: Dict[str, Any] = Field(default_factory=dict)
+
+
+class AuditPage(BaseModel):
+    items: List[AuditEvent] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
@@ -0,0 +1,126 @@
+# backend/network/pmap.py
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+# max entries per node; nodes split in half when they overflow
+FANOUT = 64
+
+
+class _Leaf:
+    __slots__ = ("keys", "vals")
+
+    def __init__(self, keys: list, vals: list) -> None:
+        self.keys = keys
+        self.vals = vals
+
+
+class _Branch:
+    __slots__ = ("keys", "children")
+
+    def __init__(self, keys: list, children: list) -> None:
+        self.keys = keys           # keys[i] = smallest key below children[i]
+        self.children = children
+
+
+# Node lists are copied, never changed, once a node is reachable from a published map.
+
+def _split(node):
+    h = len(node.keys) // 2
+    if isinstance(node, _Leaf):
+        return _Leaf(node.keys[:h], node.vals[:h]), _Leaf(node.keys[h:], node.vals[h:])
+    return _Branch(node.keys[:h], node.children[:h]), _Branch(node.keys[h:], node.children[h:])
+
+
+def _set(node, key, val) -> Tuple[Any, Optional[Any], bool]:
+    """Copy of `node` with key set (+ its right half after a split) and whether the key is new."""
+    if isinstance(node, _Leaf):
+        keys, vals = node.keys, node.vals[:]
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            vals[i] = val
+            return _Leaf(keys, vals), None, False
+        keys = keys[:]
+        keys.insert(i, key)
+        vals.insert(i, val)
+        new = _Leaf(keys, vals)
+        added = True
+    else:
+        keys, children = node.keys, node.children[:]
+        i = bisect_right(keys, key) - 1
+        if i < 0:
+            i = 0
+        left, right, added = _set(children[i], key, val)
+        children[i] = left
+        if keys[i] != left.keys[0] or right is not None:
+            keys = keys[:]
+            keys[i] = left.keys[0]
+            if right is not None:
+                keys.insert(i + 1, right.keys[0])
+                children.insert(i + 1, right)
+        new = _Branch(keys, children)
+    if len(new.keys) > FANOUT:
+        return (*_split(new), added)
+    return new, None, added
+
+
+def _iter(node, after) -> Iterator[Tuple[Any, Any]]:
+    if isinstance(node, _Leaf):
+        i = bisect_right(node.keys, after) if after is not None else 0
+        return zip(node.keys[i:], node.vals[i:])
+    i = max(0, bisect_right(node.keys, after) - 1) if after is not None else 0
+    return (kv for child in node.children[i:] for kv in _iter(child, after))
+
+
+class PersistentMap:
+    """
+    Immutable sorted map (B+tree with path copying). `set` returns a new map that
+    shares every untouched node with the old one, O(log n) time and memory per
+    write; holding on to a map is an O(1), never-changing point-in-time view.
+    No deletes: the store never removes peers.
+    """
+
+    __slots__ = ("_root", "_len")
+
+    def __init__(self, root: Optional[Any] = None, size: int = 0) -> None:
+        self._root = root if root is not None else _Leaf([], [])
+        self._len = size
+
+    @classmethod
+    def from_sorted(cls, items: Iterable[Tuple[Any, Any]]) -> PersistentMap:
+        """Bulk build from items in strictly ascending key order (O(n), nodes 3/4 full)."""
+        fill = FANOUT * 3 // 4
+        items = list(items)
+        level: List[Any] = [
+            _Leaf([k for k, _ in chunk], [v for _, v in chunk])
+            for chunk in (items[i:i + fill] for i in range(0, len(items), fill))
+        ]
+        while len(level) > 1:
+            level = [
+                _Branch([n.keys[0] for n in chunk], chunk)
+                for chunk in (level[i:i + fill] for i in range(0, len(level), fill))
+            ]
+        return cls(level[0] if level else None, len(items))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def get(self, key, default=None):
+        node = self._root
+        while isinstance(node, _Branch):
+            node = node.children[max(0, bisect_right(node.keys, key) - 1)]
+        i = bisect_left(node.keys, key)
+        return node.vals[i] if i < len(node.keys) and node.keys[i] == key else default
+
+    def set(self, key, val) -> PersistentMap:
+        left, right, added = _set(self._root, key, val)
+        root = left if right is None else _Branch([left.keys[0], right.keys[0]], [left, right])
+        return PersistentMap(root, self._len + added)
+
+    def items(self, after=None) -> Iterator[Tuple[Any, Any]]:
+        """(key, value) in key order, starting after `after`; lazy."""
+        return _iter(self._root, after)
+
+    def values(self, after=None) -> Iterator[Any]:
+        return (v for _, v in self.items(after))
@@ -0,0 +1,139 @@
+# backend/network/policy.py
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from ipaddress import collapse_addresses, ip_network
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# cache key: the peer's values of the tag keys any grant selects on (None = tag absent)
+Combo = Tuple[Optional[str], ...]
+
+
+@dataclass(frozen=True)
+class Grant:
+    name: str
+    cidrs: Tuple[str, ...]                     # networks a matching peer routes into the tunnel
+    match: Tuple[Tuple[str, str], ...] = ()    # peer tags that select this grant; () = every peer
+
+    def matches(self, tags: Mapping[str, Optional[str]]) -> bool:
+        return all(tags.get(k) == v for k, v in self.match)
+
+
+def parse_grants(raw: str) -> List[Grant]:
+    """
+    Parse WG_POLICIES: `name=cidr[,cidr...][@key=value[&key=value...]]`, entries separated by ';'.
+
+        office=10.10.0.0/16,fd10::/48@team=ops;ci=10.20.5.0/24@role=runner&platform=linux
+
+    Raises ValueError on malformed entries or duplicate names.
+    """
+    out: List[Grant] = []
+    names = set()
+    for entry in raw.replace("\n", ";").split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, rest = entry.partition("=")
+        name = name.strip()
+        if not sep or not name:
+            raise ValueError(f"policy entry {entry!r}: expected name=cidr[,cidr...][@key=value]")
+        if name in names:
+            raise ValueError(f"policy {name!r} defined twice")
+        names.add(name)
+        nets, _, sel = rest.partition("@")
+        cidrs = tuple(str(ip_network(c.strip(), strict=False)) for c in nets.split(",") if c.strip())
+        if not cidrs:
+            raise ValueError(f"policy {name!r}: at least one network is required")
+        match = []
+        for cond in (c.strip() for c in sel.split("&") if c.strip()):
+            k, sep, v = cond.partition("=")
+            if not sep or not k.strip():
+                raise ValueError(f"policy {name!r}: selector {cond!r} is not key=value")
+            match.append((k.strip(), v.strip()))
+        out.append(Grant(name=name, cidrs=cidrs, match=tuple(match)))
+    return out
+
+
+def aggregate(cidrs: Iterable[str]) -> Tuple[str, ...]:
+    """Minimal equivalent CIDR set (duplicates, contained and adjacent networks merged), IPv4 first."""
+    v4, v6 = [], []
+    for c in cidrs:
+        net = ip_network(c, strict=False)
+        (v4 if net.version == 4 else v6).append(net)
+    return tuple(str(n) for nets in (v4, v6) for n in collapse_addresses(nets))
+
+
+class PolicyEngine:
+    """
+    Client AllowedIPs from peer tags: `base` (what every peer routes, the overlay
+    networks by default) plus the networks of every grant whose selector matches,
+    aggregated into a minimal CIDR set.
+
+    Results are cached per combination of the tag values the grants select on;
+    tags no selector mentions do not split the cache, so a fleet of N peers costs
+    one compile per distinct combination. `load()` drops only the combinations a
+    changed grant matches (before or after the change). Readers take no lock:
+    grants, selector keys and cache are swapped as one tuple.
+    """
+
+    def __init__(self, grants: Iterable[Grant] = (), *, base: Sequence[str] = ()) -> None:
+        self.base = aggregate(base)
+        self._lock = threading.Lock()
+        self._state: Tuple[Tuple[Grant, ...], Tuple[str, ...], Dict[Combo, Tuple[str, ...]]] = ((), (), {})
+        self.revision = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.load(grants)
+
+    @property
+    def grants(self) -> Tuple[Grant, ...]:
+        return self._state[0]
+
+    @staticmethod
+    def _keys(grants: Sequence[Grant]) -> Tuple[str, ...]:
+        return tuple(sorted({k for g in grants for k, _ in g.match}))
+
+    def load(self, grants: Iterable[Grant]) -> int:
+        """Replace the grant set; returns how many cached combinations were dropped."""
+        grants = tuple(grants)
+        with self._lock:
+            old_grants, old_keys, cache = self._state
+            if grants == old_grants and self.revision:
+                return 0
+            keys = self._keys(grants)
+            if keys != old_keys:
+                # the cache key layout changed: nothing carries over
+                dropped, kept = len(cache), {}
+            else:
+                changed = set(old_grants).symmetric_difference(grants)
+                kept = {c: v for c, v in cache.items()
+                        if not any(g.matches(dict(zip(keys, c))) for g in changed)}
+                dropped = len(cache) - len(kept)
+            self._state = (grants, keys, kept)
+            self.revision += 1
+            self.invalidated += dropped
+        return dropped
+
+    def allowed_ips(self, tags: Mapping[str, str]) -> Tuple[str, ...]:
+        grants, keys, cache = self._state
+        combo = tuple(tags.get(k) for k in keys)
+        got = cache.get(combo)
+        if got is not None:
+            self.hits += 1
+            return got
+        self.misses += 1
+        return cache.setdefault(combo, aggregate(
+            [*self.base, *(c for g in grants if g.matches(tags) for c in g.cidrs)]
+        ))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "revision": self.revision,
+            "grants": len(self._state[0]),
+            "combinations": len(self._state[2]),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+        }
@@ -0,0 +1,79 @@
+# backend/network/response_cache.py
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# (body, extra headers) as produced by a route's builder
+Built = Tuple[bytes, Dict[str, str]]
+
+
+def make_etag(epoch: str, generation: int, key: str) -> str:
+    """
+    Strong ETag for one representation: store instance + peer generation + request key.
+    Computable without touching the data, so a matching If-None-Match costs no build.
+    """
+    h = hashlib.blake2b(key.encode("utf-8"), digest_size=6).hexdigest()
+    return f'"{epoch}-{generation}-{h}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # a list of (possibly weak) tags; If-None-Match uses the weak comparison
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    LRU of serialized response bodies keyed by request key, valid for one store
+    generation. A generation bump invalidates everything implicitly: entries of an
+    older generation are rebuilt (and replaced) on their next hit.
+    `max_entries=0` disables storing (ETag/304 still work).
+    """
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self._max = max(0, max_entries)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[str, bytes, Dict[str, str]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get_or_build(self, key: str, etag: str, build: Callable[[], Built]) -> Built:
+        if self._max:
+            with self._lock:
+                e = self._entries.get(key)
+                if e is not None and e[0] == etag:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return e[1], e[2]
+        # build outside the lock: concurrent misses of one key may build twice (harmless)
+        body, headers = build()
+        self.misses += 1
+        if self._max:
+            with self._lock:
+                self._entries[key] = (etag, body, headers)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max:
+                    self._entries.popitem(last=False)
+        return body, headers
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
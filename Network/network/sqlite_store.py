@@ -0,0 +1,640 @@
+# backend/network/sqlite_store.py
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from ipaddress import IPv6Address
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .models import AuditEvent, AuditPage, InviteInfo, PeerInfo
+from .store import NetworkStore, PeerChangeLog, PeerConflict, PeerFilter, change_op, needs_resync, utcnow
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS peers (
+    peer_id     TEXT PRIMARY KEY,
+    user_id     TEXT NOT NULL,
+    device_id   TEXT NOT NULL,
+    overlay_ip  TEXT NOT NULL,
+    allowed_ips TEXT NOT NULL,
+    public_key  TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    revoked_at  TEXT,
+    tags        TEXT NOT NULL,
+    overlay_ip6 TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_peers_user_device ON peers(user_id, device_id);
+CREATE INDEX IF NOT EXISTS ix_peers_user_active ON peers(user_id) WHERE revoked_at IS NULL;
+CREATE INDEX IF NOT EXISTS ix_peers_public_key ON peers(public_key);
+CREATE INDEX IF NOT EXISTS ix_peers_overlay_ip ON peers(overlay_ip);
+-- cross-process guards: allocators/locks are per worker, the database has the last word
+CREATE UNIQUE INDEX IF NOT EXISTS ux_peers_active_overlay_ip ON peers(overlay_ip) WHERE revoked_at IS NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_peers_active_user_device ON peers(user_id, device_id) WHERE revoked_at IS NULL;
+
+-- gen = gen.peer_seen of the flush that wrote the row (peer_seen_since)
+CREATE TABLE IF NOT EXISTS peer_seen (
+    peer_id TEXT PRIMARY KEY,
+    seen_at TEXT NOT NULL,
+    gen     INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS invites (
+    invite_code TEXT PRIMARY KEY,
+    user_id     TEXT NOT NULL,
+    device_id   TEXT,
+    created_at  TEXT NOT NULL,
+    expires_at  TEXT NOT NULL,
+    used_at     TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_invites_expires ON invites(expires_at) WHERE used_at IS NULL;
+CREATE INDEX IF NOT EXISTS ix_invites_used ON invites(used_at) WHERE used_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS audit (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts            TEXT NOT NULL,
+    actor_user_id TEXT,
+    action        TEXT NOT NULL,
+    subject       TEXT,
+    meta          TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_audit_action ON audit(action, id);
+CREATE INDEX IF NOT EXISTS ix_audit_subject ON audit(subject, id);
+CREATE INDEX IF NOT EXISTS ix_audit_actor ON audit(actor_user_id, id);
+CREATE INDEX IF NOT EXISTS ix_audit_ts ON audit(ts);
+
+-- peer change log (bounded, pruned by revision); rev is never reused
+CREATE TABLE IF NOT EXISTS peer_changes (
+    rev     INTEGER PRIMARY KEY AUTOINCREMENT,
+    peer_id TEXT NOT NULL,
+    op      TEXT NOT NULL
+);
+
+-- change generations per topic, bumped inside the writing transaction
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('gen.peers', 0), ('gen.peer_seen', 0);
+-- identifies this database (ETags of a recreated db never collide with old ones)
+INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', abs(random() % 4294967296));
+"""
+
+# after _migrate(): older databases get these columns added first
+_SCHEMA_MIGRATED = """
+CREATE INDEX IF NOT EXISTS ix_peer_seen_gen ON peer_seen(gen);
+CREATE INDEX IF NOT EXISTS ix_peers_overlay_ip6 ON peers(overlay_ip6) WHERE overlay_ip6 IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_peers_active_overlay_ip6 ON peers(overlay_ip6) WHERE revoked_at IS NULL AND overlay_ip6 IS NOT NULL;
+"""
+
+# row counters for metrics, kept by triggers inside every writing transaction (any process);
+# seeded with one COUNT on databases created before them, atomically with the trigger setup
+_SCHEMA_COUNTS = """
+BEGIN IMMEDIATE;
+INSERT OR IGNORE INTO meta (key, value) SELECT 'count.peers', COUNT(*) FROM peers;
+INSERT OR IGNORE INTO meta (key, value) SELECT 'count.peers_revoked', COUNT(revoked_at) FROM peers;
+INSERT OR IGNORE INTO meta (key, value) SELECT 'count.invites', COUNT(*) FROM invites;
+INSERT OR IGNORE INTO meta (key, value) SELECT 'count.invites_used', COUNT(used_at) FROM invites;
+CREATE TRIGGER IF NOT EXISTS tr_peers_count_ins AFTER INSERT ON peers BEGIN
+    UPDATE meta SET value = value + 1 WHERE key = 'count.peers';
+    UPDATE meta SET value = value + 1 WHERE key = 'count.peers_revoked' AND NEW.revoked_at IS NOT NULL;
+END;
+CREATE TRIGGER IF NOT EXISTS tr_peers_count_upd AFTER UPDATE OF revoked_at ON peers
+WHEN (OLD.revoked_at IS NULL) != (NEW.revoked_at IS NULL) BEGIN
+    UPDATE meta SET value = value + (CASE WHEN NEW.revoked_at IS NULL THEN -1 ELSE 1 END) WHERE key = 'count.peers_revoked';
+END;
+CREATE TRIGGER IF NOT EXISTS tr_invites_count_ins AFTER INSERT ON invites BEGIN
+    UPDATE meta SET value = value + 1 WHERE key = 'count.invites';
+    UPDATE meta SET value = value + 1 WHERE key = 'count.invites_used' AND NEW.used_at IS NOT NULL;
+END;
+CREATE TRIGGER IF NOT EXISTS tr_invites_count_upd AFTER UPDATE OF used_at ON invites
+WHEN (OLD.used_at IS NULL) != (NEW.used_at IS NULL) BEGIN
+    UPDATE meta SET value = value + (CASE WHEN NEW.used_at IS NULL THEN -1 ELSE 1 END) WHERE key = 'count.invites_used';
+END;
+CREATE TRIGGER IF NOT EXISTS tr_invites_count_del AFTER DELETE ON invites BEGIN
+    UPDATE meta SET value = value - 1 WHERE key = 'count.invites';
+    UPDATE meta SET value = value - 1 WHERE key = 'count.invites_used' AND OLD.used_at IS NOT NULL;
+END;
+COMMIT;
+"""
+
+_PEER_COLS = "peer_id, user_id, device_id, overlay_ip, allowed_ips, public_key, created_at, revoked_at, tags, overlay_ip6"
+
+_SQL_UPSERT_PEER = (
+    f"INSERT INTO peers ({_PEER_COLS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(peer_id) DO UPDATE SET "
+    "user_id=excluded.user_id, device_id=excluded.device_id, overlay_ip=excluded.overlay_ip, "
+    "allowed_ips=excluded.allowed_ips, public_key=excluded.public_key, created_at=excluded.created_at, "
+    "revoked_at=excluded.revoked_at, tags=excluded.tags, overlay_ip6=excluded.overlay_ip6"
+)
+_SQL_GET_PEER = f"SELECT {_PEER_COLS} FROM peers WHERE peer_id = ?"
+_SQL_LIST_PEERS = f"SELECT {_PEER_COLS} FROM peers ORDER BY rowid"
+_SQL_REVOKE_PEER = "UPDATE peers SET revoked_at = ? WHERE peer_id = ? AND revoked_at IS NULL"
+_SQL_PEER_BY_USER_DEVICE = f"SELECT {_PEER_COLS} FROM peers WHERE user_id = ? AND device_id = ? ORDER BY rowid DESC LIMIT 1"
+_SQL_ACTIVE_BY_USER = f"SELECT {_PEER_COLS} FROM peers WHERE user_id = ? AND revoked_at IS NULL ORDER BY rowid"
+_SQL_PEER_BY_PUBLIC_KEY = f"SELECT {_PEER_COLS} FROM peers WHERE public_key = ? ORDER BY rowid DESC LIMIT 1"
+_SQL_PEER_BY_OVERLAY_IP = f"SELECT {_PEER_COLS} FROM peers WHERE overlay_ip = ? ORDER BY rowid DESC LIMIT 1"
+_SQL_PEER_BY_OVERLAY_IP6 = f"SELECT {_PEER_COLS} FROM peers WHERE overlay_ip6 = ? ORDER BY rowid DESC LIMIT 1"
+
+_SQL_PEER_STATE = "SELECT revoked_at IS NOT NULL FROM peers WHERE peer_id = ?"
+_SQL_LOG_CHANGE = "INSERT INTO peer_changes (peer_id, op) VALUES (?, ?)"
+_SQL_PRUNE_CHANGES = "DELETE FROM peer_changes WHERE rev <= ?"
+# head from sqlite_sequence: stays right even if pruning emptied the table (change_log=0)
+_SQL_CHANGE_BOUNDS = (
+    "SELECT (SELECT min(rev) FROM peer_changes), "
+    "(SELECT seq FROM sqlite_sequence WHERE name = 'peer_changes')"
+)
+_SQL_PEER_CHANGES = (
+    "SELECT c.rev, c.op, " + ", ".join("p." + col for col in _PEER_COLS.split(", ")) + " "
+    "FROM peer_changes c JOIN peers p ON p.peer_id = c.peer_id WHERE c.rev > ? ORDER BY c.rev LIMIT ?"
+)
+
+# upsert, not INSERT OR REPLACE: the implicit delete of REPLACE does not fire the count triggers
+_SQL_UPSERT_INVITE = (
+    "INSERT INTO invites (invite_code, user_id, device_id, created_at, expires_at, used_at) "
+    "VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(invite_code) DO UPDATE SET "
+    "user_id=excluded.user_id, device_id=excluded.device_id, created_at=excluded.created_at, "
+    "expires_at=excluded.expires_at, used_at=excluded.used_at"
+)
+_SQL_GET_INVITE = "SELECT invite_code, user_id, device_id, created_at, expires_at, used_at FROM invites WHERE invite_code = ?"
+# compare-and-set: only one caller can flip used_at
+_SQL_CONSUME_INVITE = "UPDATE invites SET used_at = ? WHERE invite_code = ? AND used_at IS NULL AND expires_at > ?"
+
+_SQL_BUMP_GEN = "UPDATE meta SET value = value + 1 WHERE key = ? RETURNING value"
+_SQL_GENS = "SELECT key, value FROM meta WHERE key LIKE 'gen.%'"
+_SQL_GEN = "SELECT value FROM meta WHERE key = ?"
+_SQL_COUNTS = "SELECT key, value FROM meta WHERE key LIKE 'count.%'"
+
+_SQL_INSERT_AUDIT = "INSERT INTO audit (ts, actor_user_id, action, subject, meta) VALUES (?, ?, ?, ?, ?)"
+_SQL_LIST_AUDIT = "SELECT ts, actor_user_id, action, subject, meta FROM audit ORDER BY id DESC LIMIT ?"
+
+
+def _ts(dt: Optional[datetime]) -> Optional[str]:
+    # fixed width -> text order == time order (indexes / range queries)
+    return dt.isoformat(timespec="microseconds") if dt else None
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _dt(s: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(s) if s else None
+
+
+def _conflict(e: sqlite3.IntegrityError) -> PeerConflict:
+    msg = str(e)
+    field = "overlay_ip6" if "overlay_ip6" in msg else "overlay_ip" if "overlay_ip" in msg else "device"
+    return PeerConflict(field, msg)
+
+
+def _peer_row(p: PeerInfo) -> Tuple:
+    return (
+        p.peer_id, p.user_id, p.device_id, p.overlay_ip,
+        json.dumps(p.allowed_ips), p.public_key,
+        _ts(p.created_at), _ts(p.revoked_at), json.dumps(p.tags), p.overlay_ip6,
+    )
+
+
+def _peer_from_row(r: Tuple) -> PeerInfo:
+    # rows were validated on the way in; skip re-validation
+    return PeerInfo.model_construct(
+        peer_id=r[0], user_id=r[1], device_id=r[2], overlay_ip=r[3],
+        allowed_ips=json.loads(r[4]), public_key=r[5],
+        created_at=_dt(r[6]), revoked_at=_dt(r[7]), tags=json.loads(r[8]), overlay_ip6=r[9],
+    )
+
+
+def _invite_row(i: InviteInfo) -> Tuple:
+    return (i.invite_code, i.user_id, i.device_id, _ts(i.created_at), _ts(i.expires_at), _ts(i.used_at))
+
+
+def _invite_from_row(r: Tuple) -> InviteInfo:
+    return InviteInfo.model_construct(
+        invite_code=r[0], user_id=r[1], device_id=r[2],
+        created_at=_dt(r[3]), expires_at=_dt(r[4]), used_at=_dt(r[5]),
+    )
+
+
+def _audit_row(e: AuditEvent) -> Tuple:
+    return (_ts(e.ts), e.actor_user_id, e.action, e.subject, json.dumps(e.meta, default=str))
+
+
+def _audit_from_row(r: Tuple) -> AuditEvent:
+    return AuditEvent.model_construct(ts=_dt(r[0]), actor_user_id=r[1], action=r[2], subject=r[3], meta=json.loads(r[4]))
+
+
+class SqliteNetworkStore(NetworkStore):
+    """
+    Durable NetworkStore on SQLite (WAL).
+
+    - one connection shared by the threadpool, serialized by a lock
+    - statements are constant strings -> reused from sqlite3's statement cache
+    - audit inserts are buffered and group-committed: they ride along with the
+      next write transaction, or flush once `audit_batch` / `audit_flush_seconds` is hit
+    - safe to share between worker processes: writes use BEGIN IMMEDIATE, unique
+      partial indexes reject duplicate active overlay IPs / devices (PeerConflict),
+      and peer writes bump a generation in `meta` that `poll_changes()` compares
+      (after a cheap PRAGMA data_version check) to report foreign writes
+    - peer / invite counts (metrics) are meta rows that triggers keep current,
+      a scrape reads four rows instead of counting the tables
+    """
+
+    shared = True
+
+    def __init__(self, path: str, *, audit_batch: int = 64, audit_flush_seconds: float = 1.0, invite_grace_seconds: int = 86400,
+                 change_log: int = 10000) -> None:
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._conn.executescript(_SCHEMA_MIGRATED)
+        self._conn.executescript(_SCHEMA_COUNTS)
+
+        self._audit_batch = max(1, audit_batch)
+        self._audit_flush_seconds = audit_flush_seconds
+        self._audit_buf: List[Tuple] = []
+        self._audit_oldest = 0.0
+
+        self._invite_grace = timedelta(seconds=max(0, invite_grace_seconds))
+        self._change_log = max(0, change_log)
+        self._invites_evicted_expired = 0
+        self._invites_evicted_used = 0
+
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._gens: Dict[str, int] = {k[4:]: v for k, v in self._conn.execute(_SQL_GENS).fetchall()}
+        self.epoch = "%08x" % self._conn.execute(_SQL_GEN, ("epoch",)).fetchone()[0]
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    # ----------------- Internals -----------------
+    def _migrate(self) -> None:
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(peers)")}
+        if "overlay_ip6" not in cols:
+            self._conn.execute("ALTER TABLE peers ADD COLUMN overlay_ip6 TEXT")
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(peer_seen)")}
+        if "gen" not in cols:
+            self._conn.execute("ALTER TABLE peer_seen ADD COLUMN gen INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._flush_audit_locked()
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _flush_audit_locked(self) -> None:
+        if self._audit_buf:
+            self._conn.executemany(_SQL_INSERT_AUDIT, self._audit_buf)
+            self._audit_buf.clear()
+
+    def _bump(self, c: sqlite3.Connection, topic: str) -> int:
+        """Inside a write tx: advance the topic generation; our own writes are not reported back to us."""
+        v = c.execute(_SQL_BUMP_GEN, (f"gen.{topic}",)).fetchone()[0]
+        if v == self._gens.get(topic, 0) + 1:
+            self._gens[topic] = v  # else another process wrote in between -> poll_changes() reports it
+        return v
+
+    def _log_change(self, c: sqlite3.Connection, peer_id: str, op: str) -> None:
+        """Inside a write tx: append to the change log; pruned in steps of 64 to stay cheap."""
+        rev = c.execute(_SQL_LOG_CHANGE, (peer_id, op)).lastrowid
+        if rev % 64 == 0:
+            c.execute(_SQL_PRUNE_CHANGES, (rev - self._change_log,))
+
+    def _one(self, sql: str, args: Tuple) -> Optional[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchone()
+
+    # ----------------- Peers -----------------
+    def save_peer(self, peer: PeerInfo) -> None:
+        try:
+            with self._tx() as c:
+                old = c.execute(_SQL_PEER_STATE, (peer.peer_id,)).fetchone()
+                c.execute(_SQL_UPSERT_PEER, _peer_row(peer))
+                self._log_change(c, peer.peer_id, change_op(None if old is None else bool(old[0]), peer.revoked_at is not None))
+                self._bump(c, "peers")
+        except sqlite3.IntegrityError as e:
+            raise _conflict(e) from e
+
+    def peer_generation(self) -> int:
+        # read from the db, not self._gens: includes other workers' unpolled writes
+        return self._one(_SQL_GEN, ("gen.peers",))[0]
+
+    def peer_changes(self, since: Optional[int], *, limit: int = 500) -> PeerChangeLog:
+        with self._lock:
+            # one read transaction: bounds and rows from the same snapshot
+            self._conn.execute("BEGIN")
+            try:
+                lo, hi = self._conn.execute(_SQL_CHANGE_BOUNDS).fetchone()
+                head = hi or 0
+                if needs_resync(since, head, lo if lo is not None else head + 1):
+                    return PeerChangeLog(revision=head, resync=True)
+                rows = self._conn.execute(_SQL_PEER_CHANGES, (since, limit)).fetchall() if since < head else []
+            finally:
+                self._conn.execute("COMMIT")
+        return PeerChangeLog(revision=head, changes=[(r[0], r[1], _peer_from_row(r[2:])) for r in rows])
+
+    def get_peer(self, peer_id: str) -> Optional[PeerInfo]:
+        r = self._one(_SQL_GET_PEER, (peer_id,))
+        return _peer_from_row(r) if r else None
+
+    def list_peers(self) -> List[PeerInfo]:
+        with self._lock:
+            rows = self._conn.execute(_SQL_LIST_PEERS).fetchall()
+        return [_peer_from_row(r) for r in rows]
+
+    def iter_peers(self, *, after: Optional[str] = None, flt: Optional[PeerFilter] = None, chunk: int = 500) -> Iterator[PeerInfo]:
+        where, args = ["peer_id > ?"], []
+        if flt is not None:
+            for col, val in (("user_id", flt.user_id), ("device_id", flt.device_id)):
+                if val is not None:
+                    where.append(f"{col} = ?")
+                    args.append(val)
+            if flt.revoked is not None:
+                where.append("revoked_at IS NOT NULL" if flt.revoked else "revoked_at IS NULL")
+            if flt.tag_key is not None:
+                path = "$." + json.dumps(flt.tag_key)
+                if flt.tag_value is not None:
+                    where.append("json_extract(tags, ?) = ?")
+                    args += [path, flt.tag_value]
+                else:
+                    where.append("json_type(tags, ?) IS NOT NULL")
+                    args.append(path)
+            if flt.created_after is not None:
+                where.append("created_at >= ?")
+                args.append(_ts(_utc(flt.created_after)))
+            if flt.created_before is not None:
+                where.append("created_at < ?")
+                args.append(_ts(_utc(flt.created_before)))
+        sql = f"SELECT {_PEER_COLS} FROM peers WHERE {' AND '.join(where)} ORDER BY peer_id LIMIT ?"
+
+        last = after or ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, (last, *args, chunk)).fetchall()
+            for r in rows:
+                yield _peer_from_row(r)
+            if len(rows) < chunk:
+                return
+            last = rows[-1][0]
+
+    def revoke_peer(self, peer_id: str, *, ts: Optional[datetime] = None) -> Optional[PeerInfo]:
+        with self._tx() as c:
+            if c.execute(_SQL_REVOKE_PEER, (_ts(ts or utcnow()), peer_id)).rowcount:
+                self._log_change(c, peer_id, "revoke")
+                self._bump(c, "peers")
+            r = c.execute(_SQL_GET_PEER, (peer_id,)).fetchone()
+        return _peer_from_row(r) if r else None
+
+    def update_peer(self, peer_id: str, *, allowed_ips: Optional[List[str]] = None, tags: Optional[Dict[str, str]] = None) -> Optional[PeerInfo]:
+        sets, args = [], []
+        if allowed_ips is not None:
+            sets.append("allowed_ips = ?")
+            args.append(json.dumps(allowed_ips))
+        if tags is not None:
+            sets.append("tags = ?")
+            args.append(json.dumps(tags))
+        with self._tx() as c:
+            if sets:
+                if c.execute(f"UPDATE peers SET {', '.join(sets)} WHERE peer_id = ?", (*args, peer_id)).rowcount:
+                    self._log_change(c, peer_id, "update")
+                    self._bump(c, "peers")
+            r = c.execute(_SQL_GET_PEER, (peer_id,)).fetchone()
+        return _peer_from_row(r) if r else None
+
+    def revoke_peers(self, peer_ids: List[str], *, ts: Optional[datetime] = None) -> Dict[str, Optional[PeerInfo]]:
+        ts_s = _ts(ts or utcnow())
+        out: Dict[str, Optional[PeerInfo]] = {}
+        with self._tx() as c:
+            changed = 0
+            for pid in peer_ids:
+                if c.execute(_SQL_REVOKE_PEER, (ts_s, pid)).rowcount:
+                    self._log_change(c, pid, "revoke")
+                    changed += 1
+            if changed:
+                self._bump(c, "peers")
+            for pid in peer_ids:
+                r = c.execute(_SQL_GET_PEER, (pid,)).fetchone()
+                out[pid] = _peer_from_row(r) if r else None
+        return out
+
+    def update_peers(self, updates: List[Tuple[str, Optional[List[str]], Optional[Dict[str, str]]]]) -> Dict[str, Optional[PeerInfo]]:
+        out: Dict[str, Optional[PeerInfo]] = {}
+        with self._tx() as c:
+            changed = 0
+            for pid, allowed_ips, tags in updates:
+                n = 0
+                if allowed_ips is not None:
+                    n += c.execute("UPDATE peers SET allowed_ips = ? WHERE peer_id = ?", (json.dumps(allowed_ips), pid)).rowcount
+                if tags is not None:
+                    n += c.execute("UPDATE peers SET tags = ? WHERE peer_id = ?", (json.dumps(tags), pid)).rowcount
+                if n:
+                    self._log_change(c, pid, "update")
+                    changed += 1
+                r = c.execute(_SQL_GET_PEER, (pid,)).fetchone()
+                out[pid] = _peer_from_row(r) if r else None
+            # failed / no-op items must not move the generation (ETags, store watchers)
+            if changed:
+                self._bump(c, "peers")
+        return out
+
+    def find_peer_by_user_device(self, user_id: str, device_id: str) -> Optional[PeerInfo]:
+        r = self._one(_SQL_PEER_BY_USER_DEVICE, (user_id, device_id))
+        return _peer_from_row(r) if r else None
+
+    def find_active_peer_by_user(self, user_id: str) -> Optional[PeerInfo]:
+        r = self._one(_SQL_ACTIVE_BY_USER + " LIMIT 1", (user_id,))
+        return _peer_from_row(r) if r else None
+
+    def list_active_peers_by_user(self, user_id: str) -> List[PeerInfo]:
+        with self._lock:
+            rows = self._conn.execute(_SQL_ACTIVE_BY_USER, (user_id,)).fetchall()
+        return [_peer_from_row(r) for r in rows]
+
+    def find_peer_by_public_key(self, public_key: str) -> Optional[PeerInfo]:
+        r = self._one(_SQL_PEER_BY_PUBLIC_KEY, (public_key,))
+        return _peer_from_row(r) if r else None
+
+    def find_peer_by_overlay_ip(self, overlay_ip: str) -> Optional[PeerInfo]:
+        if ":" in overlay_ip:
+            try:
+                r = self._one(_SQL_PEER_BY_OVERLAY_IP6, (str(IPv6Address(overlay_ip)),))
+            except ValueError:
+                return None
+        else:
+            r = self._one(_SQL_PEER_BY_OVERLAY_IP, (overlay_ip,))
+        return _peer_from_row(r) if r else None
+
+    def _counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {k[6:]: v for k, v in self._conn.execute(_SQL_COUNTS).fetchall()}
+
+    def peer_counts(self) -> Dict[str, int]:
+        c = self._counts()
+        return {"active": c["peers"] - c["peers_revoked"], "revoked": c["peers_revoked"]}
+
+    def save_peer_seen(self, seen: Dict[str, datetime]) -> None:
+        with self._tx() as c:
+            gen = self._bump(c, "peer_seen")
+            c.executemany(
+                "INSERT INTO peer_seen (peer_id, seen_at, gen) VALUES (?, ?, ?) "
+                "ON CONFLICT(peer_id) DO UPDATE SET seen_at = excluded.seen_at, gen = excluded.gen",
+                [(pid, _ts(ts), gen) for pid, ts in seen.items()],
+            )
+
+    def load_peer_seen(self) -> Dict[str, datetime]:
+        with self._lock:
+            rows = self._conn.execute("SELECT peer_id, seen_at FROM peer_seen").fetchall()
+        return {pid: _dt(ts) for pid, ts in rows}
+
+    def peer_seen_since(self, cursor: int = 0) -> Tuple[int, Dict[str, datetime]]:
+        # flushes commit in gen order (BEGIN IMMEDIATE), so gen > cursor is exactly what is new;
+        # rows from before the gen column have gen 0 and only come with cursor 0
+        with self._lock:
+            rows = self._conn.execute("SELECT peer_id, seen_at, gen FROM peer_seen WHERE gen > ?", (cursor or -1,)).fetchall()
+        return max((r[2] for r in rows), default=cursor), {pid: _dt(ts) for pid, ts, _ in rows}
+
+    def forget_peer_seen(self, peer_ids: List[str]) -> None:
+        with self._tx() as c:
+            c.executemany("DELETE FROM peer_seen WHERE peer_id = ?", [(pid,) for pid in peer_ids])
+
+    # ----------------- Invites -----------------
+    def save_invite(self, invite: InviteInfo) -> None:
+        with self._tx() as c:
+            c.execute(_SQL_UPSERT_INVITE, _invite_row(invite))
+
+    def save_invites(self, invites: List[InviteInfo]) -> None:
+        with self._tx() as c:
+            c.executemany(_SQL_UPSERT_INVITE, [_invite_row(i) for i in invites])
+
+    def get_invite(self, invite_code: str) -> Optional[InviteInfo]:
+        r = self._one(_SQL_GET_INVITE, (invite_code,))
+        return _invite_from_row(r) if r else None
+
+    def consume_invite(self, invite_code: str) -> Optional[InviteInfo]:
+        now = utcnow()
+        with self._tx() as c:
+            cur = c.execute(_SQL_CONSUME_INVITE, (_ts(now), invite_code, _ts(now)))
+            if cur.rowcount != 1:
+                return None
+            r = c.execute(_SQL_GET_INVITE, (invite_code,)).fetchone()
+        return _invite_from_row(r) if r else None
+
+    def sweep_invites(self, *, now: Optional[datetime] = None) -> int:
+        now = now or utcnow()
+        with self._tx() as c:
+            expired = c.execute("DELETE FROM invites WHERE used_at IS NULL AND expires_at <= ?", (_ts(now),)).rowcount
+            used = c.execute("DELETE FROM invites WHERE used_at IS NOT NULL AND used_at <= ?", (_ts(now - self._invite_grace),)).rowcount
+        self._invites_evicted_expired += expired
+        self._invites_evicted_used += used
+        return expired + used
+
+    def invite_stats(self) -> Dict[str, int]:
+        c = self._counts()
+        stored, used = c["invites"], c["invites_used"]
+        return {
+            "stored": stored,
+            "live": stored - used,
+            "used": used,
+            "evicted_expired": self._invites_evicted_expired,
+            "evicted_used": self._invites_evicted_used,
+        }
+
+    # ----------------- Audit -----------------
+    def append_audit(self, event: AuditEvent) -> None:
+        with self._lock:
+            if not self._audit_buf:
+                self._audit_oldest = time.monotonic()
+            self._audit_buf.append(_audit_row(event))
+            if len(self._audit_buf) >= self._audit_batch or time.monotonic() - self._audit_oldest >= self._audit_flush_seconds:
+                self.flush_audit()
+
+    def append_audit_many(self, events: List[AuditEvent]) -> None:
+        # already batched by the caller -> one transaction
+        with self._tx():
+            self._audit_buf.extend(_audit_row(e) for e in events)
+
+    def flush_audit(self) -> None:
+        with self._lock:
+            if not self._audit_buf:
+                return
+            with self._tx():
+                pass  # _tx flushes the buffer inside the transaction
+
+    def list_audit(self, limit: int = 200) -> List[AuditEvent]:
+        with self._lock:
+            self.flush_audit()
+            rows = self._conn.execute(_SQL_LIST_AUDIT, (limit,)).fetchall()
+        return [_audit_from_row(r) for r in rows]
+
+    def query_audit(self, *, limit: int = 100, cursor: Optional[str] = None, action: Optional[str] = None,
+                    subject: Optional[str] = None, actor_user_id: Optional[str] = None,
+                    since: Optional[datetime] = None, until: Optional[datetime] = None) -> AuditPage:
+        where, args = [], []
+        if cursor:
+            where.append("id < ?")
+            args.append(int(cursor))
+        for col, val in (("action", action), ("subject", subject), ("actor_user_id", actor_user_id)):
+            if val is not None:
+                where.append(f"{col} = ?")
+                args.append(val)
+        # ts is stored as UTC isoformat -> lexicographic order == time order
+        if since is not None:
+            where.append("ts >= ?")
+            args.append(_ts(_utc(since)))
+        if until is not None:
+            where.append("ts < ?")
+            args.append(_ts(_utc(until)))
+        sql = "SELECT id, ts, actor_user_id, action, subject, meta FROM audit"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+
+        with self._lock:
+            self.flush_audit()
+            rows = self._conn.execute(sql, (*args, limit + 1)).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return AuditPage(
+            items=[_audit_from_row(r[1:]) for r in rows],
+            next_cursor=str(rows[-1][0]) if more and rows else None,
+        )
+
+    # ----------------- Change notification -----------------
+    def poll_changes(self) -> Set[str]:
+        with self._lock:
+            dv = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if dv == self._data_version:
+                return set()  # nobody else committed anything
+            self._data_version = dv
+            changed: Set[str] = set()
+            for key, v in self._conn.execute(_SQL_GENS).fetchall():
+                topic = key[4:]
+                if v != self._gens.get(topic):
+                    self._gens[topic] = v
+                    changed.add(topic)
+            return changed
+
+    # ----------------- Lifecycle -----------------
+    def close(self) -> None:
+        with self._lock:
+            self.flush_audit()
+            self._conn.close()
@@ -1,18 +1,157 @@
 # backend/network/store.py
 from __future__ import annotations
 
+import heapq
+import secrets
+import threading
 from abc import ABC, abstractmethod
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
 
-from .models import AuditEvent, InviteInfo, PeerInfo
+from .audit import AuditLog
+from .locks import StripedLock
+from .models import AuditEvent, AuditPage, InviteInfo, PeerInfo
+from .peer_record import PeerCodec, PeerRecord, ip_key, to_us
+from .pmap import PersistentMap
 
 
 def utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _aware(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+class PeerConflict(Exception):
+    """
+    A concurrent writer (another worker process) already holds a unique slot.
+    `field` is "overlay_ip" / "overlay_ip6" (address taken) or "device" (user+device already has an active peer).
+    """
+
+    def __init__(self, field: str, message: str = "") -> None:
+        super().__init__(message or f"peer conflict on {field}")
+        self.field = field
+
+
+@dataclass(frozen=True)
+class PeerFilter:
+    user_id: Optional[str] = None
+    device_id: Optional[str] = None
+    revoked: Optional[bool] = None
+    tag_key: Optional[str] = None
+    tag_value: Optional[str] = None      # only checked together with tag_key
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "created_after", _aware(self.created_after))
+        object.__setattr__(self, "created_before", _aware(self.created_before))
+
+    def matches(self, p: PeerInfo) -> bool:
+        if self.user_id is not None and p.user_id != self.user_id:
+            return False
+        if self.device_id is not None and p.device_id != self.device_id:
+            return False
+        if self.revoked is not None and bool(p.revoked_at) != self.revoked:
+            return False
+        if self.tag_key is not None:
+            if self.tag_key not in p.tags:
+                return False
+            if self.tag_value is not None and p.tags[self.tag_key] != self.tag_value:
+                return False
+        if self.created_after is not None and p.created_at < self.created_after:
+            return False
+        if self.created_before is not None and p.created_at >= self.created_before:
+            return False
+        return True
+
+    def matches_record(self, r: PeerRecord) -> bool:
+        """Same as matches() on the in-memory store's internal row (no PeerInfo needed)."""
+        if self.user_id is not None and r.user_id != self.user_id:
+            return False
+        if self.device_id is not None and r.device_id != self.device_id:
+            return False
+        if self.revoked is not None and (r.revoked_us is not None) != self.revoked:
+            return False
+        if self.tag_key is not None:
+            tags = dict(r.tags)
+            if self.tag_key not in tags:
+                return False
+            if self.tag_value is not None and tags[self.tag_key] != self.tag_value:
+                return False
+        if self.created_after is not None and r.created_us < to_us(self.created_after):
+            return False
+        if self.created_before is not None and r.created_us >= to_us(self.created_before):
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class PeerChangeLog:
+    """
+    Slice of a store's peer change log. `changes` are (revision, op, current peer)
+    in revision order, op = "create" | "update" | "revoke"; the peer is its state
+    at read time, not a historical copy. `resync` = `since` is not covered by
+    the retained log (too old, from the future, or None): reload the full list.
+    """
+    revision: int                                    # head revision of the store
+    resync: bool = False
+    changes: List[Tuple[int, str, PeerInfo]] = field(default_factory=list)
+
+
+def change_op(old_revoked: Optional[bool], new_revoked: bool) -> str:
+    """old_revoked None = the peer did not exist before."""
+    if old_revoked is None:
+        return "create"
+    return "revoke" if new_revoked and not old_revoked else "update"
+
+
+def needs_resync(since: Optional[int], head: int, oldest: int) -> bool:
+    """`oldest` = first retained revision (head + 1 when the log is empty)."""
+    return since is None or since > head or (since < head and since + 1 < oldest)
+
+
+class PeerView:
+    """
+    Immutable point-in-time view of the in-memory store's peers at `revision`,
+    ordered by peer_id. Taking one is O(1) (no copy); iterating it is lazy and
+    never blocks or is disturbed by writers.
+    """
+
+    __slots__ = ("revision", "_map", "_codec")
+
+    def __init__(self, revision: int, peers: PersistentMap, codec: PeerCodec) -> None:
+        self.revision = revision
+        self._map = peers
+        self._codec = codec
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def get(self, peer_id: str) -> Optional[PeerInfo]:
+        r = self._map.get(peer_id)
+        return self._codec.decode(r) if r is not None else None
+
+    def records(self, after: Optional[str] = None) -> Iterator[PeerRecord]:
+        return self._map.values(after)
+
+    def iter(self, *, after: Optional[str] = None, flt: Optional[PeerFilter] = None) -> Iterator[PeerInfo]:
+        rows = self._map.values(after)
+        if flt is not None:
+            rows = filter(flt.matches_record, rows)
+        return map(self._codec.decode, rows)
+
+
 class NetworkStore(ABC):
+    # True if several processes may write the same store (uvicorn --workers N)
+    shared: bool = False
+
     @abstractmethod
     def save_peer(self, peer: PeerInfo) -> None: ...
 
@@ -22,98 +161,422 @@ class NetworkStore(ABC):
     @abstractmethod
     def list_peers(self) -> List[PeerInfo]: ...
 
+    def iter_peers(self, *, after: Optional[str] = None, flt: Optional[PeerFilter] = None) -> Iterator[PeerInfo]:
+        """
+        Peers ordered by peer_id, starting after `after` (cursor).
+        Generic fallback; stores override this to avoid materializing the full list.
+        """
+        for p in sorted(self.list_peers(), key=lambda p: p.peer_id):
+            if after is not None and p.peer_id <= after:
+                continue
+            if flt is None or flt.matches(p):
+                yield p
+
     @abstractmethod
     def revoke_peer(self, peer_id: str, *, ts: Optional[datetime] = None) -> Optional[PeerInfo]: ...
 
     @abstractmethod
     def update_peer(self, peer_id: str, *, allowed_ips: Optional[List[str]] = None, tags: Optional[Dict[str, str]] = None) -> Optional[PeerInfo]: ...
 
+    # ---- batch variants: one transaction / lock acquisition per call where the store supports it ----
+    def revoke_peers(self, peer_ids: List[str], *, ts: Optional[datetime] = None) -> Dict[str, Optional[PeerInfo]]:
+        ts = ts or utcnow()
+        return {pid: self.revoke_peer(pid, ts=ts) for pid in peer_ids}
+
+    def update_peers(self, updates: List[Tuple[str, Optional[List[str]], Optional[Dict[str, str]]]]) -> Dict[str, Optional[PeerInfo]]:
+        """updates: (peer_id, allowed_ips, tags); None leaves a field unchanged."""
+        return {pid: self.update_peer(pid, allowed_ips=a, tags=t) for pid, a, t in updates}
+
     @abstractmethod
     def find_peer_by_user_device(self, user_id: str, device_id: str) -> Optional[PeerInfo]: ...
 
+    @abstractmethod
+    def find_active_peer_by_user(self, user_id: str) -> Optional[PeerInfo]: ...
+
+    @abstractmethod
+    def list_active_peers_by_user(self, user_id: str) -> List[PeerInfo]: ...
+
+    @abstractmethod
+    def find_peer_by_public_key(self, public_key: str) -> Optional[PeerInfo]: ...
+
+    @abstractmethod
+    def find_peer_by_overlay_ip(self, overlay_ip: str) -> Optional[PeerInfo]: ...
+
     @abstractmethod
     def save_invite(self, invite: InviteInfo) -> None: ...
 
+    def save_invites(self, invites: List[InviteInfo]) -> None:
+        for inv in invites:
+            self.save_invite(inv)
+
     @abstractmethod
     def get_invite(self, invite_code: str) -> Optional[InviteInfo]: ...
 
     @abstractmethod
     def consume_invite(self, invite_code: str) -> Optional[InviteInfo]: ...
 
+    def peer_counts(self) -> Dict[str, int]:
+        """{"active": n, "revoked": m} (metrics; stores override with counters their writers maintain)."""
+        peers = self.list_peers()
+        active = sum(1 for p in peers if not p.revoked_at)
+        return {"active": active, "revoked": len(peers) - active}
+
+    def save_peer_seen(self, seen: Dict[str, datetime]) -> None:
+        """Batch-persist heartbeat timestamps (peer_id -> last seen)."""
+
+    def load_peer_seen(self) -> Dict[str, datetime]:
+        return {}
+
+    def peer_seen_since(self, cursor: int = 0) -> Tuple[int, Dict[str, datetime]]:
+        """
+        Heartbeat timestamps persisted after `cursor` (0 = all) and the cursor for the
+        next call. Shared stores override this to return only the rows written since.
+        """
+        return 0, self.load_peer_seen()
+
+    def forget_peer_seen(self, peer_ids: List[str]) -> None:
+        """Drop the heartbeat timestamps of peers that are gone (revoked)."""
+
+    def sweep_invites(self, *, now: Optional[datetime] = None) -> int:
+        """Evict expired invites and used ones past their grace period; returns evicted count."""
+        return 0
+
+    def invite_stats(self) -> Dict[str, int]:
+        return {}
+
     @abstractmethod
     def append_audit(self, event: AuditEvent) -> None: ...
 
+    def append_audit_many(self, events: List[AuditEvent]) -> None:
+        for e in events:
+            self.append_audit(e)
+
     @abstractmethod
     def list_audit(self, limit: int = 200) -> List[AuditEvent]: ...
 
+    @abstractmethod
+    def query_audit(
+        self,
+        *,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        action: Optional[str] = None,
+        subject: Optional[str] = None,
+        actor_user_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> AuditPage:
+        """Newest first; pass `next_cursor` of the previous page to continue."""
+
+    # epoch: identifies this store instance / database; together with the peer
+    # generation it versions every peer read (ETags survive no restart by accident)
+    epoch: str = ""
+
+    @abstractmethod
+    def peer_generation(self) -> int:
+        """Counter bumped by every peer mutation (save / revoke / update)."""
+
+    @abstractmethod
+    def peer_changes(self, since: Optional[int], *, limit: int = 500) -> PeerChangeLog:
+        """
+        Up to `limit` changes after revision `since` from the bounded change log.
+        Every peer mutation gets its own, strictly increasing revision.
+        """
+
+    def poll_changes(self) -> Set[str]:
+        """
+        Topics ("peers", "peer_seen") written by *other* processes since the last poll.
+        Per-process stores never see foreign writes.
+        """
+        return set()
+
+    def close(self) -> None:
+        """Release resources / flush pending writes (no-op for volatile stores)."""
+
 
 class InMemoryNetworkStore(NetworkStore):
-    def __init__(self) -> None:
-        self._peers: Dict[str, PeerInfo] = {}
+    """
+    Concurrency model (routes run in Starlette's threadpool):
+    - per-peer / per-invite read-modify-write runs under a striped lock
+    - index bookkeeping (a handful of dict ops) runs under one short `_index_lock`
+    - readers take no locks; they only see fully built, immutable PeerRecord rows
+    - listings read a PeerView: every change publishes a new persistent peer map
+      (path copy, O(log n)), so a scan never copies or sees a half-applied state
+    - peers are kept as compact PeerRecords; PeerInfo is materialized per read
+      (callers get their own copy)
+    """
+
+    def __init__(self, *, audit: Optional[AuditLog] = None, stripes: int = 64, invite_grace_seconds: int = 86400,
+                 change_log: int = 10000) -> None:
+        self._peers: Dict[str, PeerRecord] = {}
+        self._codec = PeerCodec()
+        self._generation = 0  # == revision of the latest change
+        # (revision, peer_id, op); revisions are contiguous, so an offset is an index
+        self._changes: Deque[Tuple[int, str, str]] = deque(maxlen=max(0, change_log))
+        self.epoch = secrets.token_hex(4)  # generation restarts at 0 with the process
+        # (revision, peers by peer_id) swapped as one tuple, so a reader gets a matching pair
+        self._head: Tuple[int, PersistentMap] = (0, PersistentMap())
         self._invites: Dict[str, InviteInfo] = {}
-        self._audit: List[AuditEvent] = []
+        self._peer_seen: Dict[str, datetime] = {}
+        # invite TTL: min-heap of (evict_at, invite_code); stale entries are skipped lazily
+        self._invite_heap: List[Tuple[datetime, str]] = []
+        self._invite_heap_lock = threading.Lock()
+        self._invite_grace = timedelta(seconds=max(0, invite_grace_seconds))
+        self._invites_used = 0
+        self._invites_evicted_expired = 0
+        self._invites_evicted_used = 0
+        self._audit = audit or AuditLog()
+
+        # secondary indexes (kept in sync by _index/_unindex)
+        self._active_by_user: Dict[str, Dict[str, None]] = {}   # user_id -> ordered set of active peer_ids
+        self._by_user_device: Dict[Tuple[str, str], str] = {}   # (user_id, device_id) -> latest peer_id
+        self._by_public_key: Dict[str, str] = {}
+        self._by_overlay_ip: Dict[object, str] = {}           # ip_key(overlay_ip / overlay_ip6) -> peer_id
+        self._active_peers = 0                                 # len of all _active_by_user sets (peer_counts)
+
+        self._peer_locks = StripedLock(stripes)
+        self._invite_locks = StripedLock(stripes)
+        self._index_lock = threading.Lock()
+
+    def _index(self, p: PeerRecord) -> None:
+        if p.revoked_us is None:
+            self._active_by_user.setdefault(p.user_id, {})[p.peer_id] = None
+            self._active_peers += 1
+        self._by_user_device[(p.user_id, p.device_id)] = p.peer_id
+        self._by_public_key[p.public_key] = p.peer_id
+        self._by_overlay_ip[p.ip] = p.peer_id
+        if p.ip6 is not None:
+            self._by_overlay_ip[p.ip6] = p.peer_id
+
+    def _unindex(self, p: PeerRecord) -> None:
+        ids = self._active_by_user.get(p.user_id)
+        if ids is not None and p.peer_id in ids:
+            del ids[p.peer_id]
+            self._active_peers -= 1
+            if not ids:
+                del self._active_by_user[p.user_id]
+        # unique-ish keys: only drop the entry if it still points at this peer
+        for idx, key in (
+            (self._by_user_device, (p.user_id, p.device_id)),
+            (self._by_public_key, p.public_key),
+            (self._by_overlay_ip, p.ip),
+            (self._by_overlay_ip, p.ip6),
+        ):
+            if idx.get(key) == p.peer_id:
+                del idx[key]
+
+    def _replace(self, p: PeerRecord) -> None:
+        with self._index_lock:
+            old = self._peers.get(p.peer_id)
+            if old is not None:
+                self._unindex(old)
+            self._peers[p.peer_id] = p
+            self._index(p)
+            self._generation += 1
+            self._head = (self._generation, self._head[1].set(p.peer_id, p))
+            op = change_op(None if old is None else old.revoked_us is not None, p.revoked_us is not None)
+            self._changes.append((self._generation, p.peer_id, op))
 
     def save_peer(self, peer: PeerInfo) -> None:
-        self._peers[peer.peer_id] = peer
+        rec = self._codec.encode(peer)
+        with self._peer_locks.for_key(peer.peer_id):
+            self._replace(rec)
+
+    def peer_generation(self) -> int:
+        return self._generation
+
+    def peer_view(self) -> PeerView:
+        return PeerView(*self._head, self._codec)
+
+    def peer_changes(self, since: Optional[int], *, limit: int = 500) -> PeerChangeLog:
+        with self._index_lock:
+            head = self._generation
+            oldest = self._changes[0][0] if self._changes else head + 1
+            if needs_resync(since, head, oldest):
+                return PeerChangeLog(revision=head, resync=True)
+            start = since + 1 - oldest
+            entries = list(islice(self._changes, start, start + limit)) if since < head else []
+        decode = self._codec.decode
+        # records are immutable: materializing outside the lock is safe
+        return PeerChangeLog(
+            revision=head,
+            changes=[(rev, op, decode(self._peers[pid])) for rev, pid, op in entries],
+        )
 
     def get_peer(self, peer_id: str) -> Optional[PeerInfo]:
-        return self._peers.get(peer_id)
+        r = self._peers.get(peer_id)
+        return self._codec.decode(r) if r is not None else None
 
     def list_peers(self) -> List[PeerInfo]:
-        return list(self._peers.values())
+        return list(self.peer_view().iter())
+
+    def iter_peers(self, *, after: Optional[str] = None, flt: Optional[PeerFilter] = None) -> Iterator[PeerInfo]:
+        # the view is taken here, not on the first next(): a page / export is one revision
+        return self.peer_view().iter(after=after, flt=flt)
 
     def revoke_peer(self, peer_id: str, *, ts: Optional[datetime] = None) -> Optional[PeerInfo]:
-        p = self._peers.get(peer_id)
-        if not p:
-            return None
-        if p.revoked_at:
-            return p
-        p = p.model_copy(update={"revoked_at": ts or utcnow()})
-        self._peers[peer_id] = p
-        return p
+        with self._peer_locks.for_key(peer_id):
+            return self._info(self._revoke_locked(peer_id, ts or utcnow()))
+
+    def _revoke_locked(self, peer_id: str, ts: datetime) -> Optional[PeerRecord]:
+        r = self._peers.get(peer_id)
+        if r is None or r.revoked_us is not None:
+            return r
+        r = r.replace(revoked_us=to_us(ts))
+        self._replace(r)
+        return r
+
+    def revoke_peers(self, peer_ids: List[str], *, ts: Optional[datetime] = None) -> Dict[str, Optional[PeerInfo]]:
+        ts = ts or utcnow()
+        with self._peer_locks.hold_many(peer_ids):
+            res = {pid: self._revoke_locked(pid, ts) for pid in peer_ids}
+        return {pid: self._info(r) for pid, r in res.items()}
 
     def update_peer(self, peer_id: str, *, allowed_ips: Optional[List[str]] = None, tags: Optional[Dict[str, str]] = None) -> Optional[PeerInfo]:
-        p = self._peers.get(peer_id)
-        if not p:
+        with self._peer_locks.for_key(peer_id):
+            return self._info(self._update_locked(peer_id, allowed_ips, tags))
+
+    def update_peers(self, updates: List[Tuple[str, Optional[List[str]], Optional[Dict[str, str]]]]) -> Dict[str, Optional[PeerInfo]]:
+        with self._peer_locks.hold_many(u[0] for u in updates):
+            res = {pid: self._update_locked(pid, a, t) for pid, a, t in updates}
+        return {pid: self._info(r) for pid, r in res.items()}
+
+    def _update_locked(self, peer_id: str, allowed_ips: Optional[List[str]], tags: Optional[Dict[str, str]]) -> Optional[PeerRecord]:
+        r = self._peers.get(peer_id)
+        if r is None:
             return None
         upd = {}
         if allowed_ips is not None:
-            upd["allowed_ips"] = allowed_ips
+            upd["allowed_ips"] = self._codec.allowed(allowed_ips)
         if tags is not None:
-            upd["tags"] = tags
-        p = p.model_copy(update=upd)
-        self._peers[peer_id] = p
-        return p
+            upd["tags"] = self._codec.tags(tags)
+        r = r.replace(**upd)
+        self._replace(r)
+        return r
+
+    def _info(self, r: Optional[PeerRecord]) -> Optional[PeerInfo]:
+        return self._codec.decode(r) if r is not None else None
+
+    def _by_id(self, pid: Optional[str]) -> Optional[PeerInfo]:
+        return self._info(self._peers.get(pid)) if pid else None
 
     def find_peer_by_user_device(self, user_id: str, device_id: str) -> Optional[PeerInfo]:
-        for p in self._peers.values():
-            if p.user_id == user_id and p.device_id == device_id:
-                return p
-        return None
+        return self._by_id(self._by_user_device.get((user_id, device_id)))
 
-    def save_invite(self, invite: InviteInfo) -> None:
+    def find_active_peer_by_user(self, user_id: str) -> Optional[PeerInfo]:
+        peers = self.list_active_peers_by_user(user_id)
+        return peers[0] if peers else None
+
+    def list_active_peers_by_user(self, user_id: str) -> List[PeerInfo]:
+        # list(...) snapshots the id set atomically; writers may mutate it concurrently
+        ids = list(self._active_by_user.get(user_id, ()))
+        decode = self._codec.decode
+        return [decode(r) for r in (self._peers.get(pid) for pid in ids) if r is not None]
+
+    def find_peer_by_public_key(self, public_key: str) -> Optional[PeerInfo]:
+        return self._by_id(self._by_public_key.get(public_key))
+
+    def find_peer_by_overlay_ip(self, overlay_ip: str) -> Optional[PeerInfo]:
+        return self._by_id(self._by_overlay_ip.get(ip_key(overlay_ip)))
+
+    def _evict_at(self, inv: InviteInfo) -> datetime:
+        return inv.used_at + self._invite_grace if inv.used_at else inv.expires_at
+
+    def _schedule(self, inv: InviteInfo) -> None:
+        with self._invite_heap_lock:
+            heapq.heappush(self._invite_heap, (self._evict_at(inv), inv.invite_code))
+
+    def _put_invite_locked(self, invite: InviteInfo) -> None:
+        old = self._invites.get(invite.invite_code)
+        self._invites_used += bool(invite.used_at) - bool(old is not None and old.used_at)
         self._invites[invite.invite_code] = invite
+        self._schedule(invite)
+
+    def peer_counts(self) -> Dict[str, int]:
+        active = self._active_peers
+        return {"active": active, "revoked": len(self._peers) - active}
+
+    def save_peer_seen(self, seen: Dict[str, datetime]) -> None:
+        self._peer_seen.update(seen)
+
+    def load_peer_seen(self) -> Dict[str, datetime]:
+        return dict(self._peer_seen)
+
+    def forget_peer_seen(self, peer_ids: List[str]) -> None:
+        for pid in peer_ids:
+            self._peer_seen.pop(pid, None)
+
+    def save_invite(self, invite: InviteInfo) -> None:
+        with self._invite_locks.for_key(invite.invite_code):
+            self._put_invite_locked(invite)
+
+    def save_invites(self, invites: List[InviteInfo]) -> None:
+        with self._invite_locks.hold_many(i.invite_code for i in invites):
+            for inv in invites:
+                self._put_invite_locked(inv)
 
     def get_invite(self, invite_code: str) -> Optional[InviteInfo]:
         return self._invites.get(invite_code)
 
     def consume_invite(self, invite_code: str) -> Optional[InviteInfo]:
-        inv = self._invites.get(invite_code)
-        if not inv:
-            return None
-        if inv.used_at:
-            return None
-        if inv.expires_at <= utcnow():
-            return None
-        inv = inv.model_copy(update={"used_at": utcnow()})
-        self._invites[invite_code] = inv
-        return inv
+        # compare-and-set under the invite's stripe: exactly one caller wins
+        with self._invite_locks.for_key(invite_code):
+            inv = self._invites.get(invite_code)
+            if not inv:
+                return None
+            if inv.used_at:
+                return None
+            now = utcnow()
+            if inv.expires_at <= now:
+                return None
+            inv = inv.model_copy(update={"used_at": now})
+            self._put_invite_locked(inv)  # re-scheduled: kept for the grace period
+            return inv
+
+    def sweep_invites(self, *, now: Optional[datetime] = None) -> int:
+        now = now or utcnow()
+        evicted = 0
+        while True:
+            with self._invite_heap_lock:
+                if not self._invite_heap or self._invite_heap[0][0] > now:
+                    return evicted
+                _, code = heapq.heappop(self._invite_heap)
+            with self._invite_locks.for_key(code):
+                inv = self._invites.get(code)
+                if inv is None or self._evict_at(inv) > now:
+                    continue  # already gone or re-scheduled (consumed / re-saved)
+                del self._invites[code]
+                if inv.used_at:
+                    self._invites_used -= 1
+                    self._invites_evicted_used += 1
+                else:
+                    self._invites_evicted_expired += 1
+                evicted += 1
+
+    def invite_stats(self) -> Dict[str, int]:
+        stored = len(self._invites)
+        return {
+            "stored": stored,
+            "live": stored - self._invites_used,  # includes expired ones until the next sweep
+            "used": self._invites_used,
+            "evicted_expired": self._invites_evicted_expired,
+            "evicted_used": self._invites_evicted_used,
+        }
 
     def append_audit(self, event: AuditEvent) -> None:
         self._audit.append(event)
-        # keep bounded
-        if len(self._audit) > 5000:
-            self._audit = self._audit[-5000:]
+
+    def append_audit_many(self, events: List[AuditEvent]) -> None:
+        self._audit.append_many(events)
 
     def list_audit(self, limit: int = 200) -> List[AuditEvent]:
-        return list(reversed(self._audit[-limit:]))
+        return self._audit.recent(limit)
+
+    def query_audit(self, *, limit: int = 100, cursor: Optional[str] = None, action: Optional[str] = None,
+                    subject: Optional[str] = None, actor_user_id: Optional[str] = None,
+                    since: Optional[datetime] = None, until: Optional[datetime] = None) -> AuditPage:
+        return self._audit.query(limit=limit, cursor=cursor, action=action, subject=subject,
+                                 actor_user_id=actor_user_id, since=since, until=until)
+
+    def close(self) -> None:
+        self._audit.close()
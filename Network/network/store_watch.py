@@ -0,0 +1,47 @@
+# backend/network/store_watch.py
+from __future__ import annotations
+
+from typing import Callable, List, Set
+
+from loguru import logger
+
+from .store import NetworkStore
+from .workers import IntervalWorker
+
+Subscriber = Callable[[Set[str]], None]
+
+
+class StoreWatcher:
+    """
+    Polls a shared store for writes by other worker processes and fans the
+    changed topics out to subscribers (allocator, sync engine, heartbeat table, caches).
+
+    A poll without foreign writes is one PRAGMA on SQLite, so short intervals are cheap.
+    """
+
+    def __init__(self, store: NetworkStore, *, interval: float = 0.5) -> None:
+        self._store = store
+        self._subscribers: List[Subscriber] = []
+        self._worker = IntervalWorker("store-watch", interval, self.poll, final_run=False)
+        self.notifications = 0
+
+    def subscribe(self, fn: Subscriber) -> None:
+        self._subscribers.append(fn)
+
+    def poll(self) -> Set[str]:
+        topics = self._store.poll_changes()
+        if not topics:
+            return topics
+        self.notifications += 1
+        for fn in self._subscribers:
+            try:
+                fn(topics)
+            except Exception as e:
+                logger.error("❌ [StoreWatch] Subscriber fehlgeschlagen ({}): {}", sorted(topics), e)
+        return topics
+
+    def start(self) -> None:
+        self._worker.start()
+
+    def stop(self) -> None:
+        self._worker.stop()
@@ -0,0 +1,83 @@
+# backend/network/trust.py
+from __future__ import annotations
+
+import os
+from bisect import bisect_right
+from ipaddress import collapse_addresses, ip_address, ip_network
+from typing import Iterable, List, Tuple
+
+DEFAULT_TRUSTED_CIDRS = "10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
+
+# (starts, ends) of merged, sorted integer intervals
+_Table = Tuple[List[int], List[int]]
+
+
+def _compile(nets) -> _Table:
+    starts: List[int] = []
+    ends: List[int] = []
+    for net in collapse_addresses(nets):
+        starts.append(int(net.network_address))
+        ends.append(int(net.broadcast_address))
+    return starts, ends
+
+
+def _hit(table: _Table, value: int) -> bool:
+    starts, ends = table
+    i = bisect_right(starts, value) - 1
+    return i >= 0 and value <= ends[i]
+
+
+class TrustedNetworks:
+    """
+    Compiled matcher for NETWORK_TRUSTED_CIDRS / NETWORK_TRUST_PROXY.
+
+    CIDRs are collapsed into disjoint integer intervals per address family,
+    so a lookup is one bisect regardless of how many ranges are configured.
+    `load()` swaps the compiled state in one assignment (safe for concurrent readers).
+    """
+
+    def __init__(self, cidrs: Iterable[str] = (), *, trust_proxy: bool = False) -> None:
+        self._state = self._build(cidrs, trust_proxy)
+
+    @classmethod
+    def from_env(cls) -> "TrustedNetworks":
+        tn = cls()
+        tn.load_env()
+        return tn
+
+    @staticmethod
+    def _build(cidrs: Iterable[str], trust_proxy: bool):
+        v4, v6, names = [], [], []
+        for part in cidrs:
+            part = part.strip()
+            if not part:
+                continue
+            net = ip_network(part, strict=False)
+            (v4 if net.version == 4 else v6).append(net)
+            names.append(str(net))
+        return _compile(v4), _compile(v6), tuple(names), trust_proxy
+
+    def load(self, cidrs: Iterable[str], *, trust_proxy: bool) -> None:
+        self._state = self._build(cidrs, trust_proxy)
+
+    def load_env(self) -> None:
+        raw = (os.getenv("NETWORK_TRUSTED_CIDRS") or "").strip() or DEFAULT_TRUSTED_CIDRS
+        trust_proxy = (os.getenv("NETWORK_TRUST_PROXY") or "0").strip() == "1"
+        self.load(raw.split(","), trust_proxy=trust_proxy)
+
+    @property
+    def cidrs(self) -> List[str]:
+        return list(self._state[2])
+
+    @property
+    def trust_proxy(self) -> bool:
+        return self._state[3]
+
+    def contains(self, ip_s: str) -> bool:
+        """Raises ValueError for unparsable addresses."""
+        ip = ip_address(ip_s)
+        v4, v6, _, _ = self._state
+        if ip.version == 6 and ip.ipv4_mapped is not None:
+            # ::ffff:a.b.c.d (dual-stack sockets) is matched against the v4 table
+            return _hit(v4, int(ip.ipv4_mapped))
+        return _hit(v4 if ip.version == 4 else v6, int(ip))
@@ -0,0 +1,236 @@
+# backend/network/wg_sync.py
+from __future__ import annotations
+
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from ipaddress import ip_address, ip_network
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from loguru import logger
+
+from .models import PeerInfo
+from .workers import IntervalWorker
+
+# desired/applied state: public_key -> server-side AllowedIPs
+PeerState = Dict[str, Tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class SyncOp:
+    kind: str                       # "add" | "update" | "remove"
+    public_key: str
+    allowed_ips: Tuple[str, ...] = ()
+
+
+def server_allowed_ips(peer: PeerInfo, overlay_nets: Sequence = ()) -> Tuple[str, ...]:
+    """
+    AllowedIPs of a peer on the *server* interface: its own overlay address(es) plus
+    any `allowed_ips` entries outside the overlay pools (networks routed behind
+    the peer). Entries overlapping an overlay pool (the default client route
+    set) are skipped, otherwise WireGuard would move that route from peer to peer.
+    """
+    out = []
+    for ip in (peer.overlay_ip, peer.overlay_ip6):
+        if ip:
+            out.append(f"{ip}/{32 if ip_address(ip).version == 4 else 128}")
+    for cidr in peer.allowed_ips or []:
+        try:
+            net = ip_network(cidr, strict=False)
+        except ValueError:
+            continue
+        if any(net.version == o.version and net.overlaps(o) for o in overlay_nets):
+            continue
+        if str(net) not in out:
+            out.append(str(net))
+    return tuple(out)
+
+
+def diff(desired: PeerState, applied: PeerState, keys: Optional[Iterable[str]] = None) -> List[SyncOp]:
+    """Minimal ops to move `applied` to `desired` (restricted to `keys` if given)."""
+    ops: List[SyncOp] = []
+    for k in (keys if keys is not None else set(desired) | set(applied)):
+        want, have = desired.get(k), applied.get(k)
+        if want == have:
+            continue
+        if want is None:
+            ops.append(SyncOp("remove", k))
+        elif have is None:
+            ops.append(SyncOp("add", k, want))
+        else:
+            ops.append(SyncOp("update", k, want))
+    return ops
+
+
+class WgExecutor(ABC):
+    @abstractmethod
+    def apply(self, ops: List[SyncOp]) -> None: ...
+
+    @abstractmethod
+    def dump(self) -> PeerState:
+        """Current peers on the interface (used once at startup)."""
+
+
+class FakeWgExecutor(WgExecutor):
+    """In-memory interface for tests/dev: records every op."""
+
+    def __init__(self) -> None:
+        self.state: PeerState = {}
+        self.log: List[SyncOp] = []
+
+    def apply(self, ops: List[SyncOp]) -> None:
+        for op in ops:
+            if op.kind == "remove":
+                self.state.pop(op.public_key, None)
+            else:
+                self.state[op.public_key] = op.allowed_ips
+        self.log.extend(ops)
+
+    def dump(self) -> PeerState:
+        return dict(self.state)
+
+
+class WgCommandExecutor(WgExecutor):
+    """
+    Applies ops with `wg set` (several peer clauses per call, no config rewrite).
+    Requires the `wg` binary and CAP_NET_ADMIN in the container.
+    """
+
+    def __init__(self, interface: str = "wg0", *, wg_bin: str = "wg", ops_per_call: int = 200) -> None:
+        self._iface = interface
+        self._wg = wg_bin
+        self._ops_per_call = max(1, ops_per_call)
+
+    def apply(self, ops: List[SyncOp]) -> None:
+        for i in range(0, len(ops), self._ops_per_call):
+            args = [self._wg, "set", self._iface]
+            for op in ops[i:i + self._ops_per_call]:
+                if op.kind == "remove":
+                    args += ["peer", op.public_key, "remove"]
+                else:
+                    args += ["peer", op.public_key, "allowed-ips", ",".join(op.allowed_ips)]
+            subprocess.run(args, check=True, capture_output=True, timeout=30)
+
+    def dump(self) -> PeerState:
+        out = subprocess.run([self._wg, "show", self._iface, "allowed-ips"], check=True, capture_output=True, text=True, timeout=30)
+        state: PeerState = {}
+        for line in out.stdout.splitlines():
+            parts = line.split()
+            if not parts:
+                continue
+            ips = tuple(p for p in parts[1:] if p != "(none)")
+            state[parts[0]] = ips
+        return state
+
+
+class WgSyncEngine:
+    """
+    Keeps the server interface in line with the store, one peer op per change.
+
+    `peer_changed()` only updates the desired state and marks the key dirty;
+    the worker applies the diff for dirty keys every `debounce` seconds, so a
+    burst of changes collapses into one executor call. Failed ops stay dirty
+    and are retried on the next tick.
+    """
+
+    def __init__(self, executor: WgExecutor, *, overlay_cidrs: Iterable[str] = (), debounce: float = 0.2) -> None:
+        self._exec = executor
+        self._overlay = tuple(ip_network(c, strict=False) for c in overlay_cidrs)
+        self._desired: PeerState = {}
+        # public_key -> peer_id of the active peer holding it: a revoked peer whose key was
+        # re-enrolled by a newer peer must not remove that peer's entry
+        self._owner: Dict[str, str] = {}
+        self._applied: PeerState = {}
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._worker = IntervalWorker("wg-sync", debounce, self.sync)
+
+        self.ops_applied = 0
+        self.syncs = 0
+        self.errors = 0
+
+    def load(self, peers: Iterable[PeerInfo]) -> None:
+        """Startup: desired state from the store, applied state from the interface."""
+        desired: PeerState = {}
+        owner: Dict[str, str] = {}
+        for p in peers:
+            if not p.revoked_at:
+                desired[p.public_key] = server_allowed_ips(p, self._overlay)
+                owner[p.public_key] = p.peer_id
+        try:
+            applied = self._exec.dump()
+        except Exception as e:
+            logger.warning("⚠️ [WgSync] Interface-Zustand nicht lesbar ({}), nehme leeren Zustand an.", e)
+            applied = {}
+        with self._lock:
+            self._desired = desired
+            self._owner = owner
+            self._applied = applied
+            self._dirty = set(desired) | set(applied)  # first sync reconciles once
+
+    def reload(self, peers: Iterable[PeerInfo]) -> None:
+        """Replace the desired state (writes from another worker); only differing keys become dirty."""
+        active = [p for p in peers if not p.revoked_at]
+        desired: PeerState = {p.public_key: server_allowed_ips(p, self._overlay) for p in active}
+        with self._lock:
+            old, self._desired = self._desired, desired
+            self._owner = {p.public_key: p.peer_id for p in active}
+            self._dirty |= {k for k in set(old) | set(desired) if old.get(k) != desired.get(k)}
+
+    def peer_changed(self, peer: PeerInfo) -> None:
+        key = peer.public_key
+        with self._lock:
+            if peer.revoked_at:
+                if self._owner.get(key, peer.peer_id) != peer.peer_id:
+                    return  # e.g. a PATCH of an old revoked peer; the key is live on another peer
+                self._owner.pop(key, None)
+                self._desired.pop(key, None)
+            else:
+                self._owner[key] = peer.peer_id
+                self._desired[key] = server_allowed_ips(peer, self._overlay)
+            self._dirty.add(key)
+
+    def sync(self) -> int:
+        with self._sync_lock:
+            with self._lock:
+                if not self._dirty:
+                    return 0
+                keys, self._dirty = self._dirty, set()
+                ops = diff(self._desired, self._applied, keys)
+            if not ops:
+                return 0
+            try:
+                self._exec.apply(ops)
+            except Exception as e:
+                self.errors += 1
+                with self._lock:
+                    self._dirty |= keys
+                logger.error("❌ [WgSync] {} Ops fehlgeschlagen, Retry beim nächsten Lauf: {}", len(ops), e)
+                return 0
+            with self._lock:
+                for op in ops:
+                    if op.kind == "remove":
+                        self._applied.pop(op.public_key, None)
+                    else:
+                        self._applied[op.public_key] = op.allowed_ips
+            self.ops_applied += len(ops)
+            self.syncs += 1
+            return len(ops)
+
+    def stats(self) -> dict:
+        return {
+            "desired": len(self._desired),
+            "applied": len(self._applied),
+            "pending": len(self._dirty),
+            "ops_applied": self.ops_applied,
+            "syncs": self.syncs,
+            "errors": self.errors,
+        }
+
+    def start(self) -> None:
+        self._worker.start()
+
+    def stop(self) -> None:
+        self._worker.stop()
@@ -6,11 +6,34 @@ import os
 import secrets
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from ipaddress import ip_network
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
 
-from .models import AuditEvent, EnrollmentRequest, EnrollmentResponse, InviteInfo, PeerInfo
-from .store import NetworkStore, utcnow
+from loguru import logger
+
+from .allocator import PoolSet, PoolSpec
+from .audit_writer import AuditWriter
+from .change_feed import PeerChangeFeed
+from .client_config import ConfigRenderer
+from .heartbeat import HeartbeatTable
+from .locks import StripedLock
+from .models import (
+    AuditEvent,
+    AuditPage,
+    BatchItemResult,
+    ClientConfigExport,
+    EnrollmentRequest,
+    EnrollmentResponse,
+    InviteCreate,
+    InviteInfo,
+    PeerBatchPatchItem,
+    PeerBatchResult,
+    PeerChange,
+    PeerChangesPage,
+    PeerInfo,
+)
+from .policy import PolicyEngine
+from .store import NetworkStore, PeerConflict, PeerFilter, utcnow
+from .wg_sync import WgSyncEngine
 
 
 def _rand_code(n: int = 18) -> str:
@@ -34,19 +57,54 @@ class WireGuardConfig:
     wg_server_port: int = 51820
     wg_dns: Optional[str] = None   # e.g. "1.1.1.1"
     wg_persistent_keepalive: int = 25
-    default_allowed_ips: Optional[List[str]] = None  # e.g. ["10.77.0.0/16"]
+    default_allowed_ips: Optional[List[str]] = None  # e.g. ["10.77.0.0/16"]; default: all pool networks
+    ip_quarantine_seconds: int = 3600  # revoked overlay IPs are not reused before this
+    wg_subnet6: Optional[str] = None           # e.g. "fd00:77::/64" -> every peer also gets an IPv6 address
+    wg_server_overlay_ip6: Optional[str] = None
+    pools: Tuple[PoolSpec, ...] = ()           # extra pools, picked by peer tags (see allocator.parse_pools)
 
     def __post_init__(self):
         if self.default_allowed_ips is None:
-            object.__setattr__(self, "default_allowed_ips", [self.wg_subnet])
+            object.__setattr__(self, "default_allowed_ips", self.overlay_cidrs())
+
+    def pool_specs(self) -> List[PoolSpec]:
+        """Default pool (WG_SUBNET / WG_SUBNET6) first, then the tag-selected ones."""
+        return [PoolSpec(name="default", cidr=self.wg_subnet, cidr6=self.wg_subnet6), *self.pools]
+
+    def overlay_cidrs(self) -> List[str]:
+        return [c for s in self.pool_specs() for c in (s.cidr, s.cidr6) if c]
 
 
 class WireGuardManager:
-    def __init__(self, *, store: NetworkStore, cfg: WireGuardConfig) -> None:
+    def __init__(
+        self,
+        *,
+        store: NetworkStore,
+        cfg: WireGuardConfig,
+        audit: Optional[AuditWriter] = None,
+        heartbeats: Optional[HeartbeatTable] = None,
+        sync: Optional[WgSyncEngine] = None,
+        feed: Optional[PeerChangeFeed] = None,
+        policy: Optional[PolicyEngine] = None,
+        config_cache_entries: int = 10000,
+    ) -> None:
         self._store = store
         self._cfg = cfg
-        self._pool = ip_network(cfg.wg_subnet, strict=False)
-        self._server_ip = cfg.wg_server_overlay_ip
+        self._audit_writer = audit
+        self._heartbeats = heartbeats or HeartbeatTable(store)
+        self._sync = sync
+        self.changes = feed or PeerChangeFeed()
+        # client AllowedIPs per peer tags (no grants: default_allowed_ips for everyone)
+        self.policy = policy or PolicyEngine(base=cfg.default_allowed_ips or [cfg.wg_subnet])
+        self.renderer = ConfigRenderer(cfg, max_entries=config_cache_entries)
+        self._enroll_locks = StripedLock()
+        self._server_ips = [ip for ip in (cfg.wg_server_overlay_ip, cfg.wg_server_overlay_ip6) if ip]
+        # change-log position of the loaded state (taken first: later changes replay idempotently)
+        self._peer_rev = self._store.peer_changes(None, limit=1).revision
+        peers = self._store.list_peers()
+        self._pool = self._load_pool(peers)
+        if sync is not None:
+            sync.load(peers)
 
     # ----------------- Invites -----------------
     def create_invite(self, *, user_id: str, device_id: Optional[str], ttl_seconds: int) -> InviteInfo:
@@ -60,9 +118,27 @@ class WireGuardManager:
             used_at=None,
         )
         self._store.save_invite(inv)
-        self._store.append_audit(AuditEvent(ts=now, actor_user_id=user_id, action="network.invite.create", subject=inv.invite_code, meta={"device_id": device_id, "ttl": ttl_seconds}))
+        self._audit(AuditEvent(ts=now, actor_user_id=user_id, action="network.invite.create", subject=inv.invite_code, meta={"device_id": device_id, "ttl": ttl_seconds}))
         return inv
 
+    def create_invites(self, *, actor_user_id: str, items: List[InviteCreate]) -> List[InviteInfo]:
+        """Bulk onboarding: one store call, one coalesced audit record."""
+        now = utcnow()
+        invites = [
+            InviteInfo(
+                invite_code=_rand_code(),
+                user_id=it.user_id,
+                device_id=it.device_id,
+                created_at=now,
+                expires_at=now + timedelta(seconds=it.ttl_seconds),
+                used_at=None,
+            )
+            for it in items
+        ]
+        self._store.save_invites(invites)
+        self._audit(AuditEvent(ts=now, actor_user_id=actor_user_id, action="network.invite.create.batch", subject=None, meta={"count": len(invites), "invite_codes": [i.invite_code for i in invites]}))
+        return invites
+
     # ----------------- Enrollment -----------------
     def enroll(self, *, actor_user_id: str, req: EnrollmentRequest) -> EnrollmentResponse:
         inv = self._store.consume_invite(req.invite_code)
@@ -73,116 +149,370 @@ class WireGuardManager:
         if inv.device_id and inv.device_id != req.device.device_id:
             raise ValueError("Invite is bound to a different device_id")
 
-        # Idempotency: if peer already exists for user+device, return that config again
-        existing = self._store.find_peer_by_user_device(inv.user_id, req.device.device_id)
-        if existing and not existing.revoked_at:
-            cfg_text = self._render_client_config(existing.public_key, existing.overlay_ip)
-            self._store.append_audit(AuditEvent(ts=utcnow(), actor_user_id=actor_user_id, action="network.enroll.reuse", subject=existing.peer_id, meta={"user_id": inv.user_id, "device_id": req.device.device_id}))
-            return EnrollmentResponse(
-                peer_id=existing.peer_id,
-                overlay_ip=existing.overlay_ip,
-                client_config_text=cfg_text,
-                server_endpoint=self._cfg.wg_server_endpoint,
-                expires_at=None,
-            )
+        # Idempotency: if peer already exists for user+device, return that config again.
+        # The check + create runs under the device's stripe so parallel enrolls of one device
+        # cannot both create a peer.
+        with self._enroll_locks.for_key((inv.user_id, req.device.device_id)):
+            existing = self._store.find_peer_by_user_device(inv.user_id, req.device.device_id)
+            if existing and not existing.revoked_at:
+                return self._reuse_enrollment(existing, actor_user_id=actor_user_id)
 
-        if not req.client_public_key:
-            raise ValueError("client_public_key required (client generates keys locally)")
-        peer_pub = req.client_public_key
-        overlay_ip = self._alloc_overlay_ip()
-        peer_id = f"wg_{secrets.token_hex(8)}"
-        allowed_ips = list(self._cfg.default_allowed_ips or [self._cfg.wg_subnet])
-        peer = PeerInfo(
-            peer_id=peer_id,
-            user_id=inv.user_id,
-            device_id=req.device.device_id,
-            overlay_ip=overlay_ip,
-            allowed_ips=allowed_ips,
-            public_key=peer_pub,
-            created_at=utcnow(),
-            revoked_at=None,
-            tags={k: v for k, v in (req.device.model_dump(exclude_none=True)).items() if isinstance(v, str)},
-        )
-        self._store.save_peer(peer)
+            if not req.client_public_key:
+                raise ValueError("client_public_key required (client generates keys locally)")
+            peer_pub = req.client_public_key
+            try:
+                peer = self._allocate_and_save(
+                    user_id=inv.user_id,
+                    device_id=req.device.device_id,
+                    public_key=peer_pub,
+                    tags={k: v for k, v in (req.device.model_dump(exclude_none=True)).items() if isinstance(v, str)},
+                )
+            except PeerConflict:
+                # another worker process enrolled this device in the meantime
+                existing = self._store.find_peer_by_user_device(inv.user_id, req.device.device_id)
+                if existing is None or existing.revoked_at:
+                    raise
+                return self._reuse_enrollment(existing, actor_user_id=actor_user_id)
+        self._sync_peer(peer)
 
-        self._store.append_audit(AuditEvent(
+        self._audit(AuditEvent(
             ts=utcnow(),
             actor_user_id=actor_user_id,
             action="network.enroll",
-            subject=peer_id,
-            meta={"user_id": inv.user_id, "device_id": req.device.device_id, "overlay_ip": overlay_ip},
+            subject=peer.peer_id,
+            meta={"user_id": inv.user_id, "device_id": req.device.device_id, "overlay_ip": peer.overlay_ip, "overlay_ip6": peer.overlay_ip6},
         ))
 
         # Note: We do NOT return peer_priv in MVP (client-side keys recommended).
-        cfg_text = self._render_client_config(peer_pub, overlay_ip)
+        return self._enrollment_response(peer)
+
+    # ----------------- Peer admin -----------------
+    def _reuse_enrollment(self, existing: PeerInfo, *, actor_user_id: str) -> EnrollmentResponse:
+        self._audit(AuditEvent(ts=utcnow(), actor_user_id=actor_user_id, action="network.enroll.reuse", subject=existing.peer_id, meta={"user_id": existing.user_id, "device_id": existing.device_id}))
+        return self._enrollment_response(existing)
+
+    def _enrollment_response(self, peer: PeerInfo) -> EnrollmentResponse:
         return EnrollmentResponse(
             peer_id=peer.peer_id,
             overlay_ip=peer.overlay_ip,
-            client_config_text=cfg_text,
+            overlay_ip6=peer.overlay_ip6,
+            client_config_text=self._render_client_config(peer),
             server_endpoint=self._cfg.wg_server_endpoint,
             expires_at=None,
         )
 
-    # ----------------- Peer admin -----------------
+    def client_config(self, *, user_id: str, device_id: Optional[str] = None) -> Optional[EnrollmentResponse]:
+        """Config of the user's active peer (for `device_id`, else the first one); no invite needed."""
+        if device_id is not None:
+            peer = self._store.find_peer_by_user_device(user_id, device_id)
+            if peer is not None and peer.revoked_at:
+                peer = None
+        else:
+            peer = self._store.find_active_peer_by_user(user_id)
+        return self._enrollment_response(peer) if peer is not None else None
+
+    def export_client_configs(self, *, actor_user_id: str, after: Optional[str] = None,
+                              flt: Optional[PeerFilter] = None) -> Iterator[ClientConfigExport]:
+        """
+        Configs of the active peers in peer_id order (fleet provisioning). Lazy: configs
+        are rendered while the caller consumes them (in-memory store: one revision, as of this call).
+        """
+        self._audit(AuditEvent(ts=utcnow(), actor_user_id=actor_user_id, action="network.config.export", subject=None,
+                               meta={"after": after, "filter": {k: str(v) for k, v in vars(flt).items() if v is not None} if flt else {}}))
+        peers = self._store.iter_peers(after=after, flt=flt)
+        return (
+            ClientConfigExport(
+                peer_id=p.peer_id,
+                user_id=p.user_id,
+                device_id=p.device_id,
+                overlay_ip=p.overlay_ip,
+                overlay_ip6=p.overlay_ip6,
+                client_config_text=self._render_client_config(p),
+            )
+            for p in peers if not p.revoked_at
+        )
+
+    def peer_changes(self, *, since: Optional[int], epoch: Optional[str] = None, limit: int = 500) -> PeerChangesPage:
+        """
+        Delta of the peer set after revision `since`; several changes of one peer
+        within the page collapse into its last one. A foreign `epoch` (other store /
+        restarted in-memory store) or a `since` outside the retained log -> resync.
+        """
+        store_epoch = self._store.epoch
+        log = self._store.peer_changes(None if epoch is not None and epoch != store_epoch else since, limit=limit)
+        if log.resync:
+            return PeerChangesPage(epoch=store_epoch, revision=log.revision, head=log.revision, resync=True)
+        latest = {}
+        for rev, op, peer in log.changes:
+            latest.pop(peer.peer_id, None)
+            latest[peer.peer_id] = PeerChange(revision=rev, op=op, peer=peer)
+        revision = log.changes[-1][0] if log.changes else since
+        return PeerChangesPage(
+            epoch=store_epoch,
+            revision=revision,
+            head=log.revision,
+            more=revision < log.revision,
+            changes=list(latest.values()),
+        )
+
+    def peer_version(self) -> Tuple[str, int]:
+        """
+        (store epoch + policy revision, peer generation): changes whenever any peer
+        read could change, including rendered configs after a policy reload.
+        """
+        return f"{self._store.epoch}.{self.policy.revision}", self._store.peer_generation()
+
     def list_peers(self) -> List[PeerInfo]:
         return self._store.list_peers()
 
+    def iter_peers(self, *, after: Optional[str] = None, flt: Optional[PeerFilter] = None) -> Iterator[PeerInfo]:
+        return self._store.iter_peers(after=after, flt=flt)
+
+    def active_peer_for_user(self, user_id: str) -> Optional[PeerInfo]:
+        return self._store.find_active_peer_by_user(user_id)
+
     def revoke_peer(self, *, actor_user_id: str, peer_id: str) -> PeerInfo:
-        p = self._store.revoke_peer(peer_id)
+        ts = utcnow()
+        p = self._store.revoke_peer(peer_id, ts=ts)
         if not p:
             raise KeyError("peer not found")
-        self._store.append_audit(AuditEvent(ts=utcnow(), actor_user_id=actor_user_id, action="network.peer.revoke", subject=peer_id, meta={}))
+        if p.revoked_at == ts:
+            # only a fresh revoke gives the address back (repeat revokes are no-ops)
+            self._pool.release(p.overlay_ip, p.overlay_ip6, now=ts.timestamp())
+            self._sync_peer(p)
+            self._heartbeats.forget(peer_id)
+        self._audit(AuditEvent(ts=utcnow(), actor_user_id=actor_user_id, action="network.peer.revoke", subject=peer_id, meta={}))
         return p
 
     def update_peer(self, *, actor_user_id: str, peer_id: str, allowed_ips: Optional[List[str]] = None, tags: Optional[dict] = None) -> PeerInfo:
         p = self._store.update_peer(peer_id, allowed_ips=allowed_ips, tags=tags)
         if not p:
             raise KeyError("peer not found")
-        self._store.append_audit(AuditEvent(ts=utcnow(), actor_user_id=actor_user_id, action="network.peer.update", subject=peer_id, meta={"allowed_ips": allowed_ips is not None, "tags": tags is not None}))
+        self._sync_peer(p)
+        self._audit(AuditEvent(ts=utcnow(), actor_user_id=actor_user_id, action="network.peer.update", subject=peer_id, meta={"allowed_ips": allowed_ips is not None, "tags": tags is not None}))
         return p
 
+    def revoke_peers(self, *, actor_user_id: str, peer_ids: List[str]) -> PeerBatchResult:
+        """Bulk offboarding: one store call, one coalesced audit record, per-item results."""
+        ts = utcnow()
+        ids = list(dict.fromkeys(peer_ids))
+        res = self._store.revoke_peers(ids, ts=ts)
+        out = PeerBatchResult()
+        revoked: List[str] = []
+        for pid in ids:
+            p = res.get(pid)
+            if p is None:
+                out.results.append(BatchItemResult(peer_id=pid, ok=False, error="peer not found"))
+                continue
+            if p.revoked_at == ts:
+                self._pool.release(p.overlay_ip, p.overlay_ip6, now=ts.timestamp())
+                self._sync_peer(p)
+                self._heartbeats.forget(pid)
+                revoked.append(pid)
+            out.results.append(BatchItemResult(peer_id=pid, ok=True, peer=p))
+        out.ok = sum(1 for r in out.results if r.ok)
+        out.failed = len(out.results) - out.ok
+        self._audit(AuditEvent(ts=ts, actor_user_id=actor_user_id, action="network.peer.revoke.batch", subject=None, meta={"count": len(ids), "revoked": revoked, "failed": out.failed}))
+        return out
+
+    def update_peers(self, *, actor_user_id: str, items: List[PeerBatchPatchItem]) -> PeerBatchResult:
+        res = self._store.update_peers([(it.peer_id, it.allowed_ips, it.tags) for it in items])
+        out = PeerBatchResult()
+        for it in items:
+            p = res.get(it.peer_id)
+            if p is None:
+                out.results.append(BatchItemResult(peer_id=it.peer_id, ok=False, error="peer not found"))
+            else:
+                self._sync_peer(p)
+                out.results.append(BatchItemResult(peer_id=it.peer_id, ok=True, peer=p))
+        out.ok = sum(1 for r in out.results if r.ok)
+        out.failed = len(out.results) - out.ok
+        self._audit(AuditEvent(ts=utcnow(), actor_user_id=actor_user_id, action="network.peer.update.batch", subject=None, meta={"count": len(items), "peer_ids": [r.peer_id for r in out.results if r.ok], "failed": out.failed}))
+        return out
+
+    def query_audit(self, **filters) -> AuditPage:
+        if self._audit_writer is not None:
+            self._audit_writer.flush()  # admin reads see their own writes
+        return self._store.query_audit(**filters)
+
+    def invite_stats(self) -> dict:
+        return self._store.invite_stats()
+
+    def audit_stats(self) -> Optional[dict]:
+        return self._audit_writer.stats() if self._audit_writer is not None else None
+
+    def pool_stats(self) -> dict:
+        """IPv4 range of the default pool (the historical single pool)."""
+        return self._pool.default.v4.stats()
+
+    def pools_stats(self) -> List[dict]:
+        """Every pool and address family."""
+        return self._pool.stats()
+
+    def peer_counts(self) -> dict:
+        return self._store.peer_counts()
+
+    def heartbeat_count(self) -> int:
+        return len(self._heartbeats)
+
+    def config_render_stats(self) -> dict:
+        return self.renderer.stats()
+
+    def sync_stats(self) -> Optional[dict]:
+        return self._sync.stats() if self._sync is not None else None
+
     # ----------------- Status -----------------
+    def heartbeat(self, *, user_id: str, device_id: Optional[str] = None) -> Optional[PeerInfo]:
+        """Mark the caller's active peer as seen; None if the caller has no active peer."""
+        if device_id:
+            peer = self._store.find_peer_by_user_device(user_id, device_id)
+        else:
+            peer = self._store.find_active_peer_by_user(user_id)
+        if peer is None or peer.revoked_at:
+            return None
+        self._heartbeats.touch(peer.peer_id)
+        return peer
+
     def status_for_peer(self, *, peer: Optional[PeerInfo]) -> dict:
+        active = bool(peer and not peer.revoked_at)
         return {
-            "connected": bool(peer and not peer.revoked_at),
+            # connected = active peer that sent a heartbeat within the timeout
+            "connected": active and self._heartbeats.is_alive(peer.peer_id),
             "server_endpoint": self._cfg.wg_server_endpoint,
             "overlay_ip": peer.overlay_ip if peer else None,
-            "peer_seen_at": None,  # can be filled later from telemetry/heartbeats
+            "overlay_ip6": peer.overlay_ip6 if peer else None,
+            "peer_seen_at": self._heartbeats.last_seen(peer.peer_id) if peer else None,
         }
 
-    # ----------------- Internals -----------------
-    def _alloc_overlay_ip(self) -> str:
+    # ----------------- Cross-process coherence -----------------
+    def on_store_change(self, topics: Set[str]) -> None:
         """
-        Simple allocator: sequential scan for a free host address.
-        Reserve server ip and network/broadcast.
+        Called by the store watcher when another worker process wrote to the shared store.
+        Applies the store's peer change log since the last call to the allocator and the
+        sync desired state (own writes come back too; applying them again is a no-op).
+        Only a gap in the retained log forces a full rebuild.
         """
-        used = {p.overlay_ip for p in self._store.list_peers() if not p.revoked_at}
-        used.add(self._server_ip)
+        if "peers" in topics:
+            self._apply_peer_changes()
+            self.changes.notify()
+        if "peer_seen" in topics:
+            self._heartbeats.merge_from_store()
 
-        for host in self._pool.hosts():
-            ip = str(host)
-            if ip in used:
-                continue
-            return ip
-        raise RuntimeError("Overlay IP pool exhausted")
+    # ----------------- Internals -----------------
+    def _apply_peer_changes(self, *, page: int = 1000) -> None:
+        """Watcher thread only."""
+        since = self._peer_rev
+        while True:
+            log = self._store.peer_changes(since, limit=page)
+            if log.resync:
+                logger.warning("⚠️ [WireGuard] Change-Log lückenhaft (rev {} -> {}), lade alle Peers neu.", since, log.revision)
+                peers = self._store.list_peers()
+                self._pool = self._load_pool(peers)
+                if self._sync is not None:
+                    self._sync.reload(peers)
+                self._peer_rev = log.revision
+                return
+            for rev, op, peer in log.changes:
+                self._apply_peer_state(op, peer)
+                since = rev
+            self._peer_rev = since
+            if not log.changes or since >= log.revision:
+                return
+
+    def _apply_peer_state(self, op: str, peer: PeerInfo) -> None:
+        pool = self._pool
+        if not peer.revoked_at:
+            pool.mark_used(peer.overlay_ip, peer.overlay_ip6)
+        elif op == "revoke":
+            pool.release(peer.overlay_ip, peer.overlay_ip6, now=peer.revoked_at.timestamp())
+            self._heartbeats.forget(peer.peer_id, persist=False)
+        else:
+            # edit of an already revoked peer: its address may belong to a newer peer by now,
+            # mark_quarantined never takes an address away from an active one
+            pool.mark_quarantined(peer.overlay_ip, peer.overlay_ip6, released_at=peer.revoked_at.timestamp())
+        if self._sync is not None:
+            self._sync.peer_changed(peer)
+
+    def _audit(self, event: AuditEvent) -> None:
+        """Queue for the background writer if configured, else write through."""
+        if self._audit_writer is not None:
+            self._audit_writer.submit(event)
+        else:
+            self._store.append_audit(event)
 
-    def _render_client_config(self, peer_public_key: str, overlay_ip: str) -> str:
+    def _sync_peer(self, peer: PeerInfo) -> None:
         """
-        Minimal client config. In a full setup you'd also provide:
-        - DNS
-        - PostUp routing docs
-        - per-role allowed IP sets
+        Hand the changed peer to the server-side sync (applied debounced in the background)
+        and wake change-feed watchers.
         """
-        dns_line = f"DNS = {self._cfg.wg_dns}\n" if self._cfg.wg_dns else ""
-        # NOTE: We are not embedding a private key (client should generate it).
-        return (
-            "[Interface]\n"
-            f"Address = {overlay_ip}/32\n"
-            f"{dns_line}"
-            "\n"
-            "[Peer]\n"
-            f"PublicKey = {self._cfg.wg_server_public_key}\n"
-            f"Endpoint = {self._cfg.wg_server_endpoint}\n"
-            f"AllowedIPs = {', '.join(self._cfg.default_allowed_ips or [self._cfg.wg_subnet])}\n"
-            f"PersistentKeepalive = {self._cfg.wg_persistent_keepalive}\n"
+        if self._sync is not None:
+            self._sync.peer_changed(peer)
+        self.changes.notify()
+
+    def _load_pool(self, peers: Iterable[PeerInfo]) -> PoolSet:
+        """
+        Build allocator state from the store (startup / foreign writes).
+        Active peers hold their addresses, recently revoked peers keep theirs until quarantine ends.
+        Addresses outside every configured pool (e.g. a pool was removed) are ignored.
+        """
+        pool = PoolSet(
+            self._cfg.pool_specs(),
+            reserved=self._server_ips,
+            quarantine_seconds=self._cfg.ip_quarantine_seconds,
         )
+        for p in peers:
+            if p.revoked_at:
+                pool.mark_quarantined(p.overlay_ip, p.overlay_ip6, released_at=p.revoked_at.timestamp())
+            else:
+                pool.mark_used(p.overlay_ip, p.overlay_ip6)
+        return pool
+
+    def _allocate_and_save(self, *, user_id: str, device_id: str, public_key: str, tags: dict, attempts: int = 8) -> PeerInfo:
+        """
+        Allocation is atomic inside the allocator; if persisting fails the address
+        goes straight back (no quarantine), so a failed enroll never leaks an IP.
+        An address that a shared store reports as taken by another worker is kept
+        as used and the next one is tried.
+        """
+        for _ in range(attempts - 1):
+            try:
+                return self._try_allocate_and_save(user_id=user_id, device_id=device_id, public_key=public_key, tags=tags)
+            except PeerConflict as e:
+                if e.field not in ("overlay_ip", "overlay_ip6"):
+                    raise
+        return self._try_allocate_and_save(user_id=user_id, device_id=device_id, public_key=public_key, tags=tags)
+
+    def _try_allocate_and_save(self, *, user_id: str, device_id: str, public_key: str, tags: dict) -> PeerInfo:
+        pool = self._pool
+        # the pool is picked once, here; later tag edits never move a peer
+        overlay_ip, overlay_ip6 = pool.select(tags).allocate(key=public_key)
+        try:
+            peer = PeerInfo(
+                peer_id=f"wg_{secrets.token_hex(8)}",
+                user_id=user_id,
+                device_id=device_id,
+                overlay_ip=overlay_ip,
+                overlay_ip6=overlay_ip6,
+                allowed_ips=list(self._cfg.default_allowed_ips or [self._cfg.wg_subnet]),
+                public_key=public_key,
+                created_at=utcnow(),
+                revoked_at=None,
+                tags=tags,
+            )
+            self._store.save_peer(peer)
+        except PeerConflict as e:
+            if e.field == "overlay_ip":
+                pool.release(overlay_ip6, quarantine=False)
+            elif e.field == "overlay_ip6":
+                pool.release(overlay_ip, quarantine=False)
+            else:
+                pool.release(overlay_ip, overlay_ip6, quarantine=False)
+            raise  # address conflict: the taken address stays marked used in this worker's pool
+        except BaseException:
+            pool.release(overlay_ip, overlay_ip6, quarantine=False)
+            raise
+        return peer
+
+    def _render_client_config(self, peer: PeerInfo) -> str:
+        """Client config; AllowedIPs come from the tag policy (see PolicyEngine / ConfigRenderer)."""
+        return self.renderer.render(peer.overlay_ip, peer.overlay_ip6, self.policy.allowed_ips(peer.tags))
@@ -0,0 +1,65 @@
+# backend/network/workers.py
+from __future__ import annotations
+
+import threading
+from typing import Callable, Optional
+
+from loguru import logger
+
+
+class IntervalWorker:
+    """
+    Daemon thread that calls `fn` every `interval` seconds.
+
+    - `wake()` triggers an early run (e.g. a batch filled up)
+    - `stop()` ends the loop and runs `fn` one final time (flush on shutdown)
+    Exceptions from `fn` are logged and do not kill the thread.
+    """
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], object], *, final_run: bool = True) -> None:
+        self.name = name
+        self._interval = max(0.001, interval)
+        self._fn = fn
+        self._final_run = final_run
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        t = self._thread
+        if t is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        t.join(timeout)
+        self._thread = None
+        if self._final_run:
+            self._run_once()
+
+    def _loop(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            if self._stopping:
+                break
+            self._run_once()
+
+    def _run_once(self) -> None:
+        try:
+            self._fn()
+        except Exception as e:
+            logger.error("❌ [{}] Worker-Lauf fehlgeschlagen: {}", self.name, e)
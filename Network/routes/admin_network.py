@@ -1,11 +1,43 @@
 # Network/routes/admin_network.py
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+import json
+from dataclasses import replace
+from datetime import datetime
+from itertools import islice
+from time import monotonic
+from typing import AsyncIterator, Iterator, List, Optional
+from urllib.parse import urlencode
 
-from Network.network.models import AdminPeerPatch, InviteCreate, InviteInfo, PeerInfo
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from Network import bootstrap
+from Network.network.models import (
+    AdminPeerPatch,
+    AuditPage,
+    AuditWriterStats,
+    InviteBatchCreate,
+    InviteBatchResult,
+    InviteCreate,
+    InviteInfo,
+    InviteStats,
+    PeerBatchPatch,
+    PeerBatchResult,
+    PeerBatchRevoke,
+    PeerChangesPage,
+    PeerInfo,
+    PolicyGrant,
+    PolicyInfo,
+    PoolStats,
+    TrustedNetworksInfo,
+    WgSyncStats,
+)
+from Network.network.policy import PolicyEngine
+from Network.network.store import PeerFilter
 from Network.network.wireguard import WireGuardManager
-from Network.routes.network import require_trusted_network
+from Network.routes.network import admission, cached_response, require_trusted_network
 
 router = APIRouter(prefix="/api/admin/network", tags=["admin-network"])
 
@@ -40,6 +72,7 @@ def get_wg_manager(request: Request) -> WireGuardManager:
 @router.post("/invites", response_model=InviteInfo)
 def create_invite(
     payload: InviteCreate,
+    ___: None = Depends(admission("invite")),
     __: None = Depends(require_admin_dep),
     _actor_user_id: str = Depends(get_current_user_id),
     wg: WireGuardManager = Depends(get_wg_manager),
@@ -47,13 +80,211 @@ def create_invite(
     return wg.create_invite(user_id=payload.user_id, device_id=payload.device_id, ttl_seconds=payload.ttl_seconds)
 
 
+@router.post("/invites/batch", response_model=InviteBatchResult)
+def create_invites(
+    payload: InviteBatchCreate,
+    ___: None = Depends(admission("invite")),
+    __: None = Depends(require_admin_dep),
+    actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    return InviteBatchResult(items=wg.create_invites(actor_user_id=actor_user_id, items=payload.items))
+
+
+@router.get("/invites/stats", response_model=InviteStats)
+def invite_stats(
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    return InviteStats(**wg.invite_stats())
+
+
+NDJSON = "application/x-ndjson"
+
+
+def _peer_filter(
+    user_id: Optional[str] = None,
+    device_id: Optional[str] = None,
+    revoked: Optional[bool] = None,
+    tag: Optional[str] = Query(default=None, description="key or key=value"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> PeerFilter:
+    tag_key, tag_value = None, None
+    if tag:
+        k, sep, v = tag.partition("=")
+        tag_key, tag_value = k, (v if sep else None)
+    return PeerFilter(
+        user_id=user_id,
+        device_id=device_id,
+        revoked=revoked,
+        tag_key=tag_key,
+        tag_value=tag_value,
+        created_after=created_after,
+        created_before=created_before,
+    )
+
+
 @router.get("/peers", response_model=list[PeerInfo])
 def list_peers(
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1, le=5000, description="page size (omit = all)"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor of the previous page"),
+    format: Optional[str] = Query(default=None, pattern="^(json|ndjson)$"),
+    flt: PeerFilter = Depends(_peer_filter),
     __: None = Depends(require_admin_dep),
     _actor_user_id: str = Depends(get_current_user_id),
     wg: WireGuardManager = Depends(get_wg_manager),
 ):
-    return wg.list_peers()
+    """
+    Peers ordered by peer_id. With `limit`, the cursor for the next page is
+    returned in the `X-Next-Cursor` header (absent on the last page).
+    `format=ndjson` (or `Accept: application/x-ndjson`) streams one peer per line.
+    JSON pages carry an ETag; `If-None-Match` answers 304 while no peer changed.
+    """
+    ndjson = format == "ndjson" or (format is None and NDJSON in request.headers.get("accept", ""))
+    if ndjson:
+        peers: Iterator[PeerInfo] = wg.iter_peers(after=cursor, flt=flt)
+        if limit is not None:
+            peers = islice(peers, limit)
+        # serialized lazily while the client reads; nothing is collected up front
+        return StreamingResponse((p.model_dump_json() + "\n" for p in peers), media_type=NDJSON)
+
+    def build():
+        # read after cached_response took the ETag: the body is never older than its tag
+        # (a write in between only makes the next poll rebuild once)
+        rows, headers = wg.iter_peers(after=cursor, flt=flt), {}
+        if limit is not None:
+            page = list(islice(rows, limit + 1))
+            if len(page) > limit:
+                page = page[:limit]
+                headers["X-Next-Cursor"] = page[-1].peer_id
+            rows = iter(page)
+        # pre-serialized: skips response_model re-validation
+        return b"[" + b",".join(p.model_dump_json().encode("utf-8") for p in rows) + b"]", headers
+
+    # unchanged polls: 304 or cached bytes (keyed by the query, versioned by the peer generation)
+    key = "admin.peers?" + urlencode(sorted(request.query_params.multi_items()))
+    return cached_response(request, wg, key, build)
+
+
+@router.get("/configs", response_class=StreamingResponse)
+def export_configs(
+    limit: Optional[int] = Query(default=None, ge=1, description="max configs (omit = all)"),
+    cursor: Optional[str] = Query(default=None, description="peer_id of the last config received"),
+    flt: PeerFilter = Depends(_peer_filter),
+    __: None = Depends(require_admin_dep),
+    actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    """
+    Client configs of the active peers as NDJSON (one ClientConfigExport per line),
+    ordered by peer_id and rendered while the client reads. Peer filters as for
+    GET /peers (revoked peers have no config). To resume an interrupted export,
+    pass the last received peer_id as `cursor`.
+    """
+    configs = wg.export_client_configs(actor_user_id=actor_user_id, after=cursor, flt=replace(flt, revoked=False))
+    if limit is not None:
+        configs = islice(configs, limit)
+    return StreamingResponse((c.model_dump_json() + "\n" for c in configs), media_type=NDJSON)
+
+
+@router.get("/peers/changes", response_model=PeerChangesPage)
+async def peer_changes(
+    since: Optional[int] = Query(default=None, ge=0, description="`revision` of the previous page (omit = start with a resync)"),
+    epoch: Optional[str] = Query(default=None, description="`epoch` of the previous page"),
+    limit: int = Query(default=500, ge=1, le=5000),
+    wait: float = Query(default=0, ge=0, le=60, description="long-poll: seconds to hold the request until something changes"),
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    """
+    Peer deltas after revision `since` (one entry per changed peer, current state).
+    `resync=true`: `since` is older than the retained log or from another epoch ->
+    reload GET /peers, then continue with `since=revision`. Waiting long-polls hold
+    no worker thread.
+    """
+    deadline = monotonic() + wait
+    while True:
+        seq = wg.changes.seq  # read before the store: a change in between ends the wait at once
+        page = await run_in_threadpool(wg.peer_changes, since=since, epoch=epoch, limit=limit)
+        remaining = deadline - monotonic()
+        if page.changes or page.resync or remaining <= 0:
+            return page
+        if not await wg.changes.wait(seq, remaining):
+            return page
+
+
+SSE_PING_SECONDS = 15.0
+
+
+def _sse(event: str, event_id: str, data: str) -> bytes:
+    return f"event: {event}\nid: {event_id}\ndata: {data}\n\n".encode("utf-8")
+
+
+@router.get("/peers/watch")
+async def watch_peers(
+    request: Request,
+    since: Optional[int] = Query(default=None, ge=0),
+    epoch: Optional[str] = Query(default=None),
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    """
+    Server-Sent Events: `change` (data = PeerChange, id = "<epoch>:<revision>"),
+    a `: ping` comment every 15 s when idle, and `resync` (data = epoch + revision)
+    which ends the stream: reload GET /peers, then reconnect. EventSource resumes
+    from `Last-Event-ID` on its own, including after a resync.
+    """
+    last_id = request.headers.get("last-event-id") or ""
+    ep, _, rev = last_id.rpartition(":")
+    if ep and rev.isdigit():
+        epoch, since = ep, int(rev)
+
+    async def events() -> AsyncIterator[bytes]:
+        cur, cur_epoch = since, epoch
+        while True:
+            seq = wg.changes.seq
+            page = await run_in_threadpool(wg.peer_changes, since=cur, epoch=cur_epoch, limit=500)
+            if page.resync:
+                yield _sse("resync", f"{page.epoch}:{page.revision}", json.dumps({"epoch": page.epoch, "revision": page.revision}))
+                return
+            for ch in page.changes:
+                yield _sse("change", f"{page.epoch}:{ch.revision}", ch.model_dump_json())
+            cur, cur_epoch = page.revision, page.epoch
+            if page.more:
+                continue
+            if not await wg.changes.wait(seq, SSE_PING_SECONDS):
+                yield b": ping\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/peers/revoke", response_model=PeerBatchResult)
+def revoke_peers(
+    payload: PeerBatchRevoke,
+    __: None = Depends(require_admin_dep),
+    actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    return wg.revoke_peers(actor_user_id=actor_user_id, peer_ids=payload.peer_ids)
+
+
+@router.patch("/peers", response_model=PeerBatchResult)
+def patch_peers(
+    payload: PeerBatchPatch,
+    __: None = Depends(require_admin_dep),
+    actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    return wg.update_peers(actor_user_id=actor_user_id, items=payload.items)
 
 
 @router.post("/peers/{peer_id}/revoke", response_model=PeerInfo)
@@ -86,3 +317,118 @@ def patch_peer(
         )
     except KeyError as e:
         raise HTTPException(status_code=404, detail=str(e)) from e
+
+
+@router.get("/pool", response_model=PoolStats)
+def pool_stats(
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    return PoolStats(**wg.pool_stats())
+
+
+@router.get("/pools", response_model=List[PoolStats])
+def pools_stats(
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    return [PoolStats(**st) for st in wg.pools_stats()]
+
+
+@router.get("/wg-sync", response_model=WgSyncStats)
+def wg_sync_stats(
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    st = wg.sync_stats()
+    if st is None:
+        raise HTTPException(status_code=404, detail="WireGuard sync disabled (WG_SYNC_MODE=off)")
+    return WgSyncStats(**st)
+
+
+@router.post("/trusted-networks/reload", response_model=TrustedNetworksInfo)
+def reload_trusted_networks(
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+):
+    try:
+        tn = bootstrap.reload_trusted_networks()
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid NETWORK_TRUSTED_CIDRS: {e}") from e
+    return TrustedNetworksInfo(cidrs=tn.cidrs, trust_proxy=tn.trust_proxy)
+
+
+def _policy_info(policy: PolicyEngine) -> PolicyInfo:
+    return PolicyInfo(
+        base=list(policy.base),
+        grants=[PolicyGrant(name=g.name, cidrs=list(g.cidrs), match=dict(g.match)) for g in policy.grants],
+        **{k: v for k, v in policy.stats().items() if k != "grants"},
+    )
+
+
+@router.get("/policies", response_model=PolicyInfo)
+def policies(
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    """Tag policy (WG_POLICIES) behind the AllowedIPs of client configs."""
+    return _policy_info(wg.policy)
+
+
+@router.post("/policies/reload", response_model=PolicyInfo)
+def reload_policies(
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+):
+    try:
+        policy = bootstrap.reload_policies()
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid WG_POLICIES: {e}") from e
+    return _policy_info(policy)
+
+
+@router.get("/audit/stats", response_model=AuditWriterStats)
+def audit_stats(
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    st = wg.audit_stats()
+    if st is None:
+        raise HTTPException(status_code=404, detail="Audit writer disabled (NETWORK_AUDIT_ASYNC=0)")
+    return AuditWriterStats(**st)
+
+
+@router.get("/audit", response_model=AuditPage)
+def list_audit(
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    action: Optional[str] = None,
+    subject: Optional[str] = None,
+    actor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    __: None = Depends(require_admin_dep),
+    _actor_user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    try:
+        return wg.query_audit(
+            limit=limit,
+            cursor=cursor,
+            action=action,
+            subject=subject,
+            actor_user_id=actor,
+            since=since,
+            until=until,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
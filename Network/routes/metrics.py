@@ -0,0 +1,23 @@
+# Network/routes/metrics.py
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+
+from Network.network.metrics import CONTENT_TYPE, MetricsRegistry
+from Network.routes.network import require_trusted_network
+
+router = APIRouter(tags=["metrics"])
+
+
+# sync on purpose: rendering + gauge callbacks (store counters, stats locks) run in the
+# threadpool, not on the event loop that serves the requests being measured
+@router.get("/metrics", include_in_schema=False)
+def metrics(
+    request: Request,
+    _: None = Depends(require_trusted_network),
+):
+    registry: MetricsRegistry | None = getattr(request.app.state, "metrics", None)
+    if registry is None:
+        raise HTTPException(status_code=404, detail="Metrics disabled (NETWORK_METRICS=0)")
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -1,12 +1,14 @@
 # Network/routes/network.py
 from __future__ import annotations
 
-import os
-from ipaddress import ip_address, ip_network
+from typing import AsyncIterator, Callable, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
-from Network.network.models import EnrollmentRequest, EnrollmentResponse, NetworkStatus, PeerInfo
+from Network.network.admission import Rejected
+from Network.network.models import EnrollmentRequest, EnrollmentResponse, HeartbeatRequest, NetworkStatus, PeerInfo
+from Network.network.response_cache import Built, etag_matches, make_etag
+from Network.network.trust import TrustedNetworks
 from Network.network.wireguard import WireGuardManager
 
 router = APIRouter(prefix="/api/network", tags=["network"])
@@ -29,21 +31,17 @@ def get_wg_manager(request: Request) -> WireGuardManager:
     return mgr
 
 
-def _parse_trusted_cidrs() -> list:
-    raw = (os.getenv("NETWORK_TRUSTED_CIDRS") or "").strip()
-    if not raw:
-        raw = "10.0.0.0/8,172.16.0.0/12,192.168.0.0/16"
-    cidrs = []
-    for part in raw.split(","):
-        part = part.strip()
-        if part:
-            cidrs.append(ip_network(part, strict=False))
-    return cidrs
+def get_trusted_networks(request: Request) -> TrustedNetworks:
+    tn = getattr(request.app.state, "trusted_networks", None)
+    if tn is None:
+        # not bootstrapped (e.g. router mounted standalone): compile once from ENV
+        tn = TrustedNetworks.from_env()
+        request.app.state.trusted_networks = tn
+    return tn
 
 
 def _get_client_ip(request: Request) -> str:
-    trust_proxy = (os.getenv("NETWORK_TRUST_PROXY") or "0").strip() == "1"
-    if trust_proxy:
+    if get_trusted_networks(request).trust_proxy:
         xff = (request.headers.get("x-forwarded-for") or "").strip()
         if xff:
             return xff.split(",")[0].strip()
@@ -62,36 +60,98 @@ def require_trusted_network(request: Request) -> None:
         raise HTTPException(status_code=403, detail="Untrusted network (no client ip)")
 
     try:
-        ip = ip_address(ip_s)
-    except Exception:
+        trusted = get_trusted_networks(request).contains(ip_s)
+    except ValueError:
         raise HTTPException(status_code=403, detail="Untrusted network (bad client ip)")
 
-    for net in _parse_trusted_cidrs():
-        if ip in net:
-            return
+    if trusted:
+        return
 
     raise HTTPException(status_code=403, detail="Untrusted network")
 
 
+def admission(class_name: str):
+    """
+    Dependency factory: admit the request into admission class `class_name`
+    (rate limits by client IP / user, concurrency bulkhead). Shed requests get
+    429 / 503 with Retry-After before they occupy a worker thread.
+
+    Declare it as the route's first dependency: FastAPI resolves dependencies in
+    parameter order and runs every sync one (require_trusted_network,
+    get_current_user_id, ...) in the threadpool, so anything listed before it
+    would take a thread even for requests that are then shed.
+    """
+
+    async def dep(request: Request) -> AsyncIterator[None]:
+        adm = getattr(request.app.state, "admission", None)
+        cls = adm.get(class_name) if adm is not None else None
+        if cls is None:
+            yield
+            return
+        try:
+            await cls.acquire(ip=_get_client_ip(request), user=request.headers.get("x-user-id") or "")
+        except Rejected as e:
+            raise HTTPException(
+                status_code=e.status,
+                detail=f"Overloaded ({e.reason}), retry later",
+                headers={"Retry-After": str(e.retry_after)},
+            ) from e
+        try:
+            yield
+        finally:
+            cls.release()
+
+    return dep
+
+
+def cached_response(request: Request, wg: WireGuardManager, key: str, build: Callable[[], Built]) -> Response:
+    """
+    JSON response derived from peer data, serialized once per peer generation.
+    `key` must cover everything the body depends on besides the peers (query, caller).
+    If-None-Match with the current ETag -> 304 without reading any peer.
+    """
+    epoch, gen = wg.peer_version()
+    etag = make_etag(epoch, gen, key)
+    cache = getattr(request.app.state, "response_cache", None)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        if cache is not None:
+            cache.not_modified += 1
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    body, headers = cache.get_or_build(key, etag, build) if cache is not None else build()
+    return Response(content=body, media_type="application/json",
+                    headers={**headers, "ETag": etag, "Cache-Control": "private, no-cache"})
+
+
 @router.get("/status", response_model=NetworkStatus)
 def network_status(
     _: None = Depends(require_trusted_network),
     user_id: str = Depends(get_current_user_id),
     wg: WireGuardManager = Depends(get_wg_manager),
 ):
-    peers = wg.list_peers()
-    peer = next((p for p in peers if p.user_id == user_id and not p.revoked_at), None)
+    peer = wg.active_peer_for_user(user_id)
     return NetworkStatus(**wg.status_for_peer(peer=peer))
 
 
+@router.post("/heartbeat", status_code=status.HTTP_204_NO_CONTENT)
+def heartbeat(
+    payload: Optional[HeartbeatRequest] = None,
+    _: None = Depends(require_trusted_network),
+    user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    # in-memory only; persisted in batches by the heartbeat flusher
+    if not wg.heartbeat(user_id=user_id, device_id=payload.device_id if payload else None):
+        raise HTTPException(status_code=404, detail="No active peer for user")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.get("/peers/self", response_model=PeerInfo)
 def peer_self(
     _: None = Depends(require_trusted_network),
     user_id: str = Depends(get_current_user_id),
     wg: WireGuardManager = Depends(get_wg_manager),
 ):
-    peers = wg.list_peers()
-    peer = next((p for p in peers if p.user_id == user_id and not p.revoked_at), None)
+    peer = wg.active_peer_for_user(user_id)
     if not peer:
         raise HTTPException(status_code=404, detail="No active peer for user")
     return peer
@@ -100,7 +160,8 @@ def peer_self(
 @router.post("/enroll", response_model=EnrollmentResponse)
 def enroll(
     payload: EnrollmentRequest,
-    _: None = Depends(require_trusted_network),  
+    __: None = Depends(admission("enroll")),
+    _: None = Depends(require_trusted_network),
     user_id: str = Depends(get_current_user_id),
     wg: WireGuardManager = Depends(get_wg_manager),
 ):
@@ -108,3 +169,22 @@ def enroll(
         return wg.enroll(actor_user_id=user_id, req=payload)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.get("/config", response_model=EnrollmentResponse)
+def client_config(
+    request: Request,
+    device_id: Optional[str] = Query(default=None, min_length=3, max_length=128),
+    _: None = Depends(require_trusted_network),
+    user_id: str = Depends(get_current_user_id),
+    wg: WireGuardManager = Depends(get_wg_manager),
+):
+    """Current client config of the caller's active peer (ETag / If-None-Match for polling clients)."""
+
+    def build() -> Built:
+        cfg = wg.client_config(user_id=user_id, device_id=device_id)
+        if cfg is None:
+            raise HTTPException(status_code=404, detail="No active peer for user")
+        return cfg.model_dump_json().encode("utf-8"), {}
+
+    return cached_response(request, wg, f"config\0{user_id}\0{device_id or ''}", build)